@@ -0,0 +1,134 @@
+"""Add normalized_title to tags
+
+Revision ID: cdbab6ae8a69
+Revises: 76c3d4bf5ea1
+Create Date: 2026-10-19 18:31:48.004442
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cdbab6ae8a69"
+down_revision: Union[str, None] = "76c3d4bf5ea1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+tags = sa.table(
+    "tags",
+    sa.column("id", sa.String()),
+    sa.column("title", sa.String()),
+    sa.column("normalized_title", sa.String()),
+    sa.column("owner_id", sa.String()),
+    sa.column("created_at", sa.DateTime()),
+)
+changes = sa.table(
+    "changes",
+    sa.column("owner_id", sa.String()),
+    sa.column("entity", sa.String()),
+    sa.column("entity_id", sa.String()),
+    sa.column("operation", sa.String()),
+)
+
+
+def normalize_tag_title(title: str) -> str:
+    # Copied from tasks.models so the migration keeps working if that changes.
+    return title.strip().casefold()
+
+
+def merge_tag_links(
+    bind: sa.Connection, table_name: str, tag_id: str, kept_id: str
+) -> None:
+    task_tags = sa.table(
+        table_name, sa.column("task_id", sa.String()), sa.column("tag_id", sa.String())
+    )
+
+    bind.execute(
+        sa.insert(task_tags)
+        .from_select(
+            ["task_id", "tag_id"],
+            sa.select(task_tags.c.task_id, sa.literal(kept_id)).where(
+                task_tags.c.tag_id == tag_id
+            ),
+        )
+        .prefix_with("OR IGNORE")
+    )
+    bind.execute(sa.delete(task_tags).where(task_tags.c.tag_id == tag_id))
+
+
+def upgrade() -> None:
+    bind: sa.Connection = op.get_bind()
+    columns: set[str] = {
+        column["name"] for column in sa.inspect(bind).get_columns("tags")
+    }
+
+    with op.batch_alter_table("tags", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("normalized_title", sa.String(), nullable=True))
+
+        # The model has always had owner_id, but no earlier revision added it,
+        # and the unique index below is per owner.
+        if "owner_id" not in columns:
+            batch_op.add_column(sa.Column("owner_id", sa.String(), nullable=True))
+            batch_op.create_foreign_key(
+                "fk_tags_owner_id_users",
+                "users",
+                ["owner_id"],
+                ["id"],
+                ondelete="CASCADE",
+            )
+
+    # Titles that only differ in case or surrounding spaces become one tag: the
+    # oldest keeps its id and takes over the task links of the others.
+    kept: dict[tuple[str | None, str], str] = {}
+
+    for tag_id, title, owner_id in bind.execute(
+        sa.select(tags.c.id, tags.c.title, tags.c.owner_id).order_by(
+            tags.c.created_at, tags.c.id
+        )
+    ):
+        key: tuple[str | None, str] = (owner_id, normalize_tag_title(title))
+
+        if key not in kept:
+            kept[key] = tag_id
+            bind.execute(
+                sa.update(tags)
+                .where(tags.c.id == tag_id)
+                .values(normalized_title=key[1])
+            )
+            continue
+
+        merge_tag_links(bind, "task_tags", tag_id, kept[key])
+        merge_tag_links(bind, "archived_task_tags", tag_id, kept[key])
+        bind.execute(sa.delete(tags).where(tags.c.id == tag_id))
+
+        if owner_id is not None:
+            bind.execute(
+                sa.insert(changes).values(
+                    owner_id=owner_id,
+                    entity="tag",
+                    entity_id=tag_id,
+                    operation="delete",
+                )
+            )
+
+    with op.batch_alter_table("tags", schema=None) as batch_op:
+        batch_op.alter_column(
+            "normalized_title", existing_type=sa.String(), nullable=False
+        )
+        batch_op.create_index(
+            "ix_tags_owner_id_normalized_title",
+            ["owner_id", "normalized_title"],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    # Merged tags stay merged, and owner_id stays because the model needs it.
+    with op.batch_alter_table("tags", schema=None) as batch_op:
+        batch_op.drop_index("ix_tags_owner_id_normalized_title")
+        batch_op.drop_column("normalized_title")
@@ -0,0 +1,93 @@
+"""Convert task due dates to UTC
+
+Revision ID: 1305244c0266
+Revises: ad89794553e7
+Create Date: 2026-10-19 19:02:41.318520
+
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1305244c0266"
+down_revision: Union[str, None] = "ad89794553e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES: tuple[str, ...] = ("tasks", "archived_tasks")
+
+
+def due_date_zone() -> ZoneInfo:
+    # The zone the API server ran in, e.g. alembic -x due_date_zone=Europe/Berlin upgrade head.
+    name: str | None = context.get_x_argument(as_dictionary=True).get("due_date_zone")
+
+    if name is None:
+        raise RuntimeError("Pass the zone the stored due dates are in: alembic -x due_date_zone=<IANA zone> ...")
+
+    return ZoneInfo(name)
+
+
+def offset_ranges(
+    offset_at: Callable[[datetime], timedelta], start: datetime, end: datetime,
+) -> list[tuple[datetime, timedelta]]:
+    # Every offset in force between start and end, with the minute it starts.
+    day: datetime = start.replace(second=0, microsecond=0)
+    ranges: list[tuple[datetime, timedelta]] = [(day, offset_at(day))]
+
+    while day < end:
+        low, high = day, day + timedelta(days=1)
+
+        if offset_at(high) != ranges[-1][1]:
+            while high - low > timedelta(minutes=1):
+                middle: datetime = low + timedelta(minutes=(high - low) // timedelta(minutes=1) // 2)
+                low, high = (low, middle) if offset_at(middle) != ranges[-1][1] else (middle, high)
+
+            ranges.append((high, offset_at(high)))
+
+        day += timedelta(days=1)
+
+    return ranges
+
+
+def convert_due_dates(offset_in: Callable[[ZoneInfo, datetime], timedelta], sign: int) -> None:
+    connection = op.get_bind()
+    tables: list[sa.TableClause] = [sa.table(name, sa.column("due_date", sa.DateTime())) for name in TABLES]
+    bounds = sa.union_all(
+        *(sa.select(table.c.due_date.label("due_date")).where(table.c.due_date.is_not(None)) for table in tables)
+    ).subquery()
+    start, end = connection.execute(sa.select(sa.func.min(bounds.c.due_date), sa.func.max(bounds.c.due_date))).one()
+
+    if start is None:
+        return
+
+    zone: ZoneInfo = due_date_zone()
+    ranges: list[tuple[datetime, timedelta]] = offset_ranges(lambda moment: offset_in(zone, moment), start, end)
+
+    for table in tables:
+        def shifted(offset: timedelta) -> sa.ColumnElement:
+            # Whole minutes only, so the stored fraction of a second carries over as is.
+            seconds: int = sign * int(offset.total_seconds())
+            stamp = sa.func.strftime("%Y-%m-%d %H:%M:%S", table.c.due_date, f"{seconds:+d} seconds")
+
+            return stamp.op("||")(sa.func.substr(table.c.due_date, 20))
+
+        converted = sa.case(
+            *((table.c.due_date < until, shifted(offset)) for (_, offset), (until, _) in zip(ranges, ranges[1:])),
+            else_=shifted(ranges[-1][1]),
+        )
+        op.execute(table.update().where(table.c.due_date.is_not(None)).values(due_date=converted))
+
+
+def upgrade() -> None:
+    # Due dates were kept in the server's local time; the agenda reads them as UTC.
+    convert_due_dates(lambda zone, local: local.replace(tzinfo=zone).utcoffset(), -1)
+
+
+def downgrade() -> None:
+    convert_due_dates(lambda zone, utc: utc.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset(), 1)
@@ -0,0 +1,18 @@
+import os
+
+
+BENCHMARK_DATABASE_URL: str = os.environ.get('BENCHMARK_DATABASE_URL', 'sqlite+aiosqlite:///benchmark.db')
+
+for key, value in {
+    'APP_TITLE': 'FocusFlow API',
+    'APP_VERSION': 'benchmark',
+    'APP_HOST': '127.0.0.1',
+    'APP_PORT': '8000',
+    'AUTH_SECRET_KEY': 'benchmark-secret',
+    'AUTH_ALGORITHM': 'HS256',
+    'AUTH_ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+    'AUTH_REFRESH_TOKEN_EXPIRE_DAYS': '7',
+    'DATABASE_URL': BENCHMARK_DATABASE_URL,
+    'DATABASE_ECHO': 'false',
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,51 @@
+"""The list queries as they were before the ORM-free read path."""
+from typing import Callable
+
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from tasks.models import Comment, Tag, Task
+from tasks.repository import live_task, tasks_table
+
+
+async def get_tasks(
+    session: AsyncSession, page: int, limit: int, sort_by: ColumnElement, order: Callable, owner_id: str,
+) -> list[Task]:
+    stmt: Select[list[Task]] = (
+        select(Task)
+        .filter_by(owner_id=owner_id)
+        .where(live_task)
+        .options(selectinload(Task.related_tags))
+        .options(selectinload(Task.comments))
+        .order_by(order(sort_by))
+        .offset((page - 1) * limit)
+        .limit(limit)
+    )
+
+    return list((await session.execute(stmt)).scalars())
+
+
+async def get_tags(session: AsyncSession, page: int, limit: int, sort_by: ColumnElement, order: Callable, owner_id: str) -> list[Tag]:
+    stmt: Select[list[Tag]] = (
+        select(Tag)
+        .filter_by(owner_id=owner_id)
+        .order_by(order(sort_by))
+        .offset((page - 1) * limit)
+        .limit(limit)
+    )
+
+    return list((await session.execute(stmt)).scalars())
+
+
+async def get_comments(session: AsyncSession, page: int, limit: int, owner_id: str) -> list[Comment]:
+    stmt: Select[list[Comment]] = (
+        select(Comment)
+        .filter_by(owner_id=owner_id)
+        .join(tasks_table, tasks_table.c.id == Comment.task_id)
+        .where(live_task)
+        .offset((page - 1) * limit)
+        .limit(limit)
+    )
+
+    return list((await session.execute(stmt)).scalars())
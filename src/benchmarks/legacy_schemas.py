@@ -0,0 +1,109 @@
+"""Two request schemas as they were before the declarative constraints."""
+import re
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, field_validator
+
+from tasks.models import Priority
+
+
+def rejected(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def validate_length(value: str, field_name: str, min_length: int, max_length: int) -> str:
+    if not (min_length <= len(value.strip()) <= max_length):
+        raise rejected(f'{field_name} length must be between {min_length} and {max_length} characters.')
+
+    return value
+
+
+class TaskCreate(BaseModel):
+    title: str | None = None
+    description: str | None = None
+
+    priority: 'Priority' = Priority.low
+    due_date: datetime | None = None
+
+    @field_validator('title', mode='before')
+    @classmethod
+    def validate_title(cls, value: str) -> str:
+        return value if value is None else validate_length(value, 'Title', 3, 30)
+
+    @field_validator('description', mode='before')
+    @classmethod
+    def validate_description(cls, value: str) -> str:
+        return value if value is None else validate_length(value, 'Description', 0, 200)
+
+    @field_validator('priority', mode='before')
+    @classmethod
+    def validate_priority(cls, value: str) -> str:
+        if value not in Priority.__members__.values():
+            raise rejected(f'Unknown value \'{value}\' for priority.')
+
+        return value
+
+    @field_validator('due_date', mode='before')
+    @classmethod
+    def validate_datetime(cls, value: datetime | None):
+        if value is None:
+            return value
+
+        try:
+            return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+        except Exception:
+            raise rejected('Mismatching datetime format. It should be YYYY-MM-DDTHH:MM:SS.')
+
+    @field_validator('due_date', mode='after')
+    @classmethod
+    def validate_due_date(cls, value: datetime | None) -> datetime | None:
+        if value is not None and value <= datetime.now():
+            raise rejected('Due date cannot be less than or equal to current date.')
+
+        return value
+
+
+class UserCreate(BaseModel):
+    fullname: str | None = None
+    username: str | None = None
+    email: str
+    hashed_password: str
+
+    @field_validator('fullname')
+    @classmethod
+    def validate_fullname(cls, value: str) -> str:
+        if value is None:
+            return value
+
+        if not re.match(r'^[A-Za-z]+(\.?)(( [A-Za-z]+(\.?)?)+)?$', value):
+            raise rejected('Fullname must contains only letters, spaces and optional periods.')
+
+        return validate_length(value, 'Fullname', 0, 64)
+
+    @field_validator('username')
+    @classmethod
+    def validate_username(cls, value: str) -> str:
+        if value is None:
+            raise rejected('Username is required.')
+
+        if not re.match(r'^(?!.*\.\.)([A-Za-z0-9_][A-Za-z0-9._]{1,28}[A-Za-z0-9_])$', value):
+            raise rejected('Username must contains at least one letter and one number.')
+
+        return validate_length(value, 'Username', 3, 30)
+
+    @field_validator('email')
+    @classmethod
+    def validate_email(cls, value: str) -> str:
+        if not re.match(r'^[\w\.\+\-]+\@[\w]+\.[a-z]{2,}(\.[a-z]{2,})?$', value):
+            raise rejected('Email is not valid.')
+
+        return validate_length(value, 'Email', 10, 128)
+
+    @field_validator('hashed_password')
+    @classmethod
+    def validate_password(cls, value: str) -> str:
+        if not re.match(r'^(?=.*[0-9])(?=.*[a-zA-Z])', value):
+            raise rejected('Password must contain at least one letter and one number.')
+
+        return validate_length(value, 'Password', 6, 32)
@@ -0,0 +1,284 @@
+"""Drive the API with concurrent clients and report throughput and latency percentiles.
+
+Run from ``src``::
+
+    python -m benchmarks.load --mode inprocess --concurrency 16 --requests 500
+    python -m benchmarks.load --mode uvicorn --save-baseline
+    python -m benchmarks.load --mode uvicorn --workers 4
+    python -m benchmarks.load --compare
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import benchmarks
+import httpx
+
+from database import async_engine
+from benchmarks.seed import PASSWORD, SeededUser, seed
+
+
+RESULTS_DIR: Path = Path(__file__).resolve().parent / 'results'
+BASELINE_PATH: Path = RESULTS_DIR / 'baseline.json'
+SRC_DIR: Path = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Session:
+    user: SeededUser
+    headers: dict[str, str]
+
+
+Request = Callable[[httpx.AsyncClient, Session, random.Random], Awaitable[httpx.Response]]
+
+
+def list_tasks(sort_by: str) -> Request:
+    def request(client: httpx.AsyncClient, session: Session, rng: random.Random) -> Awaitable[httpx.Response]:
+        return client.get('/tasks', params={'sort_by': sort_by, 'limit': 20}, headers=session.headers)
+
+    return request
+
+
+SCENARIOS: dict[str, tuple[Request, set[int]]] = {
+    'login': (
+        lambda client, session, rng: client.post(
+            '/auth/login', data={'username': session.user.username, 'password': PASSWORD},
+        ),
+        {200},
+    ),
+    'list_tasks_priority': (list_tasks('priority'), {200}),
+    'list_tasks_created_at': (list_tasks('created_at'), {200}),
+    'list_tasks_status': (list_tasks('status'), {200}),
+    'get_task': (
+        lambda client, session, rng: client.get(
+            f'/tasks/{rng.choice(session.user.task_ids)}', headers=session.headers,
+        ),
+        {200},
+    ),
+    'add_tag': (
+        lambda client, session, rng: client.post(
+            f'/tasks/{rng.choice(session.user.task_ids)}/tags',
+            params={'tag_id': rng.choice(session.user.tag_ids)},
+            headers=session.headers,
+        ),
+        {200, 409},
+    ),
+    'create_comment': (
+        lambda client, session, rng: client.post(
+            '/comments',
+            params={'task_id': rng.choice(session.user.task_ids)},
+            json={'comment': 'Benchmark comment.'},
+            headers=session.headers,
+        ),
+        {201},
+    ),
+}
+
+
+def percentile(cut_points: list[float], value: int) -> float:
+    return round(cut_points[value - 1] * 1000, 3)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    sessions: list[Session],
+    name: str,
+    requests: int,
+    concurrency: int,
+    random_seed: int,
+) -> dict:
+    request, expected = SCENARIOS[name]
+    latencies: list[float] = []
+    errors: int = 0
+    remaining: list[int] = [requests]
+
+    async def worker(worker_index: int) -> None:
+        nonlocal errors
+        rng: random.Random = random.Random(random_seed + worker_index)
+
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            session: Session = rng.choice(sessions)
+            started_at: float = time.perf_counter()
+            response: httpx.Response = await request(client, session, rng)
+            latencies.append(time.perf_counter() - started_at)
+
+            if response.status_code not in expected:
+                errors += 1
+
+    started_at: float = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    seconds: float = time.perf_counter() - started_at
+    cut_points: list[float] = statistics.quantiles(latencies, n=100, method='inclusive')
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 1),
+        'p50_ms': percentile(cut_points, 50),
+        'p95_ms': percentile(cut_points, 95),
+        'p99_ms': percentile(cut_points, 99),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def start_uvicorn(port: int, workers: int) -> subprocess.Popen:
+    process: subprocess.Popen = subprocess.Popen(
+        [
+            sys.executable, '-m', 'server', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning',
+        ],
+        cwd=SRC_DIR,
+        env=os.environ.copy(),
+    )
+
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f'http://127.0.0.1:{port}/openapi.json')
+                return process
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError('uvicorn did not start.')
+
+
+async def login(client: httpx.AsyncClient, user: SeededUser) -> Session:
+    response: httpx.Response = await client.post('/auth/login', data={'username': user.username, 'password': PASSWORD})
+    response.raise_for_status()
+
+    return Session(user=user, headers={'Authorization': f'Bearer {response.json()["access_token"]}'})
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions: list[str] = []
+
+    keys: tuple[str, ...] = ('mode', 'workers', 'concurrency')
+
+    if any(results['meta'].get(key) != baseline['meta'].get(key) for key in keys):
+        print(
+            f'warning: baseline was recorded with {baseline["meta"]["mode"]} mode, '
+            f'{baseline["meta"].get("workers", 1)} worker(s) at concurrency {baseline["meta"]["concurrency"]}'
+        )
+
+    for name, current in results['scenarios'].items():
+        previous: dict | None = baseline['scenarios'].get(name)
+
+        if previous is None:
+            continue
+
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p95 {previous["p95_ms"]} ms -> {current["p95_ms"]} ms')
+
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(f'{name}: throughput {previous["throughput_rps"]} -> {current["throughput_rps"]} req/s')
+
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('inprocess', 'uvicorn'), default='inprocess')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--workers', type=int, default=1, help='server processes in uvicorn mode')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--login-requests', type=int, default=50, help='requests for the bcrypt-bound login scenario')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--sessions', type=int, default=10, help='seeded users that get a token')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    users: list[SeededUser] = await seed(args.users, random_seed=args.seed)
+    await async_engine.dispose()
+
+    process: subprocess.Popen | None = None
+
+    if args.mode == 'uvicorn':
+        port: int = free_port()
+        process = await start_uvicorn(port, args.workers)
+        client: httpx.AsyncClient = httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=60)
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://benchmark', timeout=60)
+
+    results: dict = {
+        'meta': {
+            'mode': args.mode,
+            'workers': args.workers if args.mode == 'uvicorn' else 1,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'users': args.users,
+            'seed': args.seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': {},
+    }
+
+    try:
+        async with client:
+            sessions: list[Session] = [await login(client, user) for user in users[:args.sessions]]
+
+            print(f'{"scenario":<24} {"requests":>8} {"errors":>6} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+            for name in args.scenarios:
+                requests: int = args.login_requests if name == 'login' else args.requests
+                result: dict = await run_scenario(client, sessions, name, requests, args.concurrency, args.seed)
+                results['scenarios'][name] = result
+                print(
+                    f'{name:<24} {result["requests"]:>8} {result["errors"]:>6} {result["throughput_rps"]:>9} '
+                    f'{result["p50_ms"]:>9} {result["p95_ms"]:>9} {result["p99_ms"]:>9}'
+                )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output: Path = args.output or RESULTS_DIR / f'{time.strftime("%Y%m%dT%H%M%S")}-{args.mode}-{results["meta"]["workers"]}.json'
+    output.write_text(json.dumps(results, indent=2))
+    print(f'results saved to {output}')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f'baseline saved to {args.baseline}')
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f'no baseline at {args.baseline}')
+            return 1
+
+        regressions: list[str] = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
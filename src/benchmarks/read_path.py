@@ -0,0 +1,170 @@
+"""Compare the ORM and the ORM-free read paths of the list endpoints.
+
+Run from ``src``: ``python -m benchmarks.read_path --tasks 2000 --limit 100``.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from typing import Awaitable, Callable
+
+import benchmarks
+from benchmarks import legacy_queries
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert
+
+from database import Base, async_engine, async_session_maker
+from tasks.models import Task, Tag, TaskTag, Comment
+from tasks.records import comment_list_adapter, tag_list_adapter, task_list_adapter
+from tasks.repository import CommentRepository, TagRepository, TaskRepository
+from tasks.schemas import TaskQueryParams, TaskRead, TagQueryParams, TagRead, CommentRead
+from tasks.service import TaskService, TagService
+from users.models import User
+
+
+OWNER_ID: str = 'benchmark-owner'
+
+
+async def seed(tasks: int, tags: int, tags_per_task: int, comments_per_task: int) -> None:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+        for model in (Comment, TaskTag, Tag, Task, User):
+            await connection.execute(delete(model))
+
+        await connection.execute(insert(User), [{
+            'id': OWNER_ID,
+            'fullname': 'Benchmark User',
+            'username': 'benchmark',
+            'email': 'benchmark@example.com',
+            'hashed_password': '-',
+        }])
+        await connection.execute(insert(Tag), [
+            {'id': f'tag-{i}', 'title': f'tag {i}', 'owner_id': OWNER_ID}
+            for i in range(tags)
+        ])
+        await connection.execute(insert(Task), [
+            {'id': f'task-{i}', 'title': f'task {i}', 'description': 'benchmark task', 'owner_id': OWNER_ID}
+            for i in range(tasks)
+        ])
+        await connection.execute(insert(TaskTag), [
+            {'task_id': f'task-{i}', 'tag_id': f'tag-{(i + j) % tags}'}
+            for i in range(tasks) for j in range(tags_per_task)
+        ])
+        if comments_per_task:
+            await connection.execute(insert(Comment), [
+                {'id': f'comment-{i}-{j}', 'comment': 'benchmark comment', 'task_id': f'task-{i}', 'owner_id': OWNER_ID}
+                for i in range(tasks) for j in range(comments_per_task)
+            ])
+
+
+async def measure(name: str, rows: int, iterations: int, run: Callable[[], Awaitable[bytes]]) -> dict:
+    await run()
+
+    gc.collect()
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    for _ in range(iterations):
+        await run()
+    wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+    gc.collect()
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'path': name,
+        'rows': rows,
+        'wall_us_per_row': wall / iterations / rows * 1e6,
+        'cpu_us_per_row': cpu / iterations / rows * 1e6,
+        'peak_bytes_per_row': peak / rows,
+    }
+
+
+def orm_path(service_call: Callable, model: type) -> Callable[[], Awaitable[bytes]]:
+    adapter: TypeAdapter = TypeAdapter(list[model])
+
+    async def run() -> bytes:
+        async with async_session_maker() as session:
+            # Stands in for the route's ``current_user``.
+            current_user: User = await session.get(User, OWNER_ID)
+            items = await service_call(session)
+            validated = adapter.validate_python(items, from_attributes=True)
+
+            return json.dumps(adapter.dump_python(validated, mode='json')).encode()
+
+    return run
+
+
+def record_path(repository_call: Callable, adapter: TypeAdapter) -> Callable[[], Awaitable[bytes]]:
+    async def run() -> bytes:
+        async with async_session_maker() as session:
+            current_user: User = await session.get(User, OWNER_ID)
+
+            return adapter.dump_json(await repository_call(session))
+
+    return run
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--tags', type=int, default=200)
+    parser.add_argument('--tags-per-task', type=int, default=3)
+    parser.add_argument('--comments-per-task', type=int, default=2)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    await seed(args.tasks, args.tags, args.tags_per_task, args.comments_per_task)
+
+    params: TaskQueryParams = TaskQueryParams()
+    task_ordering: tuple = TaskService.get_ordering(params)
+    tag_ordering: tuple = TagService.get_ordering(TagQueryParams())
+    limit: int = args.limit
+    scenarios: list[tuple] = [
+        (
+            'tasks',
+            lambda session: legacy_queries.get_tasks(session, 1, limit, *task_ordering, OWNER_ID),
+            lambda session: TaskRepository(session).get_all_records(1, limit, *task_ordering, OWNER_ID),
+            task_list_adapter,
+            TaskRead,
+        ),
+        (
+            'tags',
+            lambda session: legacy_queries.get_tags(session, 1, limit, *tag_ordering, OWNER_ID),
+            lambda session: TagRepository(session).get_all_records(1, limit, *tag_ordering, OWNER_ID),
+            tag_list_adapter,
+            TagRead,
+        ),
+        (
+            'comments',
+            lambda session: legacy_queries.get_comments(session, 1, limit, OWNER_ID),
+            lambda session: CommentRepository(session).get_all_records(1, limit, OWNER_ID),
+            comment_list_adapter,
+            CommentRead,
+        ),
+    ]
+
+    print(f'{"endpoint":<10} {"path":<8} {"rows":>6} {"wall us/row":>12} {"cpu us/row":>11} {"peak B/row":>11}')
+    for endpoint, orm_call, record_call, adapter, model in scenarios:
+        async with async_session_maker() as session:
+            rows: int = len(await orm_call(session))
+
+        for result in (
+            await measure('orm', rows, args.iterations, orm_path(orm_call, model)),
+            await measure('core', rows, args.iterations, record_path(record_call, adapter)),
+        ):
+            print(
+                f'{endpoint:<10} {result["path"]:<8} {result["rows"]:>6} {result["wall_us_per_row"]:>12.1f} '
+                f'{result["cpu_us_per_row"]:>11.1f} {result["peak_bytes_per_row"]:>11.0f}'
+            )
+
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
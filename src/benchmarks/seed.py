@@ -0,0 +1,121 @@
+"""Seed the benchmark database with a synthetic, heavy-tailed data set.
+
+Run from ``src``: ``python -m benchmarks.seed --users 50``.
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass, field
+
+import benchmarks
+from sqlalchemy import delete, insert
+
+from database import Base, async_engine
+from tasks.models import Task, Tag, TaskTag, Comment, ImportCheckpoint, Priority, TaskStatus
+from users.models import User
+from users.utils import hash_password
+
+
+PASSWORD: str = 'benchmark1'
+CHUNK_SIZE: int = 5000
+
+
+@dataclass
+class SeededUser:
+    username: str
+    task_ids: list[str] = field(default_factory=list)
+    tag_ids: list[str] = field(default_factory=list)
+
+
+def heavy_tail(rng: random.Random, minimum: int, mean: float, maximum: int, alpha: float = 1.5) -> int:
+    scale: float = max(mean - minimum, 0) * (alpha - 1) / alpha
+    return min(maximum, minimum + int(scale * rng.paretovariate(alpha)))
+
+
+async def insert_chunked(connection, model: type, rows: list[dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await connection.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+async def seed(
+    users: int = 50,
+    mean_tasks: float = 200,
+    mean_tags: float = 15,
+    mean_comments: float = 2,
+    random_seed: int = 42,
+) -> list[SeededUser]:
+    rng: random.Random = random.Random(random_seed)
+    hashed_password: str = await hash_password(PASSWORD)
+    seeded: list[SeededUser] = []
+    rows: dict[type, list[dict]] = {User: [], Tag: [], Task: [], TaskTag: [], Comment: []}
+
+    for user_index in range(users):
+        user_id: str = f'user-{user_index}'
+        user: SeededUser = SeededUser(username=f'bench_user_{user_index}')
+        seeded.append(user)
+
+        rows[User].append({
+            'id': user_id,
+            'fullname': 'Bench User',
+            'username': user.username,
+            'email': f'bench{user_index}@example.com',
+            'hashed_password': hashed_password,
+        })
+
+        for tag_index in range(heavy_tail(rng, 1, mean_tags, 500)):
+            tag_id: str = f'{user_id}-tag-{tag_index}'
+            user.tag_ids.append(tag_id)
+            rows[Tag].append({'id': tag_id, 'title': f'tag{tag_index}', 'owner_id': user_id})
+
+        for task_index in range(heavy_tail(rng, 1, mean_tasks, 20_000)):
+            task_id: str = f'{user_id}-task-{task_index}'
+            user.task_ids.append(task_id)
+            rows[Task].append({
+                'id': task_id,
+                'title': f'Task {task_index}',
+                'description': 'Synthetic benchmark task.',
+                'status': rng.choices(list(TaskStatus), weights=(6, 3, 1))[0],
+                'priority': rng.choices(list(Priority), weights=(5, 3, 2))[0],
+                'owner_id': user_id,
+            })
+
+            for tag_id in rng.sample(user.tag_ids, min(len(user.tag_ids), rng.choices((0, 1, 2, 3, 4), weights=(3, 4, 2, 1, 1))[0])):
+                rows[TaskTag].append({'task_id': task_id, 'tag_id': tag_id})
+
+            for comment_index in range(heavy_tail(rng, 0, mean_comments, 1000, alpha=1.2)):
+                rows[Comment].append({
+                    'id': f'{task_id}-comment-{comment_index}',
+                    'comment': 'Synthetic benchmark comment.',
+                    'task_id': task_id,
+                    'owner_id': user_id,
+                })
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+        for model in (ImportCheckpoint, Comment, TaskTag, Tag, Task, User):
+            await connection.execute(delete(model))
+
+        for model in (User, Tag, Task, TaskTag, Comment):
+            await insert_chunked(connection, model, rows[model])
+
+    print(', '.join(f'{len(model_rows)} {model.__tablename__}' for model, model_rows in rows.items()))
+
+    return seeded
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--mean-tasks', type=float, default=200)
+    parser.add_argument('--mean-tags', type=float, default=15)
+    parser.add_argument('--mean-comments', type=float, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    await seed(args.users, args.mean_tasks, args.mean_tags, args.mean_comments, args.seed)
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""Measure worker cold start: ``import main`` time and time to first response.
+
+Run from ``src``::
+
+    python -m benchmarks.startup --runs 5 --save-baseline
+    python -m benchmarks.startup --compare --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import benchmarks
+import httpx
+
+from benchmarks.load import RESULTS_DIR, SRC_DIR, free_port
+
+
+BASELINE_PATH: Path = RESULTS_DIR / 'startup-baseline.json'
+IMPORT_SCRIPT: str = 'import time; started_at = time.perf_counter(); import main; print(time.perf_counter() - started_at)'
+
+
+def measure_import(env: dict[str, str]) -> float:
+    output: str = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT], cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+
+    return float(output.strip().splitlines()[-1]) * 1000
+
+
+def measure_first_response(env: dict[str, str]) -> float:
+    port: int = free_port()
+    started_at: float = time.perf_counter()
+    process: subprocess.Popen = subprocess.Popen(
+        [sys.executable, '-m', 'server', '--host', '127.0.0.1', '--port', str(port), '--workers', '1', '--log-level', 'warning'],
+        cwd=SRC_DIR,
+        env=env,
+    )
+
+    try:
+        with httpx.Client() as client:
+            while time.perf_counter() - started_at < 30:
+                try:
+                    if client.get(f'http://127.0.0.1:{port}/openapi.json').status_code == 200:
+                        return (time.perf_counter() - started_at) * 1000
+                except httpx.TransportError:
+                    time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+
+    raise RuntimeError('server did not answer within 30 seconds.')
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    return [
+        f'{name}: {baseline["metrics"][name]} ms -> {value} ms'
+        for name, value in results['metrics'].items()
+        if name in baseline['metrics'] and value > baseline['metrics'][name] * (1 + tolerance)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    env: dict[str, str] = {**os.environ, 'OPENAPI_SCHEMA_PATH': ''}
+
+    with tempfile.TemporaryDirectory() as directory:
+        schema_path: str = os.path.join(directory, 'openapi.json')
+        subprocess.run([sys.executable, '-m', 'openapi_schema', schema_path], cwd=SRC_DIR, env=env, check=True, capture_output=True)
+        prebuilt_env: dict[str, str] = {**env, 'OPENAPI_SCHEMA_PATH': schema_path}
+
+        samples: dict[str, list[float]] = {'import_ms': [], 'first_response_ms': [], 'first_response_prebuilt_ms': []}
+
+        for _ in range(args.runs):
+            samples['import_ms'].append(measure_import(env))
+            samples['first_response_ms'].append(measure_first_response(env))
+            samples['first_response_prebuilt_ms'].append(measure_first_response(prebuilt_env))
+
+    results: dict = {
+        'meta': {'runs': args.runs, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'metrics': {name: round(statistics.median(values), 1) for name, values in samples.items()},
+    }
+
+    for name, value in results['metrics'].items():
+        print(f'{name:<28} {value:>9} ms')
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output: Path = args.output or RESULTS_DIR / f'{time.strftime("%Y%m%dT%H%M%S")}-startup.json'
+    output.write_text(json.dumps(results, indent=2))
+    print(f'results saved to {output}')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f'baseline saved to {args.baseline}')
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f'no baseline at {args.baseline}')
+            return 1
+
+        regressions: list[str] = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Time tag intersection pages on a skewed tag distribution.
+
+Run from ``src``: ``python -m benchmarks.tagged --tasks 100000``.
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import benchmarks
+from sqlalchemy import delete, insert
+
+from database import Base, async_engine, async_session_maker
+from tasks.models import Task, Tag, TaskTag, Comment
+from tasks.repository import TaskRepository
+from tasks.service import TaskService
+from users.models import User
+
+
+OWNER_ID: str = 'benchmark-owner'
+
+TAGS: dict[str, Callable[[int], bool]] = {
+    'hot': lambda i: True,
+    'warm': lambda i: i % 10 == 0,
+    'rare': lambda i: i % 1000 == 1,
+}
+
+
+async def seed(tasks: int) -> None:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+        for model in (Comment, TaskTag, Tag, Task, User):
+            await connection.execute(delete(model))
+
+        await connection.execute(insert(User), [{
+            'id': OWNER_ID,
+            'fullname': 'Benchmark User',
+            'username': 'benchmark',
+            'email': 'benchmark@example.com',
+            'hashed_password': '-',
+        }])
+        await connection.execute(insert(Tag), [
+            {'id': title, 'title': title, 'owner_id': OWNER_ID, 'task_count': sum(map(has_tag, range(tasks)))}
+            for title, has_tag in TAGS.items()
+        ])
+        await connection.execute(insert(Task), [
+            {'id': f'task-{i:07d}', 'title': f'task {i}', 'description': 'benchmark task', 'owner_id': OWNER_ID}
+            for i in range(tasks)
+        ])
+        await connection.execute(insert(TaskTag), [
+            {'task_id': f'task-{i:07d}', 'tag_id': title}
+            for i in range(tasks) for title, has_tag in TAGS.items() if has_tag(i)
+        ])
+
+
+async def measure(iterations: int, run: Callable[[], Awaitable[int]]) -> tuple[int, float]:
+    rows: int = await run()
+
+    start: float = time.perf_counter()
+    for _ in range(iterations):
+        await run()
+
+    return rows, (time.perf_counter() - start) / iterations * 1e3
+
+
+def planned(tag_ids: list[str], limit: int) -> Callable[[], Awaitable[int]]:
+    async def run() -> int:
+        async with async_session_maker() as session:
+            return len((await TaskService(session).get_tagged(tag_ids, None, limit, OWNER_ID)).tasks)
+
+    return run
+
+
+def as_given(tag_ids: list[str], limit: int) -> Callable[[], Awaitable[int]]:
+    async def run() -> int:
+        async with async_session_maker() as session:
+            return len((await TaskRepository(session).get_tagged_records(tag_ids, None, limit, OWNER_ID))[0])
+
+    return run
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    await seed(args.tasks)
+
+    print(f'{"tags":<14} {"order":<9} {"rows":>5} {"ms/page":>9}')
+    for tag_ids in (['hot'], ['rare'], ['hot', 'rare'], ['hot', 'warm'], ['warm', 'rare'], ['hot', 'warm', 'rare']):
+        for order, page in (('planned', planned), ('as given', as_given)):
+            if order == 'as given' and len(tag_ids) == 1:
+                continue
+
+            rows, ms = await measure(args.iterations, page(tag_ids, args.limit))
+            print(f'{"+".join(tag_ids):<14} {order:<9} {rows:>5} {ms:>9.2f}')
+
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
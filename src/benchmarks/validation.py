@@ -0,0 +1,69 @@
+"""Measure request-schema validation cost per payload, against the schemas it replaced.
+
+Run from ``src``: ``python -m benchmarks.validation --iterations 20000``.
+"""
+import argparse
+import json
+import time
+from typing import Callable
+
+import benchmarks
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+
+from benchmarks import legacy_schemas
+from tasks.schemas import TaskCreate
+from users.schemas import UserCreate
+
+
+PAYLOADS: list[tuple[str, type[BaseModel], type[BaseModel], dict]] = [
+    ('TaskCreate', TaskCreate, legacy_schemas.TaskCreate, {
+        'title': '  Write the quarterly report  ',
+        'description': 'Collect numbers from every team and summarise them.',
+        'priority': 'high',
+        'due_date': '2099-01-31T17:30:00',
+    }),
+    ('UserCreate', UserCreate, legacy_schemas.UserCreate, {
+        'fullname': 'Jane A. Doe',
+        'username': 'jane.doe_42',
+        'email': 'jane.doe@example.com',
+        'hashed_password': 'correcthorse1',
+    }),
+    ('TaskCreate invalid', TaskCreate, legacy_schemas.TaskCreate, {'title': 'x', 'priority': 'urgent'}),
+]
+
+
+def measure(validate: Callable[[], object], iterations: int, errors: tuple[type[Exception], ...]) -> float:
+    started_at: float = time.perf_counter()
+
+    for _ in range(iterations):
+        try:
+            validate()
+        except errors:
+            pass
+
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    # The legacy validators raise HTTPException.
+    legacy_errors: tuple[type[Exception], ...] = (ValidationError, HTTPException)
+
+    print(f'{"schema":<20} {"before dict us":>14} {"dict us":>9} {"before json us":>14} {"json us":>9}')
+    for name, model, legacy_model, payload in PAYLOADS:
+        raw: str = json.dumps(payload)
+        timings: list[float] = [
+            measure(lambda: legacy_model.model_validate(payload), args.iterations, legacy_errors),
+            measure(lambda: model.model_validate(payload), args.iterations, (ValidationError,)),
+            measure(lambda: legacy_model.model_validate_json(raw), args.iterations, legacy_errors),
+            measure(lambda: model.model_validate_json(raw), args.iterations, (ValidationError,)),
+        ]
+        print(f'{name:<20} {timings[0]:>14.2f} {timings[1]:>9.2f} {timings[2]:>14.2f} {timings[3]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Awaitable, Callable
+
+import metrics
+from config import settings
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size: int = 0
+        self.entries: OrderedDict[str, tuple[str, bytes, float]] = OrderedDict()
+        self.owner_keys: dict[str, set[str]] = {}
+
+    def get(self, key: str) -> bytes | None:
+        entry: tuple[str, bytes, float] | None = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[2] <= time.monotonic():
+            self.remove(key)
+            return None
+
+        self.entries.move_to_end(key)
+
+        return entry[1]
+
+    def set(self, key: str, owner_id: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+
+        self.remove(key)
+        self.entries[key] = (owner_id, value, time.monotonic() + self.ttl_seconds)
+        self.owner_keys.setdefault(owner_id, set()).add(key)
+        self.size += len(value)
+
+        while self.size > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key: str) -> None:
+        entry: tuple[str, bytes, float] | None = self.entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        owner_id, value, _ = entry
+        self.size -= len(value)
+        keys: set[str] = self.owner_keys[owner_id]
+        keys.discard(key)
+
+        if not keys:
+            del self.owner_keys[owner_id]
+
+    def discard_owner(self, owner_id: str) -> None:
+        for key in list(self.owner_keys.get(owner_id, ())):
+            self.remove(key)
+
+
+class SharedCache:
+    TRIM_EVERY: int = 64
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.writes: int = 0
+        # Every call runs on this one thread, in the order submitted, so a lock wait never blocks the event loop.
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shared-cache')
+        self.connection: sqlite3.Connection = sqlite3.connect(path, timeout=0.1, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=OFF')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS versions (owner_id TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, owner_id TEXT NOT NULL, body BLOB NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS ix_entries_owner_id ON entries (owner_id)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at)')
+
+    def version(self, owner_id: str) -> int:
+        row: tuple | None = self.connection.execute('SELECT version FROM versions WHERE owner_id = ?', (owner_id,)).fetchone()
+
+        return row[0] if row is not None else 0
+
+    def bump(self, owner_id: str) -> None:
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.execute(
+                'INSERT INTO versions (owner_id, version) VALUES (?, 1) '
+                'ON CONFLICT (owner_id) DO UPDATE SET version = version + 1',
+                (owner_id,),
+            )
+            self.connection.execute('DELETE FROM entries WHERE owner_id = ?', (owner_id,))
+
+    def get(self, key: str) -> bytes | None:
+        row: tuple | None = self.connection.execute('SELECT body FROM entries WHERE key = ?', (key,)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def set(self, key: str, owner_id: str, value: bytes) -> None:
+        self.connection.execute(
+            'INSERT OR REPLACE INTO entries (key, owner_id, body, size, stored_at) VALUES (?, ?, ?, ?, ?)',
+            (key, owner_id, value, len(value), time.time()),
+        )
+        self.writes += 1
+
+        if self.writes % self.TRIM_EVERY == 0:
+            self.trim()
+
+    async def call(self, function: Callable, *args: str) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def submit(self, message: str, function: Callable, *args: str | bytes) -> None:
+        def report(future: Future) -> None:
+            if future.exception() is not None:
+                logger.warning(message, args[0], exc_info=future.exception())
+
+        self.executor.submit(function, *args).add_done_callback(report)
+
+    def trim(self) -> None:
+        size: int = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+        if size <= self.max_bytes:
+            return
+
+        excess: int = size - self.max_bytes * 3 // 4
+        stale: list[str] = []
+
+        for key, entry_size in self.connection.execute('SELECT key, size FROM entries ORDER BY stored_at'):
+            stale.append(key)
+            excess -= entry_size
+
+            if excess <= 0:
+                break
+
+        self.connection.executemany('DELETE FROM entries WHERE key = ?', ((key,) for key in stale))
+
+
+class ResponseCache:
+    def __init__(self, memory: MemoryCache, shared: SharedCache | None = None, max_versions: int = 100_000) -> None:
+        self.memory = memory
+        self.shared = shared
+        self.max_versions = max_versions
+        self.versions: OrderedDict[str, int] = OrderedDict()
+        self.last_version: int = 0
+        # Untracked owners read at the highest evicted version, past anything they were keyed on.
+        self.untracked_version: int = 0
+
+    async def version(self, owner_id: str) -> int | None:
+        if self.shared is None:
+            return self.versions.get(owner_id, self.untracked_version)
+
+        try:
+            return await self.shared.call(self.shared.version, owner_id)
+        except sqlite3.Error:
+            logger.warning('Shared cache is unavailable, bypassing it', exc_info=True)
+            return None
+
+    def invalidate(self, owner_id: str) -> None:
+        self.memory.discard_owner(owner_id)
+
+        if self.shared is None:
+            self.last_version += 1
+            self.versions[owner_id] = self.last_version
+            self.versions.move_to_end(owner_id)
+
+            while len(self.versions) > self.max_versions:
+                _, evicted = self.versions.popitem(last=False)
+                self.untracked_version = max(self.untracked_version, evicted)
+
+            return
+
+        self.shared.submit('Could not invalidate shared cache entries of owner %s', self.shared.bump, owner_id)
+
+    async def get_or_load(self, owner_id: str, route: str, params: dict, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        version: int | None = await self.version(owner_id)
+
+        if version is None:
+            return await load()
+
+        key: str = f'{owner_id}:{version}:{route}?{self.normalize(params)}'
+        content: bytes | None = self.memory.get(key)
+        metrics.cache_requests_total.inc(('response_memory', 'miss' if content is None else 'hit'))
+
+        if content is not None:
+            return content
+
+        if self.shared is not None:
+            content = await self.get_shared(key)
+
+            if content is not None:
+                self.memory.set(key, owner_id, content)
+                return content
+
+        content = await load()
+        self.memory.set(key, owner_id, content)
+
+        if self.shared is not None:
+            self.shared.submit('Could not store %s in the shared cache', self.shared.set, key, owner_id, content)
+
+        return content
+
+    async def get_shared(self, key: str) -> bytes | None:
+        try:
+            content: bytes | None = await self.shared.call(self.shared.get, key)
+        except sqlite3.Error:
+            logger.warning('Could not read %s from the shared cache', key, exc_info=True)
+            content = None
+
+        metrics.cache_requests_total.inc(('response_shared', 'miss' if content is None else 'hit'))
+
+        return content
+
+    @staticmethod
+    def normalize(params: dict) -> str:
+        return json.dumps(
+            {name: value.value if isinstance(value, Enum) else value for name, value in params.items()},
+            sort_keys=True,
+            separators=(',', ':'),
+        )
+
+
+class DisabledCache(ResponseCache):
+    # Versions are still tracked: single-flight reads key on them.
+    def __init__(self) -> None:
+        super().__init__(MemoryCache(0, 0), max_versions=settings.CACHE_MAX_VERSIONS)
+
+    async def get_or_load(self, owner_id: str, route: str, params: dict, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        return await load()
+
+
+def create_response_cache() -> ResponseCache:
+    if not settings.CACHE_ENABLED:
+        return DisabledCache()
+
+    shared: SharedCache | None = None
+
+    if settings.CACHE_SHARED_PATH:
+        shared = SharedCache(settings.CACHE_SHARED_PATH, settings.CACHE_SHARED_MAX_BYTES)
+
+    return ResponseCache(MemoryCache(settings.CACHE_MAX_BYTES, settings.CACHE_TTL_SECONDS), shared, settings.CACHE_MAX_VERSIONS)
+
+
+response_cache: ResponseCache = create_response_cache()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +9,15 @@ class Settings(BaseSettings):
     APP_HOST: str
     APP_PORT: int
 
+    SERVER_WORKERS: int = 1
+    SERVER_LOOP: Literal['auto', 'asyncio', 'uvloop'] = 'auto'
+    SERVER_HTTP: Literal['auto', 'h11', 'httptools'] = 'auto'
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+
+    OPENAPI_SCHEMA_PATH: str = ''
+
     AUTH_SECRET_KEY: str
     AUTH_ALGORITHM: str
     AUTH_ACCESS_TOKEN_EXPIRE_MINUTES: int
@@ -14,6 +25,71 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
     DATABASE_ECHO: bool
+    DATABASE_POOL_WARM_CONNECTIONS: int = 5
+    DATABASE_INSTRUMENT: bool = True
+    DATABASE_WARN_STATEMENTS: int = 25
+    DATABASE_WARN_DURATION_MS: float = 250.0
+    DATABASE_WARN_REPEATED_STATEMENTS: int = 5
+
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    SLOW_QUERY_WINDOW_SECONDS: int = 300
+    SLOW_QUERY_LOG_PATH: str = 'slow_queries.log'
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ''
+
+    PASSWORD_HASH_THREADS: int = 2
+
+    PROFILE_ENABLED: bool = False
+    PROFILE_DIR: str = 'profiles'
+    PROFILE_RING_SIZE: int = 50
+    PROFILE_AUTH_CACHE_SECONDS: float = 60.0
+
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_VERSIONS: int = 100_000
+    CACHE_SHARED_PATH: str = ''
+    CACHE_SHARED_MAX_BYTES: int = 256 * 1024 * 1024
+
+    SYNC_BATCH_SIZE: int = 500
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    COMPACTION_INTERVAL_SECONDS: int = 86400
+    SYNC_STREAM_MAX_QUEUED: int = 256
+    SYNC_STREAM_HEARTBEAT_SECONDS: int = 15
+    SYNC_STREAM_RETRY_MS: int = 3000
+
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_SECONDS: int = 10
+    IDEMPOTENCY_ABANDONED_SECONDS: int = 600
+
+    BATCH_MAX_OPERATIONS: int = 100
+
+    AGENDA_MAX_DAYS: int = 366
+    ANALYTICS_MAX_DAYS: int = 1096
+
+    TAG_SUGGEST_LIMIT: int = 10
+    TAGGED_TASKS_MAX_TAGS: int = 10
+
+    PURGE_INTERVAL_SECONDS: int = 60
+    PURGE_BATCH_SIZE: int = 500
+
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    TAG_COUNT_CHECK_INTERVAL_SECONDS: int = 86400
+    TAG_COUNT_CHECK_BATCH_SIZE: int = 500
+
+    ROLLUP_INTERVAL_SECONDS: int = 3600
+    ROLLUP_CATCH_UP_DAYS: int = 2
+    ROLLUP_BATCH_SIZE: int = 100
+
+    EXPORT_BATCH_SIZE: int = 1000
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
 
     model_config = SettingsConfigDict(
         env_file='.env',
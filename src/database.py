@@ -1,9 +1,14 @@
+import time
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
 from typing import AsyncGenerator
 
+from sqlalchemy import event, text
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
 from config import settings
+from slow_queries import SlowQueryLog
 
 
 async_engine: AsyncEngine = create_async_engine(
@@ -21,6 +26,86 @@ async_session_maker: AsyncSession = async_sessionmaker(
 class Base(DeclarativeBase): ...
 
 
+class QueryStats:
+    __slots__ = ('count', 'duration', 'statements', 'peaks', 'timeline')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.duration: float = 0.0
+        self.statements: dict[str, int] = {}
+        # Repeats within earlier pages of a paged response, which run each statement once per page.
+        self.peaks: dict[str, int] = {}
+        self.timeline: list[tuple[float, float, str]] | None = None
+
+    def record(self, statement: str, started_at: float, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+        if self.timeline is not None:
+            self.timeline.append((started_at, duration, statement))
+
+    def next_page(self) -> None:
+        for statement, count in self.statements.items():
+            self.peaks[statement] = max(self.peaks.get(statement, 0), count)
+
+        self.statements = {}
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        self.next_page()
+
+        return [(statement, count) for statement, count in self.peaks.items() if count >= threshold]
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
+
+def next_page() -> None:
+    stats: QueryStats | None = query_stats.get()
+
+    if stats is not None:
+        stats.next_page()
+
+
+slow_query_log: SlowQueryLog | None = SlowQueryLog(async_engine) if settings.SLOW_QUERY_THRESHOLD_MS > 0 else None
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_started_at = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at: float | None = getattr(context, '_query_started_at', None)
+
+    if started_at is None:
+        return
+
+    duration: float = time.perf_counter() - started_at
+    stats: QueryStats | None = query_stats.get()
+
+    if stats is not None:
+        stats.record(statement, started_at, duration)
+
+    if slow_query_log is not None:
+        slow_query_log.capture(statement, parameters, executemany, duration)
+
+
+if settings.DATABASE_INSTRUMENT:
+    event.listen(async_engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(async_engine.sync_engine, 'after_cursor_execute', after_cursor_execute)
+
+
+async def warm_pool(connections: int) -> None:
+    # Check out the connections together so the pool keeps that many open, capped at its size.
+    size = getattr(async_engine.pool, 'size', None)
+    connections = min(connections, size()) if size is not None else min(connections, 1)
+
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            connection: AsyncConnection = await stack.enter_async_context(async_engine.connect())
+            await connection.execute(text('SELECT 1'))
+
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         try:
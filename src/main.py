@@ -1,19 +1,91 @@
-import uvicorn
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 
 from config import settings
+from database import async_engine, warm_pool
+from metrics import router as metrics_router
+from middleware import MetricsMiddleware, ProfilingMiddleware, QueryStatsMiddleware
+from openapi_schema import use_prebuilt
+from validation import validation_exception_handler
 
+from tasks.archiver import run_periodically as run_archiver
+from tasks.compaction import run_periodically as run_compaction
+from tasks.purger import run_periodically as run_purger
+from tasks.rollups import run_periodically as run_rollups
 from tasks.routers import router as task_router
+from tasks.tag_counts import run_periodically as run_tag_count_check
 from users.routers import router as user_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await warm_pool(settings.DATABASE_POOL_WARM_CONNECTIONS)
+    jobs: list[asyncio.Task] = []
+
+    if settings.PURGE_INTERVAL_SECONDS:
+        jobs.append(asyncio.create_task(run_purger(settings.PURGE_INTERVAL_SECONDS, settings.PURGE_BATCH_SIZE)))
+
+    if settings.ARCHIVE_INTERVAL_SECONDS:
+        jobs.append(asyncio.create_task(run_archiver(
+            settings.ARCHIVE_INTERVAL_SECONDS, settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH_SIZE,
+        )))
+
+    if settings.COMPACTION_INTERVAL_SECONDS:
+        jobs.append(asyncio.create_task(run_compaction(
+            settings.COMPACTION_INTERVAL_SECONDS, settings.SYNC_TOMBSTONE_RETENTION_DAYS, settings.SYNC_BATCH_SIZE,
+        )))
+
+    if settings.TAG_COUNT_CHECK_INTERVAL_SECONDS:
+        jobs.append(asyncio.create_task(run_tag_count_check(
+            settings.TAG_COUNT_CHECK_INTERVAL_SECONDS, settings.TAG_COUNT_CHECK_BATCH_SIZE,
+        )))
+
+    if settings.ROLLUP_INTERVAL_SECONDS:
+        jobs.append(asyncio.create_task(run_rollups(settings.ROLLUP_INTERVAL_SECONDS, settings.ROLLUP_CATCH_UP_DAYS)))
+
+    yield
+
+    for job in jobs:
+        job.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await job
+
+    await async_engine.dispose()
+
+
 app: FastAPI = FastAPI(
     title=settings.APP_TITLE,
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    lifespan=lifespan,
 )
 
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
+
+if settings.PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.DATABASE_INSTRUMENT:
+    app.add_middleware(QueryStatsMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    # Without a token the endpoint stays off; the scraper sends it as a bearer token.
+    if settings.METRICS_TOKEN:
+        app.include_router(metrics_router)
+
 app.include_router(user_router)
 app.include_router(task_router)
 
+if settings.OPENAPI_SCHEMA_PATH:
+    use_prebuilt(app, settings.OPENAPI_SCHEMA_PATH)
+
 if __name__ == '__main__':
+    import uvicorn
+
     uvicorn.run('main:app', host=settings.APP_HOST, port=settings.APP_PORT, reload=True)
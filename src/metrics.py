@@ -0,0 +1,207 @@
+import bisect
+import secrets
+from typing import Callable, Iterable
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from config import settings
+from database import async_engine
+
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Labels, values: Labels, extra: str = '') -> str:
+    pairs: list[str] = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    kind: str = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+
+        for labels, value in self.collect():
+            yield f'{self.name}{format_labels(self.labelnames, labels)} {value}'
+
+    def collect(self) -> Iterable[tuple[Labels, float]]:
+        return ()
+
+
+class Counter(Metric):
+    kind: str = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def collect(self) -> Iterable[tuple[Labels, float]]:
+        return list(self.values.items())
+
+
+class Gauge(Counter):
+    kind: str = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        callback: Callable[[], Iterable[tuple[Labels, float]]] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self.values[labels] = value
+
+    def collect(self) -> Iterable[tuple[Labels, float]]:
+        if self.callback is not None:
+            return list(self.callback())
+
+        return super().collect()
+
+
+class HistogramValue:
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self, size: int) -> None:
+        self.counts: list[int] = [0] * size
+        self.sum: float = 0.0
+
+
+class Histogram(Metric):
+    kind: str = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.values: dict[Labels, HistogramValue] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        child: HistogramValue | None = self.values.get(labels)
+
+        if child is None:
+            child = self.values[labels] = HistogramValue(len(self.buckets) + 1)
+
+        child.counts[bisect.bisect_left(self.buckets, value)] += 1
+        child.sum += value
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+
+        for labels, child in list(self.values.items()):
+            total: int = 0
+
+            for bound, count in zip((*map(str, self.buckets), '+Inf'), child.counts):
+                total += count
+                bucket_labels: str = format_labels(self.labelnames, labels, 'le="' + bound + '"')
+                yield f'{self.name}_bucket{bucket_labels} {total}'
+
+            yield f'{self.name}_sum{format_labels(self.labelnames, labels)} {child.sum}'
+            yield f'{self.name}_count{format_labels(self.labelnames, labels)} {total}'
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+def collect_pool_stats() -> Iterable[tuple[Labels, float]]:
+    pool = async_engine.pool
+
+    # Only queue-based pools report state.
+    for state, method_name in (('checked_out', 'checkedout'), ('overflow', 'overflow'), ('size', 'size')):
+        method: Callable[[], int] | None = getattr(pool, method_name, None)
+
+        if method is not None:
+            yield (state,), float(method())
+
+
+registry: Registry = Registry()
+
+http_requests_in_flight: Gauge = registry.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being served.',
+))
+http_request_duration_seconds: Histogram = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template.', ('method', 'route'),
+))
+http_responses_total: Counter = registry.register(Counter(
+    'http_responses_total', 'HTTP responses by route template and status code.', ('method', 'route', 'status'),
+))
+db_pool_connections: Gauge = registry.register(Gauge(
+    'db_pool_connections', 'Database connection pool state of async_engine.', ('state',), callback=collect_pool_stats,
+))
+password_hash_operations: Gauge = registry.register(Gauge(
+    'password_hash_operations', 'bcrypt hash or verify calls waiting for or running on the hashing threads.', ('state',),
+))
+password_hash_duration_seconds: Histogram = registry.register(Histogram(
+    'password_hash_duration_seconds', 'bcrypt hash and verify latency.', ('operation',),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+))
+cache_requests_total: Counter = registry.register(Counter(
+    'cache_requests_total', 'Cache lookups by cache and result.', ('cache', 'result'),
+))
+pubsub_subscriptions: Gauge = registry.register(Gauge(
+    'pubsub_subscriptions', 'Open event stream subscriptions by hub.', ('hub',),
+))
+pubsub_dropped_total: Counter = registry.register(Counter(
+    'pubsub_dropped_total', 'Subscriptions dropped for falling behind, by hub.', ('hub',),
+))
+purged_rows_total: Counter = registry.register(Counter(
+    'purged_rows_total', 'Rows of deleted tasks and users removed by the purger, by table.', ('table',),
+))
+tag_count_repairs_total: Counter = registry.register(Counter(
+    'tag_count_repairs_total', 'Tags whose task_count drifted from their links and was recounted.',
+))
+
+
+def verify_token(authorization: str = Header('')) -> None:
+    scheme, _, token = authorization.partition(' ')
+
+    if scheme.lower() != 'bearer' or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Invalid metrics token.',
+            headers={'WWW-Authenticate': 'Bearer'},
+        )
+
+
+router: APIRouter = APIRouter(dependencies=[Depends(verify_token)])
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics() -> Response:
+    return Response(content=registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
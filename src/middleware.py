@@ -0,0 +1,261 @@
+import asyncio
+import io
+import json
+import logging
+import time
+import typing
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+from config import settings
+from database import QueryStats, async_session_maker, query_stats
+from users.utils import get_user_by_token
+
+if typing.TYPE_CHECKING:
+    import cProfile
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def route_path(scope: Scope) -> str:
+    route = scope.get('route')
+
+    return route.path if route is not None else scope['path']
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        stats: QueryStats = QueryStats()
+        token = query_stats.set(stats)
+        started_at: float = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append(
+                    'Server-Timing',
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"',
+                )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+            self.report(scope, stats, time.perf_counter() - started_at)
+
+    @staticmethod
+    def report(scope: Scope, stats: QueryStats, duration: float) -> None:
+        fields: dict = {
+            'method': scope['method'],
+            'route': route_path(scope),
+            'duration_ms': round(duration * 1000, 2),
+            'db_statements': stats.count,
+            'db_duration_ms': round(stats.duration * 1000, 2),
+        }
+        repeated: list[tuple[str, int]] = stats.repeated(settings.DATABASE_WARN_REPEATED_STATEMENTS)
+
+        if repeated:
+            logger.warning(
+                'Possible N+1 query pattern on %s %s: %s', fields['method'], fields['route'],
+                '; '.join(f'{count}x {statement[:120]!r}' for statement, count in repeated),
+                extra={**fields, 'db_repeated_statements': len(repeated)},
+            )
+        elif stats.count > settings.DATABASE_WARN_STATEMENTS or fields['db_duration_ms'] > settings.DATABASE_WARN_DURATION_MS:
+            logger.warning(
+                'Query budget exceeded on %s %s: %d statements in %.2f ms', fields['method'], fields['route'],
+                stats.count, fields['db_duration_ms'],
+                extra=fields,
+            )
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug('%s %s: %d statements in %.2f ms', fields['method'], fields['route'], stats.count, fields['db_duration_ms'], extra=fields)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status_code: list[int] = [500]
+
+        async def send_with_status(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                status_code[0] = message['status']
+
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        started_at: float = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            labels: tuple[str, str] = (scope['method'], route.path if route is not None else '<unmatched>')
+
+            metrics.http_requests_in_flight.dec()
+            metrics.http_request_duration_seconds.observe(time.perf_counter() - started_at, labels)
+            metrics.http_responses_total.inc((*labels, str(status_code[0])))
+
+
+class ProfilingMiddleware:
+    HEADER: bytes = b'x-profile'
+    QUERY_FLAG: str = 'profile'
+    MAX_CACHED_TOKENS: int = 256
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.directory: Path = Path(settings.PROFILE_DIR)
+        self.is_profiling: bool = False
+        self.in_flight: int = 0
+        self.overlapping: int = 0
+        # A revoked superuser keeps profiling until the entry expires.
+        self.superusers: OrderedDict[str, tuple[str | None, float]] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        self.in_flight += 1
+
+        if self.is_profiling:
+            self.overlapping += 1
+
+        try:
+            await self.dispatch(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def dispatch(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.is_requested(scope):
+            return await self.app(scope, receive, send)
+
+        username: str | None = await self.get_superuser(scope)
+
+        # cProfile hooks the whole thread, so only one request can be profiled at a time.
+        if username is None or self.is_profiling:
+            return await self.app(scope, receive, send)
+
+        stats: QueryStats | None = query_stats.get()
+        token = None
+
+        if stats is None:
+            stats = QueryStats()
+            token = query_stats.set(stats)
+
+        stats.timeline = []
+        counted_before: tuple[int, float] = (stats.count, stats.duration)
+        profile_id: str = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}'
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('X-Profile-Id', profile_id)
+
+            await send(message)
+
+        import cProfile
+
+        profiler: cProfile.Profile = cProfile.Profile()
+        self.is_profiling = True
+        self.overlapping = self.in_flight - 1
+        started_at: float = time.perf_counter()
+        profiler.enable()
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            duration: float = time.perf_counter() - started_at
+            self.is_profiling = False
+
+            if token is not None:
+                query_stats.reset(token)
+
+            metadata: dict = {
+                'id': profile_id,
+                'method': scope['method'],
+                'path': scope['path'],
+                'route': route_path(scope),
+                'username': username,
+                'duration_ms': round(duration * 1000, 3),
+                'db_statements': stats.count - counted_before[0],
+                'db_duration_ms': round((stats.duration - counted_before[1]) * 1000, 3),
+                'overlapping_requests': self.overlapping,
+                'sql_timeline': [
+                    {
+                        'offset_ms': round((query_started_at - started_at) * 1000, 3),
+                        'duration_ms': round(query_duration * 1000, 3),
+                        'statement': statement,
+                    }
+                    for query_started_at, query_duration, statement in stats.timeline
+                ],
+            }
+
+            try:
+                await asyncio.to_thread(self.store, profile_id, profiler, metadata)
+            except OSError:
+                logger.exception('Could not store profile %s', profile_id)
+
+    def is_requested(self, scope: Scope) -> bool:
+        if self.QUERY_FLAG in parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True):
+            return True
+
+        return any(name == self.HEADER for name, _ in scope['headers'])
+
+    async def get_superuser(self, scope: Scope) -> str | None:
+        authorization: bytes = next((value for name, value in scope['headers'] if name == b'authorization'), b'')
+        scheme, _, token = authorization.decode('latin-1').partition(' ')
+
+        if scheme.lower() != 'bearer' or not token:
+            return None
+
+        now: float = time.monotonic()
+        cached: tuple[str | None, float] | None = self.superusers.get(token)
+
+        if cached is not None and cached[1] > now:
+            self.superusers.move_to_end(token)
+            return cached[0]
+
+        async with async_session_maker() as session:
+            user = await get_user_by_token(session, token)
+
+        username: str | None = user.username if user is not None and user.is_superuser else None
+        self.superusers[token] = (username, now + settings.PROFILE_AUTH_CACHE_SECONDS)
+        self.superusers.move_to_end(token)
+
+        while len(self.superusers) > self.MAX_CACHED_TOKENS:
+            self.superusers.popitem(last=False)
+
+        return username
+
+    def store(self, profile_id: str, profiler: 'cProfile.Profile', metadata: dict) -> None:
+        import pstats
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        summary: io.StringIO = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(30)
+        metadata['summary'] = summary.getvalue()
+
+        profiler.dump_stats(self.directory / f'{profile_id}.pstats')
+        (self.directory / f'{profile_id}.json').write_text(json.dumps(metadata, indent=2))
+
+        for stale in sorted(self.directory.glob('*.json'))[:-settings.PROFILE_RING_SIZE]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix('.pstats').unlink(missing_ok=True)
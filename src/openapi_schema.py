@@ -0,0 +1,79 @@
+"""Pre-generate the OpenAPI document so workers don't build it on the first ``/docs`` hit.
+
+Run from ``src``: ``python -m openapi_schema openapi.json``, then point ``OPENAPI_SCHEMA_PATH`` at the file.
+"""
+import argparse
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Callable
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+SOURCE_ROOT: Path = Path(__file__).resolve().parent
+
+
+def fingerprint(app: FastAPI, root: Path = SOURCE_ROOT) -> str:
+    routes: list[tuple] = sorted(
+        (route.path, sorted(route.methods), route.name) for route in app.routes if isinstance(route, APIRoute)
+    )
+    digest = hashlib.sha1(json.dumps([app.version, routes]).encode())
+
+    # Models, fields and constraints only show in the source, so any change to it makes the file stale.
+    for path in sorted(root.rglob('*.py')):
+        digest.update(path.relative_to(root).as_posix().encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+def load(app: FastAPI, path: str) -> dict | None:
+    try:
+        document: dict = json.loads(Path(path).read_bytes())
+    except (OSError, ValueError):
+        logger.warning('Could not read the OpenAPI schema from %s, generating it instead', path)
+        return None
+
+    if document.get('fingerprint') != fingerprint(app):
+        logger.warning('The OpenAPI schema in %s is out of date, generating it instead', path)
+        return None
+
+    return document['schema']
+
+
+def use_prebuilt(app: FastAPI, path: str) -> None:
+    generate: Callable[[], dict] = app.openapi
+
+    def openapi() -> dict:
+        if app.openapi_schema is None:
+            app.openapi_schema = load(app, path) or generate()
+
+        return app.openapi_schema
+
+    app.openapi = openapi
+
+
+def write(app: FastAPI, path: str) -> None:
+    document: dict = {'fingerprint': fingerprint(app), 'schema': app.openapi()}
+    Path(path).write_text(json.dumps(document))
+
+
+def main() -> None:
+    from config import settings
+    from main import app
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', nargs='?', default=settings.OPENAPI_SCHEMA_PATH or 'openapi.json')
+    args = parser.parse_args()
+
+    write(app, args.output)
+    print(f'OpenAPI schema written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
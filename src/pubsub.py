@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+
+import metrics
+
+
+class Subscription:
+    __slots__ = ('owner_id', 'events', 'waiter', 'dropped')
+
+    def __init__(self, owner_id: str) -> None:
+        self.owner_id = owner_id
+        self.events: deque[tuple[int, bytes]] | None = None
+        self.waiter: asyncio.Future | None = None
+        self.dropped: bool = False
+
+    async def next(self, timeout: float) -> tuple[int, bytes] | None:
+        if not self.events and not self.dropped:
+            self.waiter = asyncio.get_running_loop().create_future()
+
+            try:
+                await asyncio.wait_for(self.waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self.waiter = None
+
+        if self.dropped:
+            return None
+
+        event: tuple[int, bytes] = self.events.popleft()
+
+        if not self.events:
+            self.events = None
+
+        return event
+
+    def wake(self) -> None:
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+
+class Hub:
+    def __init__(self, name: str, max_queued: int) -> None:
+        self.name = name
+        self.max_queued = max_queued
+        self.subscriptions: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, owner_id: str) -> Subscription:
+        subscription: Subscription = Subscription(owner_id)
+        self.subscriptions.setdefault(owner_id, set()).add(subscription)
+        metrics.pubsub_subscriptions.inc((self.name,))
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions: set[Subscription] | None = self.subscriptions.get(subscription.owner_id)
+
+        if subscriptions is None or subscription not in subscriptions:
+            return
+
+        subscriptions.discard(subscription)
+        metrics.pubsub_subscriptions.dec((self.name,))
+
+        if not subscriptions:
+            del self.subscriptions[subscription.owner_id]
+
+    def publish(self, owner_id: str, event_id: int, event: bytes) -> None:
+        slow: list[Subscription] = []
+
+        for subscription in self.subscriptions.get(owner_id, ()):
+            if subscription.events is None:
+                subscription.events = deque()
+
+            if len(subscription.events) >= self.max_queued:
+                subscription.dropped = True
+                subscription.events = None
+                slow.append(subscription)
+            else:
+                subscription.events.append((event_id, event))
+
+            subscription.wake()
+
+        for subscription in slow:
+            self.unsubscribe(subscription)
+            metrics.pubsub_dropped_total.inc((self.name,))
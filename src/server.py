@@ -0,0 +1,48 @@
+"""Serve the API for production.
+
+Run from ``src``: ``python -m server``.
+"""
+import argparse
+import importlib.util
+
+import uvicorn
+
+from config import settings
+
+
+def require(module: str, setting: str, value: str) -> None:
+    if value == module and importlib.util.find_spec(module) is None:
+        raise SystemExit(f'{setting}={value} requires the {module} package; install it or use "auto".')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=settings.APP_HOST)
+    parser.add_argument('--port', type=int, default=settings.APP_PORT)
+    parser.add_argument('--workers', type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    # Without the shared tier each worker keeps its own owner versions and never sees the others' writes.
+    if args.workers > 1 and settings.CACHE_ENABLED and not settings.CACHE_SHARED_PATH:
+        raise SystemExit('Several workers need CACHE_SHARED_PATH set, or the cache disabled with CACHE_ENABLED=false.')
+
+    require('uvloop', 'SERVER_LOOP', settings.SERVER_LOOP)
+    require('httptools', 'SERVER_HTTP', settings.SERVER_HTTP)
+
+    uvicorn.run(
+        'main:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE_SECONDS,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+import metrics
+
+
+T = TypeVar('T')
+
+
+class Flight(Generic[T]):
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: 'asyncio.Task[T]') -> None:
+        self.task = task
+        self.waiters: int = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str, cancel_abandoned: bool = True, leader_bound: bool = False) -> None:
+        self.name = name
+        self.cancel_abandoned = cancel_abandoned
+        # The call may use resources of the caller that started it, so it stops when that caller leaves.
+        self.leader_bound = leader_bound
+        self.flights: dict[Hashable, Flight] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            flight: Flight[T] | None = self.flights.get(key)
+            metrics.cache_requests_total.inc((self.name, 'miss' if flight is None else 'hit'))
+            leader: bool = flight is None
+
+            if flight is None:
+                flight = Flight(asyncio.ensure_future(call()))
+                self.flights[key] = flight
+                flight.task.add_done_callback(lambda _, flight=flight: self.forget(key, flight))
+
+            flight.waiters += 1
+
+            try:
+                return await asyncio.shield(flight.task)
+            except asyncio.CancelledError:
+                # Cancelled because its leader left rather than this caller: run the call again.
+                if flight.task.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+
+                raise
+            finally:
+                flight.waiters -= 1
+                abandoned: bool = self.leader_bound and leader or self.cancel_abandoned and flight.waiters == 0
+
+                if abandoned and not flight.task.done():
+                    self.forget(key, flight)
+                    flight.task.cancel()
+
+    def forget(self, key: Hashable, flight: Flight) -> None:
+        if self.flights.get(key) is flight:
+            del self.flights[key]
@@ -0,0 +1,125 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import re
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+
+
+EXPLAINABLE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+EXPLAIN = re.compile(r'^\s*EXPLAIN\b', re.IGNORECASE)
+MAX_TRACKED_SHAPES: int = 10_000
+
+logger: logging.Logger = logging.getLogger('slow_queries')
+
+
+def remember(entries: OrderedDict, key: str, value: Any) -> None:
+    entries[key] = value
+    entries.move_to_end(key)
+
+    if len(entries) > MAX_TRACKED_SHAPES:
+        entries.popitem(last=False)
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    if executemany:
+        return {'rows': len(parameters), 'row': parameter_shape(parameters[0], False) if parameters else None}
+
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.threshold: float = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.window: float = settings.SLOW_QUERY_WINDOW_SECONDS
+        self.last_logged_at: OrderedDict[str, float] = OrderedDict()
+        self.last_fingerprint: OrderedDict[str, str] = OrderedDict()
+        self.tasks: set[asyncio.Task] = set()
+
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                settings.SLOW_QUERY_LOG_PATH,
+                maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def capture(self, statement: str, parameters: Any, executemany: bool, duration: float) -> None:
+        if duration < self.threshold or EXPLAIN.match(statement):
+            return
+
+        shape: Any = parameter_shape(parameters, executemany)
+        key: str = statement + json.dumps(shape, sort_keys=True)
+        now: float = time.monotonic()
+
+        if now - self.last_logged_at.get(key, -self.window) < self.window:
+            return
+
+        remember(self.last_logged_at, key, now)
+        entry: dict = {
+            'logged_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'duration_ms': round(duration * 1000, 3),
+            'statement': statement,
+            'parameter_shape': shape,
+        }
+        explain_parameters = (parameters[0] if parameters else ()) if executemany else parameters
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.write(entry, None)
+
+        # A fresh context keeps the EXPLAIN out of the current request's query stats.
+        task: asyncio.Task = loop.create_task(
+            self.explain_and_write(entry, statement, explain_parameters),
+            context=contextvars.Context(),
+        )
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def explain_and_write(self, entry: dict, statement: str, parameters: Any) -> None:
+        plan: list[str] | None = None
+
+        if EXPLAINABLE.match(statement):
+            prefix: str = 'EXPLAIN QUERY PLAN ' if self.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+
+            try:
+                async with self.engine.connect() as connection:
+                    result = await connection.exec_driver_sql(prefix + statement, parameters or ())
+                    plan = [str(row[-1]) for row in result]
+            except Exception as e:
+                entry['explain_error'] = repr(e)
+
+        self.write(entry, plan)
+
+    def write(self, entry: dict, plan: list[str] | None) -> None:
+        if plan is not None:
+            fingerprint: str = hashlib.sha1('\n'.join(plan).encode()).hexdigest()[:12]
+            previous: str | None = self.last_fingerprint.get(entry['statement'])
+
+            entry['plan'] = plan
+            entry['plan_fingerprint'] = fingerprint
+            entry['full_scan'] = any(line.startswith('SCAN ') and 'USING' not in line for line in plan)
+            entry['plan_changed_from'] = previous if previous not in (None, fingerprint) else None
+            remember(self.last_fingerprint, entry['statement'], fingerprint)
+
+        logger.info(json.dumps(entry, default=str))
@@ -0,0 +1,92 @@
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+from sqlalchemy import Row
+
+from .models import Priority
+from .records import AnalyticsBucketRecord
+from .schemas import Granularity
+
+
+# Upper bounds in seconds: a minute, then steps of √2 up to about two years.
+COMPLETION_BINS: tuple[float, ...] = (*(60 * 2 ** (k / 2) for k in range(42)), float('inf'))
+
+HISTOGRAM_TYPECODE: str = 'I'
+
+
+def utc_now() -> datetime:
+    # Naive UTC, like the timestamps SQLite's CURRENT_TIMESTAMP stores.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def completion_bin(seconds: float) -> int:
+    return bisect_left(COMPLETION_BINS, seconds)
+
+
+def empty_histogram() -> array:
+    return array(HISTOGRAM_TYPECODE, bytes(array(HISTOGRAM_TYPECODE).itemsize * len(COMPLETION_BINS)))
+
+
+def unpack_histogram(data: bytes) -> array:
+    histogram: array = array(HISTOGRAM_TYPECODE)
+    histogram.frombytes(data)
+
+    return histogram
+
+
+def merge_histograms(data: bytes) -> array:
+    histograms: array = unpack_histogram(data)
+    bins: int = len(COMPLETION_BINS)
+
+    return array(HISTOGRAM_TYPECODE, [sum(histograms[i::bins]) for i in range(bins)])
+
+
+def percentile(histogram: array, fraction: float) -> float | None:
+    cumulative: list[int] = list(accumulate(histogram))
+
+    if not cumulative[-1]:
+        return None
+
+    index: int = bisect_left(cumulative, fraction * cumulative[-1])
+
+    return COMPLETION_BINS[min(index, len(COMPLETION_BINS) - 2)]
+
+
+def is_late(completed_at: datetime, due_date: datetime | None) -> bool:
+    # Both are naive UTC.
+    return due_date is not None and completed_at > due_date
+
+
+def bucket_start(day: date, granularity: Granularity) -> date:
+    if granularity == Granularity.week:
+        return day - timedelta(days=day.weekday())
+
+    if granularity == Granularity.month:
+        return day.replace(day=1)
+
+    return day
+
+
+def overdue_rate(late: int, with_due_date: int) -> float | None:
+    return late / with_due_date if with_due_date else None
+
+
+def summarize(start: date, row: Row | None) -> AnalyticsBucketRecord:
+    if row is None:
+        return AnalyticsBucketRecord(start, 0, 0, None, None, None, {priority: None for priority in Priority})
+
+    histogram: array = merge_histograms(bytes.fromhex(row.histograms))
+
+    return AnalyticsBucketRecord(
+        start=start,
+        created=row.created,
+        completed=row.completed,
+        average_completion_seconds=row.completion_seconds / row.completed if row.completed else None,
+        completion_seconds_p50=percentile(histogram, 0.5),
+        completion_seconds_p90=percentile(histogram, 0.9),
+        overdue_rate={
+            priority: overdue_rate(getattr(row, f'completed_late_{priority.value}'), getattr(row, f'completed_with_due_date_{priority.value}'))
+            for priority in Priority
+        },
+    )
@@ -0,0 +1,59 @@
+"""Move old completed tasks into the archive tables.
+
+Run from ``src``: ``python -m tasks.archiver``.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from config import settings
+from database import async_engine, async_session_maker
+from tasks import leases
+from tasks.analytics import utc_now
+from tasks.repository import ArchiveRepository
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def archive(after_days: int, batch_size: int) -> int:
+    completed_before: datetime = utc_now() - timedelta(days=after_days)
+    batches: int = 0
+
+    async with async_session_maker() as session:
+        repository: ArchiveRepository = ArchiveRepository(session)
+
+        while owner_ids := await repository.archive(completed_before, batch_size):
+            batches += 1
+            logger.info('archived batch %d for %d owners', batches, len(owner_ids))
+
+    return batches
+
+
+async def run_periodically(interval: int, after_days: int, batch_size: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            if await leases.acquire('archiver', interval):
+                await archive(after_days, batch_size)
+        except Exception:
+            logger.exception('archive failed')
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--after-days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    batches: int = await archive(args.after_days, args.batch_size)
+    await async_engine.dispose()
+
+    print(f'archived completed tasks older than {args.after_days} days in {batches} batches')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
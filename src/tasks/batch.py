@@ -0,0 +1,398 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import BaseRoute
+
+from cache import ResponseCache
+from config import settings
+from database import async_engine
+from service import BaseService
+from validation import validate
+
+from .records import TaggedTaskPageRecord
+from .repository import TaskRepository, TagRepository, CommentRepository, after_commit, joined_session
+from .schemas import (
+    BatchOperation, BatchOperationResult, BatchResult, TaskCreate, TaskRead, TaskUpdate, TaskQueryParams, TagCreate,
+    TagRead, TagUpdate, TagQueryParams, CommentCreate, CommentRead, CommentUpdate, Granularity,
+)
+from .service import TaskService, TagService, CommentService
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class Page(BaseModel):
+    page: int = 1
+    limit: int = 10
+
+
+class TaskPage(Page, TaskQueryParams): ...
+
+
+class TagPage(Page, TagQueryParams):
+    limit: int = 5
+
+
+class TagSuggestQuery(BaseModel):
+    prefix: str = Field(min_length=1, max_length=10)
+    limit: int = Field(settings.TAG_SUGGEST_LIMIT, ge=1, le=50)
+
+
+class CursorPage(BaseModel):
+    cursor: str | None = None
+    limit: int = Field(10, ge=1, le=100)
+
+
+class TaggedTasksQuery(CursorPage):
+    tag_id: list[str] = Field(min_length=1, max_length=settings.TAGGED_TASKS_MAX_TAGS)
+
+
+class AgendaQuery(BaseModel):
+    first: date = Field(alias='from')
+    last: date = Field(alias='to')
+    tz: str = 'UTC'
+    counts: bool = False
+
+
+class AnalyticsQuery(BaseModel):
+    first: date = Field(alias='from')
+    last: date = Field(alias='to')
+    granularity: Granularity = Granularity.day
+
+
+@dataclass(slots=True)
+class Call:
+    session: AsyncSession
+    owner_id: str
+    params: dict[str, str]
+    query: dict[str, Any]
+    body: dict[str, Any] | None
+    status_code: int | None = None
+
+
+Handler = Callable[[Call], Awaitable[Any]]
+
+
+@dataclass(slots=True)
+class Operation:
+    methods: set[str]
+    pattern: re.Pattern
+    handler: Handler | None
+    status_code: int
+
+
+handlers: dict[str, Handler] = {}
+operations: list[Operation] = []
+
+
+def operation(handler: Handler) -> Handler:
+    handlers[handler.__name__] = handler
+
+    return handler
+
+
+def mount(routes: list[BaseRoute]) -> None:
+    # Handlers are named after their route, which supplies the path, methods and status code.
+    api_routes: list[APIRoute] = [route for route in routes if isinstance(route, APIRoute)]
+    unknown: set[str] = set(handlers) - {route.name for route in api_routes}
+
+    if unknown:
+        raise RuntimeError(f'Batch handlers without a route: {", ".join(sorted(unknown))}')
+
+    operations[:] = [
+        Operation(route.methods, route.path_regex, handlers.get(route.name), route.status_code or 200)
+        for route in api_routes
+    ]
+
+
+def read(model: type[BaseModel], value: Any) -> BaseModel:
+    return model.model_validate(value, from_attributes=True)
+
+
+@operation
+async def create_task(call: Call) -> BaseModel:
+    return read(TaskRead, await TaskService(call.session).create(validate(TaskCreate, call.body), call.owner_id))
+
+
+@operation
+async def get_agenda(call: Call) -> list:
+    query: AgendaQuery = validate(AgendaQuery, call.query)
+
+    return await TaskService(call.session).get_agenda(call.owner_id, query.first, query.last, query.tz, query.counts)
+
+
+@operation
+async def get_analytics(call: Call) -> list:
+    query: AnalyticsQuery = validate(AnalyticsQuery, call.query)
+
+    return await TaskService(call.session).get_analytics(call.owner_id, query.first, query.last, query.granularity)
+
+
+@operation
+async def get_tagged_tasks(call: Call) -> TaggedTaskPageRecord:
+    query: TaggedTasksQuery = validate(TaggedTasksQuery, call.query)
+
+    return await TaskService(call.session).get_tagged(query.tag_id, query.cursor, query.limit, call.owner_id)
+
+
+@operation
+async def get_task_by_id(call: Call) -> BaseModel:
+    return read(TaskRead, await TaskService(call.session).get_by_id(call.params['task_id'], call.owner_id))
+
+
+@operation
+async def get_tasks(call: Call) -> list:
+    page: TaskPage = validate(TaskPage, call.query)
+    sort_by, order = TaskService.get_ordering(page)
+
+    return await TaskRepository(call.session).get_all_records(
+        page.page, page.limit, sort_by, order, call.owner_id, page.include_archived,
+    )
+
+
+@operation
+async def update_task(call: Call) -> BaseModel:
+    task_data: TaskUpdate = validate(TaskUpdate, call.body)
+
+    return read(TaskRead, await TaskService(call.session).update(call.params['task_id'], task_data, call.owner_id))
+
+
+@operation
+async def delete_task(call: Call) -> dict:
+    return await TaskService(call.session).delete(call.params['task_id'], call.owner_id)
+
+
+@operation
+async def restore_task(call: Call) -> BaseModel:
+    return read(TaskRead, await TaskService(call.session).restore(call.params['task_id'], call.owner_id))
+
+
+@operation
+async def add_tag(call: Call) -> dict:
+    tag_id, title = call.query.get('tag_id'), call.query.get('title')
+
+    return await TaskService(call.session).add_tag(
+        call.params['task_id'], None if tag_id is None else str(tag_id), call.owner_id, None if title is None else str(title),
+    )
+
+
+@operation
+async def remove_tag(call: Call) -> dict:
+    return await TaskService(call.session).remove_tag(call.params['task_id'], str(call.query.get('tag_id', '')), call.owner_id)
+
+
+@operation
+async def create_tag(call: Call) -> BaseModel:
+    tag, created = await TagService(call.session).create(validate(TagCreate, call.body), call.owner_id)
+
+    if not created:
+        call.status_code = status.HTTP_200_OK
+
+    return read(TagRead, tag)
+
+
+@operation
+async def suggest_tags(call: Call) -> list:
+    query: TagSuggestQuery = validate(TagSuggestQuery, call.query)
+
+    return await TagRepository(call.session).suggest(query.prefix, query.limit, call.owner_id)
+
+
+@operation
+async def get_tag_by_id(call: Call) -> BaseModel:
+    return read(TagRead, await TagService(call.session).get_by_id(call.params['tag_id'], call.owner_id))
+
+
+@operation
+async def get_tag_tasks(call: Call) -> TaggedTaskPageRecord:
+    page: CursorPage = validate(CursorPage, call.query)
+
+    return await TaskService(call.session).get_tagged([call.params['tag_id']], page.cursor, page.limit, call.owner_id)
+
+
+@operation
+async def get_tags(call: Call) -> list:
+    page: TagPage = validate(TagPage, call.query)
+    sort_by, order = TagService.get_ordering(page)
+
+    return await TagRepository(call.session).get_all_records(page.page, page.limit, sort_by, order, call.owner_id)
+
+
+@operation
+async def update_tag(call: Call) -> BaseModel:
+    tag_data: TagUpdate = validate(TagUpdate, call.body)
+
+    return read(TagRead, await TagService(call.session).update(call.params['tag_id'], tag_data, call.owner_id))
+
+
+@operation
+async def delete_tag(call: Call) -> dict:
+    return await TagService(call.session).delete(call.params['tag_id'], call.owner_id)
+
+
+@operation
+async def create_comment(call: Call) -> BaseModel:
+    comment_data: CommentCreate = validate(CommentCreate, call.body)
+    comment = await CommentService(call.session).create(str(call.query.get('task_id', '')), comment_data, call.owner_id)
+    await call.session.refresh(comment, ['owner'])
+
+    return read(CommentRead, comment)
+
+
+@operation
+async def get_comment_by_id(call: Call) -> BaseModel:
+    comment = await CommentService(call.session).get_by_id(call.params['comment_id'], call.owner_id)
+    await call.session.refresh(comment, ['owner'])
+
+    return read(CommentRead, comment)
+
+
+@operation
+async def get_comments(call: Call) -> list:
+    page: Page = validate(Page, call.query)
+
+    return await CommentRepository(call.session).get_all_records(page.page, page.limit, call.owner_id)
+
+
+@operation
+async def update_comment(call: Call) -> BaseModel:
+    comment_data: CommentUpdate = validate(CommentUpdate, call.body)
+    comment = await CommentService(call.session).update(call.params['comment_id'], comment_data, call.owner_id)
+    await call.session.refresh(comment, ['owner'])
+
+    return read(CommentRead, comment)
+
+
+@operation
+async def delete_comment(call: Call) -> dict:
+    return await CommentService(call.session).delete(call.params['comment_id'], call.owner_id)
+
+
+@dataclass(slots=True)
+class Batch:
+    results: list[BatchOperationResult] = field(default_factory=list)
+    reads: dict[str, BatchOperationResult] = field(default_factory=dict)
+
+
+class BatchService(BaseService):
+    async def run(self, batch_operations: list[BatchOperation], owner_id: str, atomic: bool) -> BatchResult:
+        if not atomic:
+            batch: Batch = Batch()
+
+            for batch_operation in batch_operations:
+                await self.execute(self.session, batch, batch_operation, owner_id)
+
+            return BatchResult(results=batch.results, committed=True)
+
+        async with async_engine.connect() as connection:
+            await connection.begin()
+            session: AsyncSession = joined_session(connection)
+            batch = Batch()
+
+            try:
+                for batch_operation in batch_operations:
+                    result: BatchOperationResult = await self.execute(session, batch, batch_operation, owner_id)
+
+                    if result.status >= 400:
+                        break
+            finally:
+                pending: list = session.info.pop('pending_commits')
+                await session.close()
+
+            if len(batch.results) < len(batch_operations) or batch.results[-1].status >= 400:
+                await connection.rollback()
+                failed_dependency: BatchOperationResult = BatchOperationResult(
+                    status=status.HTTP_424_FAILED_DEPENDENCY, body={'detail': 'An earlier operation of the atomic batch failed.'},
+                )
+                batch.results += [failed_dependency] * (len(batch_operations) - len(batch.results))
+
+                return BatchResult(results=batch.results, committed=False)
+
+            await connection.commit()
+
+        for pending_owner_id, changes in pending:
+            after_commit(self.session, pending_owner_id, *changes)
+
+        return BatchResult(results=batch.results, committed=True)
+
+    async def execute(self, session: AsyncSession, batch: Batch, batch_operation: BatchOperation, owner_id: str) -> BatchOperationResult:
+        is_read: bool = batch_operation.method == 'GET'
+        key: str = f'{batch_operation.method} {batch_operation.path}?{ResponseCache.normalize(batch_operation.query)}'
+
+        if not is_read:
+            batch.reads.clear()
+        elif key in batch.reads:
+            batch.results.append(batch.reads[key])
+            return batch.reads[key]
+
+        result: BatchOperationResult = await self.dispatch(session, batch_operation, owner_id)
+        batch.results.append(result)
+
+        if is_read and result.status < 400:
+            batch.reads[key] = result
+
+        return result
+
+    @staticmethod
+    async def dispatch(session: AsyncSession, batch_operation: BatchOperation, owner_id: str) -> BatchOperationResult:
+        path_matched: bool = False
+
+        for candidate in operations:
+            match: re.Match | None = candidate.pattern.match(batch_operation.path)
+
+            if match is None:
+                continue
+
+            path_matched = True
+
+            if batch_operation.method not in candidate.methods:
+                continue
+
+            if candidate.handler is None:
+                return BatchOperationResult(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    body={'detail': f'{batch_operation.method} {batch_operation.path} is not supported in a batch.'},
+                )
+
+            call: Call = Call(session, owner_id, match.groupdict(), batch_operation.query, batch_operation.body)
+
+            try:
+                body: Any = await candidate.handler(call)
+            except HTTPException as e:
+                await session.rollback()
+                return BatchOperationResult(status=e.status_code, body={'detail': e.detail})
+            except ValueError as e:
+                await session.rollback()
+
+                if not isinstance(e, ValidationError):
+                    return BatchOperationResult(status=status.HTTP_400_BAD_REQUEST, body={'detail': str(e)})
+
+                return BatchOperationResult(
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    body={'detail': jsonable_encoder(e.errors(include_url=False, include_context=False))},
+                )
+            except IntegrityError:
+                await session.rollback()
+                return BatchOperationResult(
+                    status=status.HTTP_409_CONFLICT, body={'detail': 'The operation conflicts with a concurrent change.'},
+                )
+            except SQLAlchemyError:
+                logger.exception('batch operation %s %s failed', batch_operation.method, batch_operation.path)
+                await session.rollback()
+                return BatchOperationResult(status=status.HTTP_500_INTERNAL_SERVER_ERROR, body={'detail': 'Internal Server Error'})
+
+            return BatchOperationResult(status=call.status_code or candidate.status_code, body=body)
+
+        if path_matched:
+            return BatchOperationResult(status=status.HTTP_405_METHOD_NOT_ALLOWED, body={'detail': 'Method Not Allowed'})
+
+        return BatchOperationResult(status=status.HTTP_404_NOT_FOUND, body={'detail': 'Not Found'})
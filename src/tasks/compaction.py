@@ -0,0 +1,61 @@
+"""Compact the sync change log.
+
+Run from ``src``: ``python -m tasks.compaction``.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from config import settings
+from database import async_engine, async_session_maker
+from tasks import leases
+from tasks.analytics import utc_now
+from tasks.repository import ChangeRepository
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def compact(retention_days: int, batch_size: int) -> tuple[int, int]:
+    cutoff: datetime = utc_now() - timedelta(days=retention_days)
+    superseded: int = 0
+    expired: int = 0
+
+    async with async_session_maker() as session:
+        repository: ChangeRepository = ChangeRepository(session)
+
+        while deleted := await repository.delete_superseded(batch_size):
+            superseded += deleted
+
+        while deleted := await repository.delete_expired_tombstones(cutoff, batch_size):
+            expired += deleted
+
+    return superseded, expired
+
+
+async def run_periodically(interval: int, retention_days: int, batch_size: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            if await leases.acquire('compaction', interval):
+                await compact(retention_days, batch_size)
+        except Exception:
+            logger.exception('change log compaction failed')
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--retention-days', type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    parser.add_argument('--batch-size', type=int, default=settings.SYNC_BATCH_SIZE)
+    args = parser.parse_args()
+
+    superseded, expired = await compact(args.retention_days, args.batch_size)
+    await async_engine.dispose()
+
+    print(f'compacted change log: {superseded} superseded entries and {expired} expired tombstones removed')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
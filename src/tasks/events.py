@@ -0,0 +1,26 @@
+import json
+from typing import Iterable
+
+from config import settings
+from pubsub import Hub
+
+from .models import Change, ChangeEntity, ChangeOperation
+
+
+change_hub: Hub = Hub('changes', settings.SYNC_STREAM_MAX_QUEUED)
+
+
+def change_event(seq: int, entity: ChangeEntity, entity_id: str, operation: ChangeOperation) -> bytes:
+    data: str = json.dumps({'seq': seq, 'entity': entity.value, 'id': entity_id, 'operation': operation.value})
+
+    return f'id: {seq}\nevent: change\ndata: {data}\n\n'.encode()
+
+
+def publish(owner_id: str, changes: Iterable[tuple[int, ChangeEntity, str, ChangeOperation]]) -> None:
+    # Called after commit: an event must never announce a change that was rolled back.
+    for seq, entity, entity_id, operation in changes:
+        change_hub.publish(owner_id, seq, change_event(seq, entity, entity_id, operation))
+
+
+def publish_change(change: Change) -> None:
+    publish(change.owner_id, [(change.seq, change.entity, change.entity_id, change.operation)])
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator
+
+from sqlalchemy import Row
+
+from .records import TaskExportRecord, task_export_adapter
+
+
+CSV_HEADER: tuple[str, ...] = (
+    'id', 'title', 'description', 'status', 'priority',
+    'created_at', 'updated_at', 'due_date', 'tags', 'comment_count',
+)
+
+
+def export_record(row: Row) -> TaskExportRecord:
+    *task, tag_titles, comment_count = row
+
+    # json_group_array gives '[]' for a task without tags.
+    return TaskExportRecord(*task, json.loads(tag_titles), comment_count)
+
+
+async def encode_ndjson(rows: AsyncIterator[Row], batch_size: int) -> AsyncIterator[bytes]:
+    lines: list[bytes] = []
+
+    async for row in rows:
+        lines.append(task_export_adapter.dump_json(export_record(row)))
+
+        if len(lines) >= batch_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines.clear()
+
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+async def encode_csv(rows: AsyncIterator[Row], batch_size: int) -> AsyncIterator[bytes]:
+    buffer: io.StringIO = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    pending: int = 0
+
+    async for row in rows:
+        record: TaskExportRecord = export_record(row)
+        writer.writerow((
+            record.id,
+            record.title,
+            record.description,
+            record.status.value,
+            record.priority.value,
+            record.created_at.isoformat(),
+            record.updated_at.isoformat(),
+            record.due_date.isoformat() if record.due_date else '',
+            json.dumps(record.tags, ensure_ascii=False),
+            record.comment_count,
+        ))
+        pending += 1
+
+        if pending >= batch_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    async for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+
+    yield compressor.flush()
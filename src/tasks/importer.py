@@ -0,0 +1,51 @@
+"""Import tasks from an NDJSON file straight into the database.
+
+Run from ``src``: ``python -m tasks.importer tasks.ndjson --username alice``.
+"""
+import argparse
+import asyncio
+from typing import AsyncIterator
+
+from config import settings
+from database import async_engine, async_session_maker
+from users.models import User
+from users.service import UserService
+from tasks.schemas import ImportResult
+from tasks.service import TaskImportService
+
+
+CHUNK_SIZE: int = 64 * 1024
+
+
+async def read_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, 'rb') as file:
+        while chunk := await asyncio.to_thread(file.read, CHUNK_SIZE):
+            yield chunk
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--import-id', default=None)
+    parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    async with async_session_maker() as session:
+        user: User = await UserService(session).get_by_username(args.username)
+        result: ImportResult = await TaskImportService(session).run(
+            read_chunks(args.path), user.id, args.import_id, args.batch_size,
+        )
+
+    await async_engine.dispose()
+
+    print(
+        f'import {result.import_id}: {result.rows_imported} rows imported, {result.rows_failed} failed '
+        f'in {result.seconds}s ({result.rows_per_second} rows/s), resumed from line {result.resumed_from_line}'
+    )
+    for error in result.errors:
+        print(f'  line {error.line}: {error.detail}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
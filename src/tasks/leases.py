@@ -0,0 +1,16 @@
+import uuid
+from datetime import datetime, timedelta
+
+from database import async_session_maker
+from tasks.analytics import utc_now
+from tasks.repository import JobLeaseRepository
+
+
+WORKER_ID: str = uuid.uuid4().hex
+
+
+async def acquire(name: str, interval: int) -> bool:
+    now: datetime = utc_now()
+
+    async with async_session_maker() as session:
+        return await JobLeaseRepository(session).acquire(name, WORKER_ID, now, now + timedelta(seconds=interval))
@@ -1,9 +1,9 @@
 import typing
 import uuid
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import ForeignKey, func, Enum as SQLAlchemyEnum
+from sqlalchemy import ForeignKey, Index, LargeBinary, String, func, text, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -24,8 +24,31 @@ class TaskStatus(str, Enum):
     overdue = 'overdue'
 
 
+class ChangeEntity(str, Enum):
+    task = 'task'
+    tag = 'tag'
+    comment = 'comment'
+
+
+class ChangeOperation(str, Enum):
+    upsert = 'upsert'
+    delete = 'delete'
+
+
+def normalize_tag_title(title: str) -> str:
+    return title.strip().casefold()
+
+
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_deleted_at', 'deleted_at', sqlite_where=text('deleted_at IS NOT NULL')),
+        # deleted_at is included so the partial index covers its own condition.
+        Index('ix_tasks_owner_id_due_date', 'owner_id', 'due_date', 'deleted_at', sqlite_where=text('deleted_at IS NULL')),
+        Index('ix_tasks_created_at', 'created_at'),
+        Index('ix_tasks_completed_at', 'completed_at', sqlite_where=text('completed_at IS NOT NULL')),
+        Index('ix_tasks_completed_completed_at', 'completed_at', sqlite_where=text("status = 'completed'")),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     title: Mapped[str] = mapped_column(nullable=False)
@@ -37,6 +60,8 @@ class Task(Base):
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
     due_date: Mapped[datetime] = mapped_column(nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    deleted_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
     owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
     owner: Mapped['User'] = relationship(back_populates='tasks')
@@ -57,10 +82,20 @@ class Task(Base):
 
 class Tag(Base):
     __tablename__ = 'tags'
+    __table_args__ = (
+        Index('ix_tags_owner_id_normalized_title', 'owner_id', 'normalized_title', unique=True),
+        Index('ix_tags_owner_id_task_count', 'owner_id', 'task_count'),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     title: Mapped[str] = mapped_column(nullable=False)
-    
+    normalized_title: Mapped[str] = mapped_column(
+        nullable=False,
+        default=lambda context: normalize_tag_title(context.get_current_parameters()['title']),
+    )
+    # Every write to task_tags must go through tasks.repository.task_count_change.
+    task_count: Mapped[int] = mapped_column(default=0, server_default='0', nullable=False)
+
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
 
@@ -81,6 +116,9 @@ class Tag(Base):
 
 class TaskTag(Base):
     __tablename__ = 'task_tags'
+    __table_args__ = (
+        Index('ix_task_tags_tag_id_task_id', 'tag_id', 'task_id'),
+    )
 
     task_id: Mapped[str] = mapped_column(
         ForeignKey('tasks.id', ondelete='CASCADE'),
@@ -118,3 +156,184 @@ class Comment(Base):
     
     def __repr__(self) -> str:
         return self.__str__()
+
+
+class ArchivedTask(Base):
+    __tablename__ = 'archived_tasks'
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    title: Mapped[str] = mapped_column(nullable=False)
+    description: Mapped[str] = mapped_column(nullable=True)
+
+    status: Mapped[str] = mapped_column(SQLAlchemyEnum(TaskStatus), nullable=False)
+    priority: Mapped[str] = mapped_column(SQLAlchemyEnum(Priority), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(nullable=False)
+    due_date: Mapped[datetime] = mapped_column(nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True, nullable=False)
+
+    def __str__(self) -> str:
+        return f'ArchivedTask(id="{self.id}", title="{self.title}", archived_at="{self.archived_at}")'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class ArchivedTaskTag(Base):
+    __tablename__ = 'archived_task_tags'
+
+    task_id: Mapped[str] = mapped_column(
+        ForeignKey('archived_tasks.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    tag_id: Mapped[str] = mapped_column(
+        ForeignKey('tags.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+
+    def __str__(self) -> str:
+        return f'ArchivedTaskTag(task_id="{self.task_id}", tag_id="{self.tag_id}")'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class ArchivedComment(Base):
+    __tablename__ = 'archived_comments'
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    comment: Mapped[str] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(nullable=True)
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    task_id: Mapped[str] = mapped_column(ForeignKey('archived_tasks.id', ondelete='CASCADE'), index=True, nullable=False)
+
+    def __str__(self) -> str:
+        return f'ArchivedComment(id="{self.id}", user_id="{self.owner_id}", task_id="{self.task_id}")'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class ImportCheckpoint(Base):
+    __tablename__ = 'import_checkpoints'
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    line: Mapped[int] = mapped_column(default=0, nullable=False)
+    rows_imported: Mapped[int] = mapped_column(default=0, nullable=False)
+    is_completed: Mapped[bool] = mapped_column(default=False, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
+
+    def __str__(self) -> str:
+        return f'ImportCheckpoint(id="{self.id}", line={self.line}, is_completed={self.is_completed})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class Change(Base):
+    __tablename__ = 'changes'
+    __table_args__ = (
+        Index('ix_changes_owner_id_seq', 'owner_id', 'seq'),
+        Index('ix_changes_owner_id_entity_entity_id', 'owner_id', 'entity', 'entity_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+    # AUTOINCREMENT never reuses a sequence number.
+    seq: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    entity: Mapped[str] = mapped_column(SQLAlchemyEnum(ChangeEntity), nullable=False)
+    entity_id: Mapped[str] = mapped_column(nullable=False)
+    operation: Mapped[str] = mapped_column(SQLAlchemyEnum(ChangeOperation), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
+
+    def __str__(self) -> str:
+        return f'Change(seq={self.seq}, entity="{self.entity}", entity_id="{self.entity_id}", operation="{self.operation}")'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class SyncHorizon(Base):
+    __tablename__ = 'sync_horizons'
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    seq: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    def __str__(self) -> str:
+        return f'SyncHorizon(owner_id="{self.owner_id}", seq={self.seq})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    fingerprint: Mapped[bytes] = mapped_column(LargeBinary(16), nullable=False)
+    # Both stay NULL while the original request is still running.
+    status_code: Mapped[int | None] = mapped_column(nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    def __str__(self) -> str:
+        return f'IdempotencyKey(owner_id="{self.owner_id}", key="{self.key}", status_code={self.status_code})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class TaskDailyStats(Base):
+    __tablename__ = 'task_daily_stats'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    priority: Mapped[str] = mapped_column(SQLAlchemyEnum(Priority), primary_key=True)
+
+    created: Mapped[int] = mapped_column(default=0, nullable=False)
+    completed: Mapped[int] = mapped_column(default=0, nullable=False)
+    completed_with_due_date: Mapped[int] = mapped_column(default=0, nullable=False)
+    completed_late: Mapped[int] = mapped_column(default=0, nullable=False)
+    completion_seconds: Mapped[float] = mapped_column(default=0.0, nullable=False)
+    completion_histogram: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    def __str__(self) -> str:
+        return (
+            f'TaskDailyStats(owner_id="{self.owner_id}", day="{self.day}", priority="{self.priority}", '
+            f'created={self.created}, completed={self.completed})'
+        )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class JobLease(Base):
+    __tablename__ = 'job_leases'
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(64), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    def __str__(self) -> str:
+        return f'JobLease(name="{self.name}", holder="{self.holder}", expires_at="{self.expires_at}")'
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,78 @@
+"""Remove deleted tasks and users.
+
+Run from ``src``: ``python -m tasks.purger``.
+"""
+import argparse
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy import ColumnElement, Table
+
+import metrics
+from config import settings
+from database import async_engine, async_session_maker
+from tasks import leases
+from tasks.repository import PurgeRepository
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def cascade(
+    repository: PurgeRepository,
+    steps: list[tuple[Table, ColumnElement[bool]]],
+    batch_size: int,
+    purged: Counter,
+) -> None:
+    for table, condition in steps:
+        while deleted := await repository.delete_chunk(table, condition, batch_size):
+            purged[table.name] += deleted
+            metrics.purged_rows_total.inc((table.name,), deleted)
+
+            if deleted < batch_size:
+                break
+
+
+async def purge(batch_size: int) -> Counter:
+    purged: Counter = Counter()
+
+    async with async_session_maker() as session:
+        repository: PurgeRepository = PurgeRepository(session)
+
+        while task_ids := await repository.get_deleted_task_ids(batch_size):
+            await cascade(repository, repository.task_cascade(task_ids), batch_size, purged)
+            logger.info('purged %d deleted tasks, %d rows so far', len(task_ids), purged.total())
+
+        while user_id := await repository.get_deleted_user_id():
+            await cascade(repository, repository.user_cascade(user_id), batch_size, purged)
+            logger.info('purged deleted user %s, %d rows so far', user_id, purged.total())
+
+    return purged
+
+
+async def run_periodically(interval: int, batch_size: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            if await leases.acquire('purger', interval):
+                await purge(batch_size)
+        except Exception:
+            logger.exception('purge failed')
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    purged: Counter = await purge(args.batch_size)
+    await async_engine.dispose()
+
+    print(f'purged {purged.total()} rows' + ''.join(f', {count} from {table}' for table, count in purged.items()))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
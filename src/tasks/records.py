@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from pydantic import ConfigDict, TypeAdapter
+
+from tasks.models import ChangeEntity, ChangeOperation, Priority, TaskStatus
+
+
+@dataclass(slots=True)
+class UserRecord:
+    id: str
+    fullname: str | None
+    username: str
+    email: str
+    is_active: bool
+    is_verified: bool
+    is_superuser: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(slots=True)
+class TagRecord:
+    id: str
+    title: str
+    task_count: int
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(slots=True)
+class CommentRecord:
+    id: str
+    comment: str
+    created_at: datetime
+    updated_at: datetime | None
+    owner: UserRecord
+
+
+@dataclass(slots=True)
+class TaskRecord:
+    id: str
+    title: str
+    description: str | None
+    status: TaskStatus
+    priority: Priority
+    related_tags: list[TagRecord]
+    created_at: datetime
+    updated_at: datetime
+    due_date: datetime | None
+    comments: list[CommentRecord]
+
+
+@dataclass(slots=True)
+class AgendaCountRecord:
+    date: date
+    count: int
+
+
+@dataclass(slots=True)
+class AgendaDayRecord:
+    date: date
+    count: int
+    tasks: list[TaskRecord]
+
+
+@dataclass(slots=True)
+class AnalyticsBucketRecord:
+    start: date
+    created: int
+    completed: int
+    average_completion_seconds: float | None
+    completion_seconds_p50: float | None
+    completion_seconds_p90: float | None
+    overdue_rate: dict[Priority, float | None]
+
+
+@dataclass(slots=True)
+class TaskExportRecord:
+    id: str
+    title: str
+    description: str | None
+    status: TaskStatus
+    priority: Priority
+    created_at: datetime
+    updated_at: datetime
+    due_date: datetime | None
+    tags: list[str]
+    comment_count: int
+
+    __pydantic_config__ = ConfigDict(defer_build=True)
+
+
+@dataclass(slots=True)
+class SyncTaskRecord:
+    id: str
+    title: str
+    description: str | None
+    status: TaskStatus
+    priority: Priority
+    created_at: datetime
+    updated_at: datetime
+    due_date: datetime | None
+    tag_ids: list[str]
+
+
+@dataclass(slots=True)
+class SyncCommentRecord:
+    id: str
+    task_id: str
+    comment: str
+    created_at: datetime
+    updated_at: datetime | None
+
+
+@dataclass(slots=True)
+class ChangeRecord:
+    seq: int
+    entity: ChangeEntity
+    id: str
+    operation: ChangeOperation
+    data: SyncTaskRecord | TagRecord | SyncCommentRecord | None
+
+
+@dataclass(slots=True)
+class SyncPageRecord:
+    changes: list[ChangeRecord]
+    next_since: int
+    next_cursor: str | None
+    has_more: bool
+
+    __pydantic_config__ = ConfigDict(defer_build=True)
+
+
+@dataclass(slots=True)
+class TaggedTaskPageRecord:
+    tasks: list[TaskRecord]
+    next_cursor: str | None
+
+    __pydantic_config__ = ConfigDict(defer_build=True)
+
+
+# Built on first use so importing the routers stays cheap.
+deferred: ConfigDict = ConfigDict(defer_build=True)
+
+task_list_adapter: TypeAdapter[list[TaskRecord]] = TypeAdapter(list[TaskRecord], config=deferred)
+tag_list_adapter: TypeAdapter[list[TagRecord]] = TypeAdapter(list[TagRecord], config=deferred)
+comment_list_adapter: TypeAdapter[list[CommentRecord]] = TypeAdapter(list[CommentRecord], config=deferred)
+agenda_count_list_adapter: TypeAdapter[list[AgendaCountRecord]] = TypeAdapter(list[AgendaCountRecord], config=deferred)
+agenda_day_list_adapter: TypeAdapter[list[AgendaDayRecord]] = TypeAdapter(list[AgendaDayRecord], config=deferred)
+analytics_bucket_list_adapter: TypeAdapter[list[AnalyticsBucketRecord]] = TypeAdapter(
+    list[AnalyticsBucketRecord], config=deferred,
+)
+task_export_adapter: TypeAdapter[TaskExportRecord] = TypeAdapter(TaskExportRecord)
+sync_page_adapter: TypeAdapter[SyncPageRecord] = TypeAdapter(SyncPageRecord)
+tagged_task_page_adapter: TypeAdapter[TaggedTaskPageRecord] = TypeAdapter(TaggedTaskPageRecord)
@@ -1,10 +1,247 @@
-from sqlalchemy import Select, select
-from sqlalchemy.orm import selectinload
+import sys
+from datetime import date, datetime
+from typing import Callable
+
+from sqlalchemy import ColumnElement, Date, Insert, Row, Select, Table, Update, case, delete, exists, func, insert, or_, select, tuple_, union, union_all, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.sql.elements import UnaryExpression
+from sqlalchemy.sql.util import ClauseAdapter
 
+from cache import response_cache
 from repository import BaseRepository
-from .models import Task, Tag, Comment
-from .schemas import TaskCreate, TaskUpdate, TagCreate, TagUpdate, CommentCreate, CommentUpdate
+from users.models import User
+from .models import (
+    Task, Tag, TaskTag, Comment, ArchivedTask, ArchivedTaskTag, ArchivedComment, ImportCheckpoint, Change, ChangeEntity,
+    ChangeOperation, SyncHorizon, TaskStatus, Priority, IdempotencyKey, TaskDailyStats, JobLease, normalize_tag_title,
+)
+from .analytics import completion_bin, empty_histogram, is_late, unpack_histogram, utc_now
+from .events import publish_change
+from .records import TaskRecord, TagRecord, CommentRecord, UserRecord, SyncTaskRecord, SyncCommentRecord
+from .schemas import TaskCreate, TaskUpdate, TagCreate, TagUpdate, CommentCreate, CommentUpdate, Granularity
+
+
+tasks_table: Table = Task.__table__
+tags_table: Table = Tag.__table__
+task_tags_table: Table = TaskTag.__table__
+comments_table: Table = Comment.__table__
+archived_tasks_table: Table = ArchivedTask.__table__
+archived_task_tags_table: Table = ArchivedTaskTag.__table__
+archived_comments_table: Table = ArchivedComment.__table__
+users_table: Table = User.__table__
+changes_table: Table = Change.__table__
+sync_horizons_table: Table = SyncHorizon.__table__
+idempotency_keys_table: Table = IdempotencyKey.__table__
+import_checkpoints_table: Table = ImportCheckpoint.__table__
+task_daily_stats_table: Table = TaskDailyStats.__table__
+job_leases_table: Table = JobLease.__table__
+
+tag_columns: tuple = (
+    tags_table.c.id,
+    tags_table.c.title,
+    tags_table.c.task_count,
+    tags_table.c.created_at,
+    tags_table.c.updated_at,
+)
+
+user_columns: tuple = (
+    users_table.c.id,
+    users_table.c.fullname,
+    users_table.c.username,
+    users_table.c.email,
+    users_table.c.is_active,
+    users_table.c.is_verified,
+    users_table.c.is_superuser,
+    users_table.c.created_at,
+    users_table.c.updated_at,
+)
+
+
+def task_columns(table: Table) -> tuple:
+    return (
+        table.c.id,
+        table.c.title,
+        table.c.description,
+        table.c.status,
+        table.c.priority,
+        table.c.created_at,
+        table.c.updated_at,
+        table.c.due_date,
+    )
+
+
+def comment_columns_of(table: Table) -> tuple:
+    return (table.c.id, table.c.comment, table.c.created_at, table.c.updated_at, *user_columns)
+
+
+comment_columns: tuple = comment_columns_of(comments_table)
+
+
+# Deleted tasks stay in place until tasks.purger removes them.
+live_task: ColumnElement[bool] = tasks_table.c.deleted_at.is_(None)
+
+live_link_count = (
+    select(func.count())
+    .select_from(task_tags_table)
+    .join(tasks_table, tasks_table.c.id == task_tags_table.c.task_id)
+    .where(task_tags_table.c.tag_id == tags_table.c.id, live_task)
+    .scalar_subquery()
+)
+
+
+def comment_record(row: tuple) -> CommentRecord:
+    return CommentRecord(row[0], row[1], row[2], row[3], UserRecord(*row[4:13]))
+
+
+def record_change(
+    session: AsyncSession,
+    owner_id: str,
+    entity: ChangeEntity,
+    entity_id: str,
+    operation: ChangeOperation = ChangeOperation.upsert,
+) -> Change:
+    change: Change = Change(owner_id=owner_id, entity=entity, entity_id=entity_id, operation=operation)
+    session.add(change)
+
+    return change
+
+
+def after_commit(session: AsyncSession, owner_id: str, *changes: Change) -> None:
+    pending: list | None = session.info.get('pending_commits')
+
+    if pending is not None:
+        pending.append((owner_id, changes))
+        return
+
+    response_cache.invalidate(owner_id)
+
+    for change in changes:
+        publish_change(change)
+
+
+def joined_session(connection: AsyncConnection) -> AsyncSession:
+    # Service commits don't end the connection's transaction, and after_commit waits for it in pending_commits.
+    session: AsyncSession = AsyncSession(
+        bind=connection, join_transaction_mode='rollback_only', autoflush=False, expire_on_commit=False,
+    )
+    session.info['pending_commits'] = []
+
+    return session
+
+
+def change_rows(rows: list[dict], entity: ChangeEntity) -> list[dict]:
+    return [
+        {'owner_id': row['owner_id'], 'entity': entity, 'entity_id': row['id'], 'operation': ChangeOperation.upsert}
+        for row in rows
+    ]
+
+
+async def insert_changes(session: AsyncSession, rows: list[dict]) -> list[Row]:
+    if not rows:
+        return []
+
+    stmt = insert(changes_table).returning(
+        changes_table.c.seq, changes_table.c.entity, changes_table.c.entity_id, changes_table.c.operation,
+    )
+
+    # SQLite doesn't order RETURNING rows.
+    return sorted(await session.execute(stmt, rows), key=lambda row: row[0])
+
+
+def new_daily_stats(owner_id: str, day: date, priority: str) -> TaskDailyStats:
+    return TaskDailyStats(
+        owner_id=owner_id, day=day, priority=priority, created=0, completed=0, completed_with_due_date=0,
+        completed_late=0, completion_seconds=0.0, completion_histogram=empty_histogram().tobytes(),
+    )
+
+
+DailyStatsKey = tuple[str, datetime | None, datetime | None]
+
+
+def add_completion(stats: TaskDailyStats, created_at: datetime, completed_at: datetime, due_date: datetime | None, sign: int) -> None:
+    seconds: float = max((completed_at - created_at).total_seconds(), 0.0)
+
+    stats.completed = max(stats.completed + sign, 0)
+    stats.completion_seconds = max(stats.completion_seconds + sign * seconds, 0.0)
+
+    if due_date is not None:
+        stats.completed_with_due_date = max(stats.completed_with_due_date + sign, 0)
+        stats.completed_late = max(stats.completed_late + sign * is_late(completed_at, due_date), 0)
+
+    histogram = unpack_histogram(stats.completion_histogram)
+    histogram[completion_bin(seconds)] = max(histogram[completion_bin(seconds)] + sign, 0)
+    stats.completion_histogram = histogram.tobytes()
+
+
+def count_created(owner_id: str, day: date, priority: str) -> Insert:
+    stmt: Insert = sqlite_insert(task_daily_stats_table).values(
+        owner_id=owner_id, day=day, priority=priority, created=1, completed=0, completed_with_due_date=0,
+        completed_late=0, completion_seconds=0.0, completion_histogram=empty_histogram().tobytes(),
+    )
+
+    return stmt.on_conflict_do_update(
+        index_elements=['owner_id', 'day', 'priority'], set_={'created': task_daily_stats_table.c.created + 1},
+    )
+
+
+def uncount_created(owner_id: str, day: date, priority: str) -> Update:
+    return (
+        update(task_daily_stats_table)
+        .where(
+            task_daily_stats_table.c.owner_id == owner_id,
+            task_daily_stats_table.c.day == day,
+            task_daily_stats_table.c.priority == priority,
+        )
+        .values(created=func.max(task_daily_stats_table.c.created - 1, 0))
+    )
+
+
+async def count_completion(
+    session: AsyncSession, owner_id: str, priority: str, created_at: datetime, completed_at: datetime, due_date: datetime | None,
+    sign: int,
+) -> None:
+    # Runs after the task's own write is flushed, so the write lock guards this read.
+    stats: TaskDailyStats | None = await session.get(TaskDailyStats, (owner_id, completed_at.date(), priority))
+
+    if stats is None:
+        if sign < 0:
+            return
+
+        stats = new_daily_stats(owner_id, completed_at.date(), priority)
+        session.add(stats)
+
+    add_completion(stats, created_at, completed_at, due_date, sign)
+
+
+async def move_daily_stats(
+    session: AsyncSession, owner_id: str, created_at: datetime, before: DailyStatsKey, after: DailyStatsKey,
+) -> None:
+    if before == after:
+        return
+
+    priority, completed_at, due_date = before
+    new_priority, new_completed_at, new_due_date = after
+
+    if priority != new_priority:
+        await session.execute(uncount_created(owner_id, created_at.date(), priority))
+        await session.execute(count_created(owner_id, created_at.date(), new_priority))
+
+    if completed_at is not None:
+        await count_completion(session, owner_id, priority, created_at, completed_at, due_date, -1)
+
+    if new_completed_at is not None:
+        await count_completion(session, owner_id, new_priority, created_at, new_completed_at, new_due_date, 1)
+
+
+def task_count_change(links: ColumnElement[bool], sign: int) -> Update:
+    linked = select(func.count()).where(task_tags_table.c.tag_id == tags_table.c.id, links).scalar_subquery()
+
+    return (
+        update(tags_table)
+        .where(tags_table.c.id.in_(select(task_tags_table.c.tag_id).where(links)))
+        .values(task_count=tags_table.c.task_count + linked * sign, updated_at=tags_table.c.updated_at)
+    )
 
 
 class TaskRepository(BaseRepository):
@@ -18,7 +255,11 @@ class TaskRepository(BaseRepository):
         )
         
         self.session.add(task)
+        await self.session.flush()
+        await self.session.execute(count_created(owner_id, utc_now().date(), task.priority))
+        change: Change = record_change(self.session, owner_id, ChangeEntity.task, task.id)
         await self.session.commit()
+        after_commit(self.session, owner_id, change)
         await self.session.refresh(task, ['related_tags', 'comments'])
 
         return task
@@ -27,8 +268,9 @@ class TaskRepository(BaseRepository):
         stmt: Select[Task] = (
             select(Task)
             .filter_by(id=task_id, owner_id=owner_id)
+            .where(live_task)
             .options(selectinload(Task.related_tags))
-            .options(selectinload(Task.comments))
+            .options(selectinload(Task.comments).joinedload(Comment.owner))
         )
         task: Task = (
             await self.session.execute(stmt)
@@ -36,24 +278,215 @@ class TaskRepository(BaseRepository):
 
         return task
     
-    async def get_all(self, page: int, limit: int, sort_by: str, order: UnaryExpression, owner_id: str) -> list[Task]:
-        stmt: Select[list[Task]] = (
-            select(Task)
-            .filter_by(owner_id=owner_id)
-            .options(selectinload(Task.related_tags))
-            .options(selectinload(Task.comments))
-            .order_by(order(sort_by))
-            .offset((page - 1) * limit)
-            .limit(limit)
+    async def get_all_records(
+        self,
+        page: int,
+        limit: int,
+        sort_by: str,
+        order: UnaryExpression,
+        owner_id: str,
+        include_archived: bool = False,
+    ) -> list[TaskRecord]:
+        stmt: Select = select(*task_columns(tasks_table)).where(tasks_table.c.owner_id == owner_id, live_task)
+        task_id: ColumnElement = tasks_table.c.id
+        children: list[tuple[Table, Table]] = [(task_tags_table, comments_table)]
+
+        if include_archived:
+            archived: Select = select(*task_columns(archived_tasks_table)).where(archived_tasks_table.c.owner_id == owner_id)
+            tasks_and_archived = union_all(stmt, archived).subquery()
+            sort_by = ClauseAdapter(tasks_and_archived).traverse(sort_by.expression)
+            task_id = tasks_and_archived.c.id
+            stmt = select(tasks_and_archived)
+            children.append((archived_task_tags_table, archived_comments_table))
+
+        # The id breaks ties, so a row can't move between pages.
+        stmt = stmt.order_by(order(sort_by), order(task_id)).offset((page - 1) * limit).limit(limit)
+        tasks: dict[str, TaskRecord] = {
+            id: TaskRecord(id, title, description, status, priority, [], created_at, updated_at, due_date, [])
+            for id, title, description, status, priority, created_at, updated_at, due_date in (
+                await self.session.execute(stmt)
+            )
+        }
+
+        return await self.attach_children(tasks, children)
+
+    async def get_agenda_records(self, owner_id: str, due_from: datetime, due_to: datetime) -> list[TaskRecord]:
+        stmt: Select = (
+            select(*task_columns(tasks_table))
+            .where(*self.due_between(owner_id, due_from, due_to))
+            .order_by(tasks_table.c.due_date)
         )
-        tasks: list[Task] = (
-            await self.session.execute(stmt)
-        ).scalars().all()
-        
-        return tasks
+        tasks: dict[str, TaskRecord] = {
+            id: TaskRecord(id, title, description, status, priority, [], created_at, updated_at, due_date, [])
+            for id, title, description, status, priority, created_at, updated_at, due_date in (
+                await self.session.execute(stmt)
+            )
+        }
+
+        return await self.attach_children(tasks, [(task_tags_table, comments_table)])
+
+    async def get_due_dates(self, owner_id: str, due_from: datetime, due_to: datetime) -> list[datetime]:
+        stmt: Select = (
+            select(tasks_table.c.due_date)
+            .where(*self.due_between(owner_id, due_from, due_to))
+            .order_by(tasks_table.c.due_date)
+        )
+
+        return list((await self.session.execute(stmt)).scalars())
+
+    @staticmethod
+    def due_between(owner_id: str, due_from: datetime, due_to: datetime) -> tuple[ColumnElement[bool], ...]:
+        return (
+            tasks_table.c.owner_id == owner_id,
+            tasks_table.c.due_date >= due_from,
+            tasks_table.c.due_date < due_to,
+            live_task,
+        )
+
+    async def attach_children(self, tasks: dict[str, TaskRecord], children: list[tuple[Table, Table]]) -> list[TaskRecord]:
+        if not tasks:
+            return []
+
+        for links_table, task_comments_table in children:
+            tags_stmt: Select = (
+                select(links_table.c.task_id, *tag_columns)
+                .join(tags_table, tags_table.c.id == links_table.c.tag_id)
+                .where(links_table.c.task_id.in_(tasks.keys()))
+            )
+            for task_id, *tag in await self.session.execute(tags_stmt):
+                tasks[task_id].related_tags.append(TagRecord(*tag))
+
+            comments_stmt: Select = (
+                select(task_comments_table.c.task_id, *comment_columns_of(task_comments_table))
+                .join(users_table, users_table.c.id == task_comments_table.c.owner_id)
+                .where(task_comments_table.c.task_id.in_(tasks.keys()))
+            )
+            for row in await self.session.execute(comments_stmt):
+                tasks[row[0]].comments.append(comment_record(row[1:]))
+
+        return list(tasks.values())
+
+    async def get_tagged_records(
+        self, tag_ids: list[str], after: str | None, limit: int, owner_id: str,
+    ) -> tuple[list[TaskRecord], bool]:
+        # Walks the first tag's links, so callers pass the rarest tag first.
+        first_tag_id, *other_tag_ids = tag_ids
+        links: Table = task_tags_table.alias('links')
+        conditions: list[ColumnElement[bool]] = [
+            links.c.tag_id == first_tag_id,
+            tasks_table.c.owner_id == owner_id,
+            live_task,
+            *(
+                exists().where(task_tags_table.c.task_id == links.c.task_id, task_tags_table.c.tag_id == tag_id)
+                for tag_id in other_tag_ids
+            ),
+        ]
+
+        if after is not None:
+            conditions.append(links.c.task_id > after)
+
+        stmt: Select = (
+            select(*task_columns(tasks_table))
+            .select_from(links)
+            .join(tasks_table, tasks_table.c.id == links.c.task_id)
+            .where(*conditions)
+            .order_by(links.c.task_id)
+            .limit(limit + 1)
+        )
+        tasks: dict[str, TaskRecord] = {
+            id: TaskRecord(id, title, description, status, priority, [], created_at, updated_at, due_date, [])
+            for id, title, description, status, priority, created_at, updated_at, due_date in (
+                await self.session.execute(stmt)
+            )
+        }
+        has_more: bool = len(tasks) > limit
+
+        if has_more:
+            tasks.popitem()
+
+        return await self.attach_children(tasks, [(task_tags_table, comments_table)]), has_more
+
+    async def get_sync_records(self, task_ids: list[str], owner_id: str) -> list[SyncTaskRecord]:
+        stmt: Select = (
+            select(
+                tasks_table.c.id,
+                tasks_table.c.title,
+                tasks_table.c.description,
+                tasks_table.c.status,
+                tasks_table.c.priority,
+                tasks_table.c.created_at,
+                tasks_table.c.updated_at,
+                tasks_table.c.due_date,
+            )
+            .where(tasks_table.c.id.in_(task_ids), tasks_table.c.owner_id == owner_id, live_task)
+        )
+        tasks: dict[str, SyncTaskRecord] = {
+            row[0]: SyncTaskRecord(*row, []) for row in await self.session.execute(stmt)
+        }
+
+        if not tasks:
+            return []
+
+        tags_stmt: Select = (
+            select(task_tags_table.c.task_id, task_tags_table.c.tag_id)
+            .where(task_tags_table.c.task_id.in_(tasks.keys()))
+        )
+        for task_id, tag_id in await self.session.execute(tags_stmt):
+            tasks[task_id].tag_ids.append(tag_id)
+
+        return list(tasks.values())
     
+    @staticmethod
+    def export_select(tasks: Table, links: Table, comments: Table) -> Select:
+        comment_count = (
+            select(func.count(comments.c.id))
+            .where(comments.c.task_id == tasks.c.id)
+            .scalar_subquery()
+        )
+        tag_titles = (
+            select(func.json_group_array(tags_table.c.title))
+            .select_from(links.join(tags_table, tags_table.c.id == links.c.tag_id))
+            .where(links.c.task_id == tasks.c.id)
+            .scalar_subquery()
+        )
+
+        return select(*task_columns(tasks), tag_titles, comment_count)
+
+    async def get_export_page(self, owner_id: str, archived: bool, after: str, limit: int) -> list[Row]:
+        if archived:
+            tasks, links, comments = archived_tasks_table, archived_task_tags_table, archived_comments_table
+        else:
+            tasks, links, comments = tasks_table, task_tags_table, comments_table
+
+        stmt: Select = (
+            self.export_select(tasks, links, comments)
+            .where(tasks.c.owner_id == owner_id, tasks.c.id > after)
+            .order_by(tasks.c.id)
+            .limit(limit)
+        )
+
+        if not archived:
+            stmt = stmt.where(live_task)
+
+        return list(await self.session.execute(stmt))
+
+    async def bulk_insert(self, tasks: list[dict], task_tags: list[dict], comments: list[dict]) -> list[Row]:
+        if tasks:
+            await self.session.execute(insert(tasks_table), tasks)
+
+        if task_tags:
+            await self.session.execute(insert(task_tags_table), task_tags)
+            await self.session.execute(
+                task_count_change(task_tags_table.c.task_id.in_({link['task_id'] for link in task_tags}), 1)
+            )
+
+        if comments:
+            await self.session.execute(insert(comments_table), comments)
+
+        return await insert_changes(self.session, change_rows(tasks, ChangeEntity.task) + change_rows(comments, ChangeEntity.comment))
+
     async def task_exists_by_id(self, task_id: str, owner_id: str) -> bool:
-        stmt: Select[Task] = select(Task).filter_by(id=task_id, owner_id=owner_id)
+        stmt: Select[Task] = select(Task).filter_by(id=task_id, owner_id=owner_id).where(live_task)
         task: Task = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
@@ -61,7 +494,7 @@ class TaskRepository(BaseRepository):
         return task is not None
     
     async def task_exists_by_title(self, title: str) -> bool:
-        stmt: Select[Task] = select(Task).filter_by(title=title)
+        stmt: Select[Task] = select(Task).filter_by(title=title).where(live_task)
         task: Task = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
@@ -69,37 +502,83 @@ class TaskRepository(BaseRepository):
         return task is not None
     
     async def update(self, task: Task, task_data: TaskUpdate) -> Task:
+        before: DailyStatsKey = (task.priority, task.completed_at, task.due_date)
+
         for key, value in task_data.model_dump(exclude_unset=True).items():
             setattr(task, key, value)
 
+        if task.status != TaskStatus.completed:
+            task.completed_at = None
+        elif task.completed_at is None:
+            task.completed_at = utc_now()
+
+        after: DailyStatsKey = (task.priority, task.completed_at, task.due_date)
+
+        if after != before:
+            await self.session.flush()
+            await move_daily_stats(self.session, task.owner_id, task.created_at, before, after)
+
+        change: Change = record_change(self.session, task.owner_id, ChangeEntity.task, task.id)
         await self.session.commit()
+        after_commit(self.session, task.owner_id, change)
         await self.session.refresh(task)
 
         return task
     
-    async def delete(self, task: Task) -> bool:
-        await self.session.delete(task)
+    async def delete(self, task_id: str, owner_id: str) -> bool:
+        deleted: Row | None = (await self.session.execute(
+            update(tasks_table)
+            .where(tasks_table.c.id == task_id, tasks_table.c.owner_id == owner_id, live_task)
+            .values(deleted_at=func.now())
+            .returning(tasks_table.c.created_at, tasks_table.c.priority, tasks_table.c.completed_at, tasks_table.c.due_date)
+        )).first()
+
+        if deleted is None:
+            return False
+
+        await self.session.execute(task_count_change(task_tags_table.c.task_id == task_id, -1))
+        await self.session.execute(uncount_created(owner_id, deleted.created_at.date(), deleted.priority))
+
+        if deleted.completed_at is not None:
+            await count_completion(
+                self.session, owner_id, deleted.priority, deleted.created_at, deleted.completed_at, deleted.due_date, -1,
+            )
+
+        change: Change = record_change(self.session, owner_id, ChangeEntity.task, task_id, ChangeOperation.delete)
         await self.session.commit()
+        after_commit(self.session, owner_id, change)
 
         return True
     
     async def add_tag(self, task: Task, tag: Tag) -> bool:
         task.related_tags.append(tag)
+        # Sessions don't autoflush.
+        await self.session.flush()
+        await self.session.execute(
+            task_count_change((task_tags_table.c.task_id == task.id) & (task_tags_table.c.tag_id == tag.id), 1)
+        )
+        change: Change = record_change(self.session, task.owner_id, ChangeEntity.task, task.id)
 
         await self.session.commit()
+        after_commit(self.session, task.owner_id, change)
 
         return True
     
     async def remove_tag(self, task: Task, tag: Tag) -> bool:
+        await self.session.execute(
+            task_count_change((task_tags_table.c.task_id == task.id) & (task_tags_table.c.tag_id == tag.id), -1)
+        )
         task.related_tags.remove(tag)
+        change: Change = record_change(self.session, task.owner_id, ChangeEntity.task, task.id)
 
         await self.session.commit()
+        after_commit(self.session, task.owner_id, change)
         await self.session.refresh(task, ['related_tags'])
 
         return True
     
     async def tag_exists_in_task(self, task_id: str, tag: Tag) -> bool:
-        stmt: Select[Task] = select(Task).filter(Task.id == task_id, Task.related_tags.contains(tag))
+        stmt: Select[Task] = select(Task).filter(Task.id == task_id, Task.related_tags.contains(tag), live_task)
         task: Task = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
@@ -108,17 +587,29 @@ class TaskRepository(BaseRepository):
 
 
 class TagRepository(BaseRepository):
-    async def create(self, tag_data: TagCreate, owner_id: str) -> Tag:
-        tag: Tag = Tag(
-            **tag_data.model_dump(),
-            owner_id=owner_id
+    async def get_or_create(self, tag_data: TagCreate, owner_id: str) -> tuple[Tag, bool]:
+        normalized_title: str = normalize_tag_title(tag_data.title)
+        stmt = (
+            sqlite_insert(tags_table)
+            .values(title=tag_data.title, normalized_title=normalized_title, owner_id=owner_id)
+            .on_conflict_do_nothing(index_elements=['owner_id', 'normalized_title'])
+            .returning(tags_table.c.id)
         )
+        tag_id: str | None = (await self.session.execute(stmt)).scalar_one_or_none()
 
-        self.session.add(tag)
-        await self.session.commit()
-        await self.session.refresh(tag)
+        if tag_id is not None:
+            change: Change = record_change(self.session, owner_id, ChangeEntity.tag, tag_id)
+            await self.session.commit()
+            after_commit(self.session, owner_id, change)
+        else:
+            # Releases the write lock the ignored insert took.
+            await self.session.commit()
 
-        return tag
+        tag: Tag = (
+            await self.session.execute(select(Tag).filter_by(owner_id=owner_id, normalized_title=normalized_title))
+        ).scalar_one()
+
+        return tag, tag_id is not None
     
     async def get_by_id(self, tag_id: str, owner_id: str) -> Tag:
         stmt: Select[Tag] = select(Tag).filter_by(id=tag_id, owner_id=owner_id)
@@ -128,31 +619,77 @@ class TagRepository(BaseRepository):
 
         return tag
 
-    async def get_all(self, page: int, limit: int, owner_id: str) -> list[Tag]:
-        stmt: Select[list[Tag]] = (
-            select(Tag)
-            .filter_by(owner_id=owner_id)
+    async def get_all_records(
+        self, page: int, limit: int, sort_by: ColumnElement, order: Callable, owner_id: str,
+    ) -> list[TagRecord]:
+        stmt: Select = (
+            select(*tag_columns)
+            .where(tags_table.c.owner_id == owner_id)
+            .order_by(order(sort_by), order(tags_table.c.id))
             .offset((page - 1) * limit)
             .limit(limit)
         )
-        tags: list[Tag] = (
-            await self.session.execute(stmt)
-        ).scalars().all()
 
-        return tags
+        return [TagRecord(*row) for row in await self.session.execute(stmt)]
+
+    async def get_records_by_ids(self, tag_ids: list[str], owner_id: str) -> list[TagRecord]:
+        stmt: Select = select(*tag_columns).where(tags_table.c.id.in_(tag_ids), tags_table.c.owner_id == owner_id)
+
+        return [TagRecord(*row) for row in await self.session.execute(stmt)]
+
+    async def suggest(self, prefix: str, limit: int, owner_id: str) -> list[TagRecord]:
+        normalized_prefix: str = normalize_tag_title(prefix)
+        conditions: list[ColumnElement[bool]] = [tags_table.c.owner_id == owner_id]
+
+        if normalized_prefix:
+            conditions.append(tags_table.c.normalized_title >= normalized_prefix)
+            # Every title above the prefix starts with it while the prefix is all U+10FFFF.
+            stem: str = normalized_prefix.rstrip(chr(sys.maxunicode))
+
+            if stem:
+                upper: str = stem[:-1] + chr(ord(stem[-1]) + 1)
+                conditions.append(tags_table.c.normalized_title < upper)
+
+        stmt: Select = select(*tag_columns).where(*conditions).order_by(tags_table.c.normalized_title).limit(limit)
+
+        return [TagRecord(*row) for row in await self.session.execute(stmt)]
+
+    async def get_task_counts(self, tag_ids: list[str], owner_id: str) -> dict[str, int]:
+        stmt: Select = select(tags_table.c.id, tags_table.c.task_count).where(
+            tags_table.c.id.in_(tag_ids), tags_table.c.owner_id == owner_id,
+        )
+
+        return dict((await self.session.execute(stmt)).tuples().all())
+
+    async def get_title_map(self, owner_id: str) -> dict[str, str]:
+        stmt: Select = select(tags_table.c.normalized_title, tags_table.c.id).where(tags_table.c.owner_id == owner_id)
+
+        return dict((await self.session.execute(stmt)).tuples().all())
+
+    async def bulk_insert(self, tags: list[dict]) -> list[Row]:
+        if tags:
+            await self.session.execute(insert(tags_table), tags)
+
+        return await insert_changes(self.session, change_rows(tags, ChangeEntity.tag))
 
     async def update(self, tag: Tag, tag_data: TagUpdate) -> Tag:
         for key, value in tag_data.model_dump(exclude_unset=True).items():
             setattr(tag, key, value)
 
+        tag.normalized_title = normalize_tag_title(tag.title)
+
+        change: Change = record_change(self.session, tag.owner_id, ChangeEntity.tag, tag.id)
         await self.session.commit()
+        after_commit(self.session, tag.owner_id, change)
         await self.session.refresh(tag)
 
         return tag
 
     async def delete(self, tag: Tag) -> bool:
         await self.session.delete(tag)
+        change: Change = record_change(self.session, tag.owner_id, ChangeEntity.tag, tag.id, ChangeOperation.delete)
         await self.session.commit()
+        after_commit(self.session, tag.owner_id, change)
 
         return True
 
@@ -164,6 +701,17 @@ class TagRepository(BaseRepository):
 
         return tag is not None
 
+    async def tag_exists_by_title(self, title: str, owner_id: str, exclude_id: str | None = None) -> bool:
+        stmt: Select = select(
+            exists().where(
+                tags_table.c.owner_id == owner_id,
+                tags_table.c.normalized_title == normalize_tag_title(title),
+                tags_table.c.id != exclude_id,
+            )
+        )
+
+        return (await self.session.execute(stmt)).scalar_one()
+
 
 class CommentRepository(BaseRepository):
     async def create(self, task_id: str, comment_data: CommentCreate, owner_id: str) -> Comment:
@@ -174,51 +722,503 @@ class CommentRepository(BaseRepository):
         )
 
         self.session.add(comment)
+        await self.session.flush()
+        change: Change = record_change(self.session, owner_id, ChangeEntity.comment, comment.id)
         await self.session.commit()
+        after_commit(self.session, owner_id, change)
         await self.session.refresh(comment)
 
         return comment
     
     async def get_by_id(self, comment_id: str, owner_id: str) -> Comment:
-        stmt: Select[Comment] = select(Comment).filter_by(id=comment_id, owner_id=owner_id)
+        stmt: Select[Comment] = (
+            select(Comment)
+            .filter_by(id=comment_id, owner_id=owner_id)
+            .join(tasks_table, tasks_table.c.id == Comment.task_id)
+            .where(live_task)
+        )
         comment: Comment = (
             await self.session.execute(stmt)
         ).scalar_one()
 
         return comment
     
-    async def get_all(self, page: int, limit: int, owner_id: str) -> list[Comment]:
-        stmt: Select[list[Comment]] = (
-            select(Comment)
-            .filter_by(owner_id=owner_id)
+    async def get_all_records(self, page: int, limit: int, owner_id: str) -> list[CommentRecord]:
+        stmt: Select = (
+            select(*comment_columns)
+            .join(users_table, users_table.c.id == comments_table.c.owner_id)
+            .join(tasks_table, tasks_table.c.id == comments_table.c.task_id)
+            .where(comments_table.c.owner_id == owner_id, live_task)
             .offset((page - 1) * limit)
             .limit(limit)
         )
-        comments: list[Comment] = (
-            await self.session.execute(stmt)
-        ).scalars().all()
 
-        return comments
+        return [comment_record(row) for row in await self.session.execute(stmt)]
+
+    async def get_sync_records(self, comment_ids: list[str], owner_id: str) -> list[SyncCommentRecord]:
+        stmt: Select = (
+            select(
+                comments_table.c.id,
+                comments_table.c.task_id,
+                comments_table.c.comment,
+                comments_table.c.created_at,
+                comments_table.c.updated_at,
+            )
+            .join(tasks_table, tasks_table.c.id == comments_table.c.task_id)
+            .where(comments_table.c.id.in_(comment_ids), comments_table.c.owner_id == owner_id, live_task)
+        )
+
+        return [SyncCommentRecord(*row) for row in await self.session.execute(stmt)]
     
     async def update(self, comment: Comment, comment_data: CommentUpdate) -> Comment:
         for key, value in comment_data.model_dump(exclude_unset=True).items():
             setattr(comment, key, value)
 
+        change: Change = record_change(self.session, comment.owner_id, ChangeEntity.comment, comment.id)
         await self.session.commit()
+        after_commit(self.session, comment.owner_id, change)
         await self.session.refresh(comment)
 
         return comment
     
     async def delete(self, comment: Comment) -> bool:
         await self.session.delete(comment)
+        change: Change = record_change(self.session, comment.owner_id, ChangeEntity.comment, comment.id, ChangeOperation.delete)
         await self.session.commit()
+        after_commit(self.session, comment.owner_id, change)
 
         return True
     
     async def comment_exists_by_id(self, comment_id: str, owner_id: str) -> bool:
-        stmt: Select[Comment] = select(Comment).filter_by(id=comment_id, owner_id=owner_id)
+        stmt: Select[Comment] = (
+            select(Comment)
+            .filter_by(id=comment_id, owner_id=owner_id)
+            .join(tasks_table, tasks_table.c.id == Comment.task_id)
+            .where(live_task)
+        )
         comment: Comment = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
 
         return comment is not None
+
+
+class ImportCheckpointRepository(BaseRepository):
+    async def create(self, import_id: str, owner_id: str) -> ImportCheckpoint:
+        checkpoint: ImportCheckpoint = ImportCheckpoint(id=import_id, owner_id=owner_id, line=0, rows_imported=0)
+
+        self.session.add(checkpoint)
+        await self.session.commit()
+
+        return checkpoint
+
+    async def get_by_id(self, import_id: str) -> ImportCheckpoint | None:
+        stmt: Select[ImportCheckpoint] = select(ImportCheckpoint).filter_by(id=import_id)
+        checkpoint: ImportCheckpoint | None = (
+            await self.session.execute(stmt)
+        ).scalar_one_or_none()
+
+        return checkpoint
+
+    async def advance(self, checkpoint: ImportCheckpoint, line: int, rows_imported: int, is_completed: bool = False) -> ImportCheckpoint:
+        checkpoint.line = line
+        checkpoint.rows_imported += rows_imported
+        checkpoint.is_completed = is_completed
+
+        await self.session.commit()
+        response_cache.invalidate(checkpoint.owner_id)
+
+        return checkpoint
+
+
+class ChangeRepository(BaseRepository):
+    async def get_since(self, owner_id: str, since: int, limit: int) -> list[Row]:
+        stmt: Select = (
+            select(changes_table.c.seq, changes_table.c.entity, changes_table.c.entity_id, changes_table.c.operation)
+            .where(changes_table.c.owner_id == owner_id, changes_table.c.seq > since)
+            .order_by(changes_table.c.seq)
+            .limit(limit)
+        )
+
+        return list(await self.session.execute(stmt))
+
+    async def get_horizon(self, owner_id: str) -> int:
+        stmt: Select = select(sync_horizons_table.c.seq).where(sync_horizons_table.c.owner_id == owner_id)
+
+        return (await self.session.execute(stmt)).scalar_one_or_none() or 0
+
+    async def delete_superseded(self, batch_size: int) -> int:
+        newer = changes_table.alias('newer')
+        superseded: Select = (
+            select(changes_table.c.seq)
+            .where(
+                exists().where(
+                    newer.c.owner_id == changes_table.c.owner_id,
+                    newer.c.entity == changes_table.c.entity,
+                    newer.c.entity_id == changes_table.c.entity_id,
+                    newer.c.seq > changes_table.c.seq,
+                )
+            )
+            .limit(batch_size)
+        )
+        result = await self.session.execute(delete(changes_table).where(changes_table.c.seq.in_(superseded)))
+        await self.session.commit()
+
+        return result.rowcount
+
+    async def delete_expired_tombstones(self, cutoff: datetime, batch_size: int) -> int:
+        stmt: Select = (
+            select(changes_table.c.seq, changes_table.c.owner_id)
+            .where(changes_table.c.operation == ChangeOperation.delete, changes_table.c.created_at < cutoff)
+            .order_by(changes_table.c.seq)
+            .limit(batch_size)
+        )
+        tombstones: list[Row] = list(await self.session.execute(stmt))
+
+        if not tombstones:
+            return 0
+
+        horizons: dict[str, int] = {}
+        for seq, owner_id in tombstones:
+            horizons[owner_id] = max(horizons.get(owner_id, 0), seq)
+
+        # Clients that synced before a purged tombstone must start over.
+        upsert = sqlite_insert(sync_horizons_table)
+        await self.session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[sync_horizons_table.c.owner_id],
+                set_={'seq': func.max(sync_horizons_table.c.seq, upsert.excluded.seq)},
+            ),
+            [{'owner_id': owner_id, 'seq': seq} for owner_id, seq in horizons.items()],
+        )
+        await self.session.execute(delete(changes_table).where(changes_table.c.seq.in_([seq for seq, _ in tombstones])))
+        await self.session.commit()
+
+        return len(tombstones)
+
+
+class IdempotencyKeyRepository(BaseRepository):
+    async def get(self, owner_id: str, key: str) -> Row | None:
+        stmt: Select = (
+            select(
+                idempotency_keys_table.c.fingerprint,
+                idempotency_keys_table.c.status_code,
+                idempotency_keys_table.c.body,
+                idempotency_keys_table.c.created_at,
+            )
+            .where(idempotency_keys_table.c.owner_id == owner_id, idempotency_keys_table.c.key == key)
+        )
+
+        return (await self.session.execute(stmt)).first()
+
+    async def claim(self, owner_id: str, key: str, fingerprint: bytes, now: datetime, expired_before: datetime, abandoned_before: datetime) -> bool:
+        stmt = sqlite_insert(idempotency_keys_table).values(owner_id=owner_id, key=key, fingerprint=fingerprint, created_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[idempotency_keys_table.c.owner_id, idempotency_keys_table.c.key],
+            set_={'fingerprint': fingerprint, 'status_code': None, 'body': None, 'created_at': now},
+            where=(idempotency_keys_table.c.created_at < expired_before) | (
+                idempotency_keys_table.c.status_code.is_(None) & (idempotency_keys_table.c.created_at < abandoned_before)
+            ),
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+
+        return result.rowcount == 1
+
+    async def complete(self, owner_id: str, key: str, status_code: int, body: bytes) -> None:
+        stmt = (
+            update(idempotency_keys_table)
+            .where(idempotency_keys_table.c.owner_id == owner_id, idempotency_keys_table.c.key == key)
+            .values(status_code=status_code, body=body)
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def release(self, owner_id: str, key: str) -> None:
+        stmt = delete(idempotency_keys_table).where(
+            idempotency_keys_table.c.owner_id == owner_id,
+            idempotency_keys_table.c.key == key,
+            idempotency_keys_table.c.status_code.is_(None),
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def purge(self, expired_before: datetime) -> int:
+        result = await self.session.execute(
+            delete(idempotency_keys_table).where(idempotency_keys_table.c.created_at < expired_before)
+        )
+        await self.session.commit()
+
+        return result.rowcount
+
+
+def copy_rows(source: Table, target: Table, condition: ColumnElement[bool], **values: ColumnElement) -> Insert:
+    names: list[str] = [column.name for column in target.columns if column.name in source.columns]
+    columns: list = [values[name].label(name) if name in values else source.c[name] for name in names]
+
+    return insert(target).from_select(names, select(*columns).where(condition))
+
+
+class DailyStatsRepository(BaseRepository):
+    async def get_buckets(self, owner_id: str, first: date, last: date, granularity: Granularity) -> list[Row]:
+        stats: Table = task_daily_stats_table
+        # Must match analytics.bucket_start.
+        start = {
+            Granularity.day: stats.c.day,
+            Granularity.week: func.date(stats.c.day, 'weekday 0', '-6 days', type_=Date),
+            Granularity.month: func.date(stats.c.day, 'start of month', type_=Date),
+        }[granularity].label('start')
+
+        per_priority: list = [
+            func.sum(case((stats.c.priority == priority, stats.c[column]), else_=0)).label(f'{column}_{priority.value}')
+            for priority in Priority
+            for column in ('completed_late', 'completed_with_due_date')
+        ]
+
+        stmt: Select = (
+            select(
+                start,
+                func.sum(stats.c.created).label('created'),
+                func.sum(stats.c.completed).label('completed'),
+                func.sum(stats.c.completion_seconds).label('completion_seconds'),
+                func.group_concat(func.hex(stats.c.completion_histogram), '').label('histograms'),
+                *per_priority,
+            )
+            .where(stats.c.owner_id == owner_id, stats.c.day >= first, stats.c.day <= last)
+            .group_by(start)
+            .order_by(start)
+        )
+
+        return list(await self.session.execute(stmt))
+
+    async def get_owners_to_recount(self, since: date, include_archived: bool) -> list[str]:
+        start: datetime = datetime.combine(since, datetime.min.time())
+        selects: list[Select] = [
+            select(task_daily_stats_table.c.owner_id).where(task_daily_stats_table.c.day >= since),
+            *(
+                select(table.c.owner_id).where(window)
+                for table in ((tasks_table, archived_tasks_table) if include_archived else (tasks_table,))
+                for window in (table.c.created_at >= start, table.c.completed_at >= start)
+            ),
+        ]
+        owner_ids = union(*selects).subquery()
+
+        return list((await self.session.execute(select(owner_ids.c.owner_id).order_by(owner_ids.c.owner_id))).scalars())
+
+    async def recount(self, owner_ids: list[str], since: date, include_archived: bool) -> None:
+        # One transaction: the write lock is held from the delete on.
+        start: datetime = datetime.combine(since, datetime.min.time())
+        await self.session.execute(
+            delete(task_daily_stats_table)
+            .where(task_daily_stats_table.c.owner_id.in_(owner_ids), task_daily_stats_table.c.day >= since)
+        )
+
+        sources: list[tuple[Table, tuple[ColumnElement[bool], ...]]] = [(tasks_table, (live_task,))]
+        if include_archived:
+            sources.append((archived_tasks_table, ()))
+
+        selects: list[Select] = [
+            select(table.c.owner_id, table.c.priority, table.c.created_at, table.c.completed_at, table.c.due_date)
+            .where(table.c.owner_id.in_(owner_ids), *live, *window)
+            for table, live in sources
+            for window in (
+                (table.c.created_at >= start,),
+                (table.c.completed_at >= start, table.c.created_at < start),
+            )
+        ]
+
+        stats: dict[tuple[str, date, str], TaskDailyStats] = {}
+
+        def stats_of(owner_id: str, day: date, priority: str) -> TaskDailyStats:
+            if (owner_id, day, priority) not in stats:
+                stats[owner_id, day, priority] = new_daily_stats(owner_id, day, priority)
+
+            return stats[owner_id, day, priority]
+
+        for owner_id, priority, created_at, completed_at, due_date in await self.session.execute(union_all(*selects)):
+            if created_at >= start:
+                stats_of(owner_id, created_at.date(), priority).created += 1
+
+            if completed_at is not None and completed_at >= start:
+                add_completion(stats_of(owner_id, completed_at.date(), priority), created_at, completed_at, due_date, 1)
+
+        self.session.add_all(stats.values())
+        await self.session.commit()
+
+
+class JobLeaseRepository(BaseRepository):
+    async def acquire(self, name: str, holder: str, now: datetime, expires_at: datetime) -> bool:
+        stmt = sqlite_insert(job_leases_table).values(name=name, holder=holder, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[job_leases_table.c.name],
+            set_={'holder': holder, 'expires_at': expires_at},
+            where=(job_leases_table.c.holder == holder) | (job_leases_table.c.expires_at < now),
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+
+        return result.rowcount == 1
+
+
+class ArchiveRepository(BaseRepository):
+    async def archive(self, completed_before: datetime, batch_size: int) -> list[str]:
+        stmt: Select = (
+            select(tasks_table.c.id, tasks_table.c.owner_id)
+            .where(
+                tasks_table.c.status == TaskStatus.completed,
+                tasks_table.c.completed_at < completed_before,
+                live_task,
+            )
+            .limit(batch_size)
+        )
+        rows: list[Row] = list(await self.session.execute(stmt))
+
+        if not rows:
+            return []
+
+        task_ids: list[str] = [task_id for task_id, _ in rows]
+        moves: list[tuple[Table, Table, ColumnElement[bool]]] = [
+            (tasks_table, archived_tasks_table, tasks_table.c.id.in_(task_ids)),
+            (task_tags_table, archived_task_tags_table, task_tags_table.c.task_id.in_(task_ids)),
+            (comments_table, archived_comments_table, comments_table.c.task_id.in_(task_ids)),
+        ]
+
+        for source, target, condition in moves:
+            await self.session.execute(copy_rows(source, target, condition))
+
+        await self.session.execute(task_count_change(task_tags_table.c.task_id.in_(task_ids), -1))
+
+        for source, _, condition in reversed(moves):
+            await self.session.execute(delete(source).where(condition))
+
+        changes: dict[str, list[Change]] = {}
+        for task_id, owner_id in rows:
+            changes.setdefault(owner_id, []).append(
+                record_change(self.session, owner_id, ChangeEntity.task, task_id, ChangeOperation.delete)
+            )
+
+        await self.session.commit()
+
+        for owner_id, owner_changes in changes.items():
+            after_commit(self.session, owner_id, *owner_changes)
+
+        return list(changes)
+
+    async def restore(self, task_id: str, owner_id: str) -> bool:
+        moved = await self.session.execute(copy_rows(
+            archived_tasks_table,
+            tasks_table,
+            (archived_tasks_table.c.id == task_id) & (archived_tasks_table.c.owner_id == owner_id),
+            updated_at=func.now(),
+        ).prefix_with('OR IGNORE'))
+
+        if moved.rowcount == 0:
+            await self.session.rollback()
+            return False
+
+        await self.session.execute(copy_rows(
+            archived_task_tags_table,
+            task_tags_table,
+            (archived_task_tags_table.c.task_id == task_id)
+            & archived_task_tags_table.c.tag_id.in_(select(tags_table.c.id).where(tags_table.c.owner_id == owner_id)),
+        ))
+        await self.session.execute(task_count_change(task_tags_table.c.task_id == task_id, 1))
+        await self.session.execute(
+            copy_rows(archived_comments_table, comments_table, archived_comments_table.c.task_id == task_id)
+        )
+
+        await self.session.execute(delete(archived_comments_table).where(archived_comments_table.c.task_id == task_id))
+        await self.session.execute(delete(archived_task_tags_table).where(archived_task_tags_table.c.task_id == task_id))
+        await self.session.execute(delete(archived_tasks_table).where(archived_tasks_table.c.id == task_id))
+
+        change: Change = record_change(self.session, owner_id, ChangeEntity.task, task_id)
+        await self.session.commit()
+        after_commit(self.session, owner_id, change)
+
+        return True
+
+
+class TagCountRepository(BaseRepository):
+    async def get_drifted(self, after: str, batch_size: int) -> tuple[list[Row], str | None]:
+        stmt: Select = (
+            select(tags_table.c.id, tags_table.c.owner_id, tags_table.c.task_count, live_link_count)
+            .where(tags_table.c.id > after)
+            .order_by(tags_table.c.id)
+            .limit(batch_size)
+        )
+        rows: list[Row] = list(await self.session.execute(stmt))
+
+        if not rows:
+            return [], None
+
+        return [row for row in rows if row[2] != row[3]], rows[-1][0]
+
+    async def repair(self, tag_ids: list[str]) -> None:
+        # Recounted within the update, not from the drift check.
+        await self.session.execute(
+            update(tags_table)
+            .where(tags_table.c.id.in_(tag_ids))
+            .values(task_count=live_link_count, updated_at=tags_table.c.updated_at)
+        )
+        await self.session.commit()
+
+
+class PurgeRepository(BaseRepository):
+    async def get_deleted_task_ids(self, limit: int) -> list[str]:
+        stmt: Select = select(tasks_table.c.id).where(tasks_table.c.deleted_at.is_not(None)).limit(limit)
+
+        return list((await self.session.execute(stmt)).scalars())
+
+    async def get_deleted_user_id(self) -> str | None:
+        stmt: Select = select(users_table.c.id).where(users_table.c.deleted_at.is_not(None)).limit(1)
+
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
+    @staticmethod
+    def task_cascade(task_ids: list[str]) -> list[tuple[Table, ColumnElement[bool]]]:
+        return [
+            (comments_table, comments_table.c.task_id.in_(task_ids)),
+            (task_tags_table, task_tags_table.c.task_id.in_(task_ids)),
+            (tasks_table, tasks_table.c.id.in_(task_ids)),
+        ]
+
+    @staticmethod
+    def user_cascade(user_id: str) -> list[tuple[Table, ColumnElement[bool]]]:
+        owned_tasks: Select = select(tasks_table.c.id).where(tasks_table.c.owner_id == user_id)
+        owned_tags: Select = select(tags_table.c.id).where(tags_table.c.owner_id == user_id)
+        owned_archived_tasks: Select = select(archived_tasks_table.c.id).where(archived_tasks_table.c.owner_id == user_id)
+
+        return [
+            (comments_table, or_(comments_table.c.owner_id == user_id, comments_table.c.task_id.in_(owned_tasks))),
+            (task_tags_table, or_(task_tags_table.c.task_id.in_(owned_tasks), task_tags_table.c.tag_id.in_(owned_tags))),
+            (tasks_table, tasks_table.c.owner_id == user_id),
+            (
+                archived_comments_table,
+                or_(archived_comments_table.c.owner_id == user_id, archived_comments_table.c.task_id.in_(owned_archived_tasks)),
+            ),
+            (
+                archived_task_tags_table,
+                or_(
+                    archived_task_tags_table.c.task_id.in_(owned_archived_tasks),
+                    archived_task_tags_table.c.tag_id.in_(owned_tags),
+                ),
+            ),
+            (archived_tasks_table, archived_tasks_table.c.owner_id == user_id),
+            (tags_table, tags_table.c.owner_id == user_id),
+            (changes_table, changes_table.c.owner_id == user_id),
+            (sync_horizons_table, sync_horizons_table.c.owner_id == user_id),
+            (idempotency_keys_table, idempotency_keys_table.c.owner_id == user_id),
+            (import_checkpoints_table, import_checkpoints_table.c.owner_id == user_id),
+            (task_daily_stats_table, task_daily_stats_table.c.owner_id == user_id),
+            (users_table, users_table.c.id == user_id),
+        ]
+
+    async def delete_chunk(self, table: Table, condition: ColumnElement[bool], batch_size: int) -> int:
+        key: list = list(table.primary_key.columns)
+        chunk: Select = select(*key).where(condition).limit(batch_size)
+        target = key[0] if len(key) == 1 else tuple_(*key)
+
+        result = await self.session.execute(delete(table).where(target.in_(chunk)))
+        await self.session.commit()
+
+        return result.rowcount
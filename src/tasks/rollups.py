@@ -0,0 +1,63 @@
+"""Recount the recent days of the daily task stats behind ``GET /tasks/analytics``.
+
+Run from ``src``: ``python -m tasks.rollups --days 2``.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from cache import response_cache
+from config import settings
+from database import async_engine, async_session_maker
+from tasks import leases
+from tasks.analytics import utc_now
+from tasks.repository import DailyStatsRepository
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def catch_up(days: int, batch_size: int = settings.ROLLUP_BATCH_SIZE) -> int:
+    since: date = utc_now().date() - timedelta(days=days - 1)
+    include_archived: bool = days > settings.ARCHIVE_AFTER_DAYS
+
+    async with async_session_maker() as session:
+        repository: DailyStatsRepository = DailyStatsRepository(session)
+        owner_ids: list[str] = await repository.get_owners_to_recount(since, include_archived)
+
+        for start in range(0, len(owner_ids), batch_size):
+            batch: list[str] = owner_ids[start:start + batch_size]
+            await repository.recount(batch, since, include_archived)
+
+            for owner_id in batch:
+                response_cache.invalidate(owner_id)
+
+    return len(owner_ids)
+
+
+async def run_periodically(interval: int, days: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            if await leases.acquire('rollups', interval):
+                await catch_up(days)
+        except Exception:
+            logger.exception('rollup catch-up failed')
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=settings.ROLLUP_CATCH_UP_DAYS)
+    args = parser.parse_args()
+
+    days: int = max(args.days, 1)
+    owners: int = await catch_up(days)
+    await async_engine.dispose()
+
+    print(f'Recounted {days} days of stats for {owners} owners')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,12 +1,19 @@
+import json
 import typing
+from datetime import date
+from typing import Awaitable, Callable
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
 from database import get_async_session
 
-from tasks.schemas import TaskCreate, TaskRead, TaskUpdate, TaskQueryParams, TagCreate, TagRead, TagUpdate, CommentCreate, CommentRead, CommentUpdate
-from tasks.service import TaskService, TagService, CommentService
+from tasks.batch import BatchService, mount
+from tasks.schemas import TaskCreate, TaskRead, TaskUpdate, TaskQueryParams, TaggedTaskPage, AgendaDay, AgendaDayCount, AnalyticsBucket, Granularity, ExportFormat, ImportResult, TagCreate, TagRead, TagTitle, TagUpdate, TagQueryParams, CommentCreate, CommentRead, CommentUpdate, SyncPage, BatchRequest, BatchResult
+from tasks.service import TaskService, TagService, CommentService, TaskImportService, SyncService, IdempotencyService
 from users.utils import get_current_user, get_current_active_user
 
 if typing.TYPE_CHECKING:
@@ -16,33 +23,151 @@ if typing.TYPE_CHECKING:
 router: APIRouter = APIRouter()
 
 
+async def idempotent(
+    request: Request,
+    key: str,
+    user: 'User',
+    session: AsyncSession,
+    status_code: int,
+    write: Callable[[AsyncSession], Awaitable[typing.Any]],
+    response_model: type[BaseModel] | None = None,
+) -> Response:
+    fingerprint: bytes = IdempotencyService.fingerprint(request.method, request.url.path, request.url.query, await request.body())
+
+    async def call(session: AsyncSession) -> tuple[int, bytes]:
+        result = await write(session)
+
+        if response_model is None:
+            return status_code, json.dumps(result).encode()
+
+        return status_code, response_model.model_validate(result, from_attributes=True).model_dump_json().encode()
+
+    status_code, content, replayed = await IdempotencyService(session).run(user.id, key, fingerprint, call)
+    headers: dict[str, str] | None = {'Idempotent-Replayed': 'true'} if replayed else None
+
+    return Response(content=content, status_code=status_code, media_type='application/json', headers=headers)
+
+
 @router.post('/tasks', status_code=201, tags=['Tasks'])
 async def create_task(
+    request: Request,
     task_data: TaskCreate,
+    idempotency_key: str | None = Header(None, min_length=1, max_length=255),
     current_user: 'User' = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> TaskRead:
+    if idempotency_key is not None:
+        return await idempotent(
+            request, idempotency_key, current_user, session, 201,
+            lambda session: TaskService(session).create(task_data, owner_id=current_user.id), TaskRead,
+        )
+
     return await TaskService(session).create(task_data, owner_id=current_user.id)
 
 
-@router.get('/tasks/{task_id}', status_code=200, tags=['Tasks'])
+@router.get('/tasks/export', status_code=200, tags=['Tasks'])
+async def export_tasks(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias='format'),
+    compress: bool = False,
+    current_user: 'User' = Depends(get_current_user),
+) -> StreamingResponse:
+    media_type: str = 'text/csv' if export_format == ExportFormat.csv else 'application/x-ndjson'
+    filename: str = f'tasks.{export_format.value}'
+
+    if compress:
+        media_type, filename = 'application/gzip', f'{filename}.gz'
+
+    # The request session is closed before the body is sent.
+    return StreamingResponse(
+        TaskService.export(current_user.id, export_format, compress),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post(
+    '/tasks/import',
+    status_code=200,
+    tags=['Tasks'],
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {'application/x-ndjson': {'schema': {'type': 'string', 'format': 'binary'}}},
+        },
+    },
+)
+async def import_tasks(
+    request: Request,
+    import_id: str | None = None,
+    batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=10_000),
+    current_user: 'User' = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> ImportResult:
+    return await TaskImportService(session).run(request.stream(), current_user.id, import_id, batch_size)
+
+
+@router.get('/tasks/agenda', status_code=200, tags=['Tasks'], response_model=list[AgendaDay] | list[AgendaDayCount])
+async def get_agenda(
+    first: date = Query(alias='from'),
+    last: date = Query(alias='to'),
+    tz: str = 'UTC',
+    counts: bool = False,
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    content: bytes = await TaskService(session).get_agenda_json(current_user.id, first, last, tz, counts)
+
+    return Response(content=content, media_type='application/json')
+
+
+@router.get('/tasks/analytics', status_code=200, tags=['Tasks'], response_model=list[AnalyticsBucket])
+async def get_analytics(
+    first: date = Query(alias='from'),
+    last: date = Query(alias='to'),
+    granularity: Granularity = Granularity.day,
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    content: bytes = await TaskService(session).get_analytics_json(current_user.id, first, last, granularity)
+
+    return Response(content=content, media_type='application/json')
+
+
+@router.get('/tasks/tagged', status_code=200, tags=['Tasks'], response_model=TaggedTaskPage)
+async def get_tagged_tasks(
+    tag_id: list[str] = Query(min_length=1, max_length=settings.TAGGED_TASKS_MAX_TAGS),
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    content: bytes = await TaskService(session).get_tagged_json(tag_id, cursor, limit, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
+
+
+@router.get('/tasks/{task_id}', status_code=200, tags=['Tasks'], response_model=TaskRead)
 async def get_task_by_id(
     task_id: str,
     current_user: 'User' = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
-) -> TaskRead:
-    return await TaskService(session).get_by_id(task_id, owner_id=current_user.id)
+) -> Response:
+    content: bytes = await TaskService(session).get_by_id_json(task_id, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
 
 
-@router.get('/tasks', status_code=200, tags=['Tasks'])
+@router.get('/tasks', status_code=200, tags=['Tasks'], response_model=list[TaskRead])
 async def get_tasks(
     params: TaskQueryParams = Depends(),
     page: int = 1,
     limit: int = 10,
     current_user: 'User' = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
-) -> list[TaskRead]:
-    return await TaskService(session).get_all(page, limit, params, owner_id=current_user.id)
+) -> Response:
+    content: bytes = await TaskService(session).get_all_json(page, limit, params, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
 
 
 @router.patch('/tasks/{task_id}/update', status_code=200, tags=['Tasks'])
@@ -63,15 +188,33 @@ async def delete_task(
 ) -> dict:
     return await TaskService(session).delete(task_id, owner_id=current_user.id)
 
+
+@router.post('/tasks/{task_id}/restore', status_code=200, tags=['Tasks'])
+async def restore_task(
+    task_id: str,
+    current_user: 'User' = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> TaskRead:
+    return await TaskService(session).restore(task_id, owner_id=current_user.id)
+
   
 @router.post('/tasks/{task_id}/tags', status_code=200, tags=['Tasks'])
 async def add_tag(
+    request: Request,
     task_id: str,
-    tag_id: str,
+    tag_id: str | None = None,
+    title: TagTitle | None = None,
+    idempotency_key: str | None = Header(None, min_length=1, max_length=255),
     current_user: 'User' = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> dict:
-    return await TaskService(session).add_tag(task_id, tag_id, owner_id=current_user.id)
+    if idempotency_key is not None:
+        return await idempotent(
+            request, idempotency_key, current_user, session, 200,
+            lambda session: TaskService(session).add_tag(task_id, tag_id, owner_id=current_user.id, title=title),
+        )
+
+    return await TaskService(session).add_tag(task_id, tag_id, owner_id=current_user.id, title=title)
 
 
 @router.delete('/tasks/{task_id}/tags', status_code=200, tags=['Tasks'])
@@ -84,13 +227,31 @@ async def remove_tag(
     return await TaskService(session).remove_tag(task_id, tag_id, owner_id=current_user.id)
 
 
-@router.post('/tags', status_code=201, tags=['Tags'])
+@router.post('/tags', status_code=201, tags=['Tags'], responses={200: {'model': TagRead, 'description': 'The tag already existed.'}})
 async def create_tag(
+    response: Response,
     tag_data: TagCreate,
     current_user: 'User' = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> TagRead:
-    return await TagService(session).create(tag_data, owner_id=current_user.id)
+    tag, created = await TagService(session).create(tag_data, owner_id=current_user.id)
+
+    if not created:
+        response.status_code = 200
+
+    return tag
+
+
+@router.get('/tags/suggest', status_code=200, tags=['Tags'], response_model=list[TagRead])
+async def suggest_tags(
+    prefix: str = Query(min_length=1, max_length=10),
+    limit: int = Query(settings.TAG_SUGGEST_LIMIT, ge=1, le=50),
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    content: bytes = await TagService(session).suggest_json(prefix, limit, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
 
 
 @router.get('/tags/{tag_id}', status_code=200, tags=['Tags'])
@@ -102,14 +263,30 @@ async def get_tag_by_id(
     return await TagService(session).get_by_id(tag_id, owner_id=current_user.id)
 
 
-@router.get('/tags', status_code=200, tags=['Tags'])
+@router.get('/tags/{tag_id}/tasks', status_code=200, tags=['Tags'], response_model=TaggedTaskPage)
+async def get_tag_tasks(
+    tag_id: str,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    content: bytes = await TaskService(session).get_tagged_json([tag_id], cursor, limit, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
+
+
+@router.get('/tags', status_code=200, tags=['Tags'], response_model=list[TagRead])
 async def get_tags(
+    params: TagQueryParams = Depends(),
     page: int = 1,
     limit: int = 5,
     current_user: 'User' = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
-) -> list[TagRead]:
-    return await TagService(session).get_all(page, limit, owner_id=current_user.id)
+) -> Response:
+    content: bytes = await TagService(session).get_all_json(page, limit, params, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
 
 
 @router.patch('/tags/{tag_id}/update', status_code=200, tags=['Tags'])
@@ -133,11 +310,19 @@ async def delete_tag(
 
 @router.post('/comments', status_code=201, tags=['Comments'])
 async def create_comment(
+    request: Request,
     task_id: str,
     comment_data: CommentCreate,
+    idempotency_key: str | None = Header(None, min_length=1, max_length=255),
     current_user: 'User' = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> CommentRead:
+    if idempotency_key is not None:
+        return await idempotent(
+            request, idempotency_key, current_user, session, 201,
+            lambda session: CommentService(session).create(task_id, comment_data, owner_id=current_user.id), CommentRead,
+        )
+
     return await CommentService(session).create(task_id, comment_data, owner_id=current_user.id)
 
 
@@ -150,14 +335,16 @@ async def get_comment_by_id(
     return await CommentService(session).get_by_id(comment_id, owner_id=current_user.id)
 
 
-@router.get('/comments', status_code=200, tags=['Comments'])
+@router.get('/comments', status_code=200, tags=['Comments'], response_model=list[CommentRead])
 async def get_comments(
     page: int = 1,
     limit: int = 10,
     current_user: 'User' = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
-) -> list[CommentRead]:
-    return await CommentService(session).get_all(page, limit, owner_id=current_user.id)
+) -> Response:
+    content: bytes = await CommentService(session).get_all_json(page, limit, owner_id=current_user.id)
+
+    return Response(content=content, media_type='application/json')
 
 
 @router.patch('/comments/{comment_id}/update', status_code=200, tags=['Comments'])
@@ -177,3 +364,48 @@ async def delete_comment(
     session: AsyncSession = Depends(get_async_session)
 ) -> dict:
     return await CommentService(session).delete(comment_id, owner_id=current_user.id)
+
+
+@router.get('/sync', status_code=200, tags=['Sync'], response_model=SyncPage)
+async def sync(
+    since: int = Query(0, ge=0),
+    cursor: str | None = None,
+    limit: int = Query(settings.SYNC_BATCH_SIZE, ge=1, le=5_000),
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    content: bytes = await SyncService(session).get_changes_json(current_user.id, since, limit, cursor)
+
+    return Response(content=content, media_type='application/json')
+
+
+@router.get('/sync/stream', status_code=200, tags=['Sync'], response_class=StreamingResponse)
+async def stream_changes(
+    since: int | None = Query(None, ge=0),
+    last_event_id: int | None = Header(None, ge=0),
+    current_user: 'User' = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> StreamingResponse:
+    # Sent by EventSource on reconnect.
+    position: int | None = last_event_id if last_event_id is not None else since
+
+    if position is not None:
+        await SyncService(session).check_position(current_user.id, position)
+
+    return StreamingResponse(
+        SyncService.stream(current_user.id, position),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.post('/batch', status_code=200, tags=['Batch'])
+async def run_batch(
+    batch: BatchRequest,
+    current_user: 'User' = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> BatchResult:
+    return await BatchService(session).run(batch.operations, current_user.id, batch.atomic)
+
+
+mount(router.routes)
@@ -1,90 +1,54 @@
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime, timezone
+from typing import Annotated, Any, Literal
 
-from fastapi import HTTPException, status
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints
 
-from tasks.models import Priority, TaskStatus
+from config import settings
+from tasks.models import ChangeEntity, ChangeOperation, Priority, TaskStatus
 from users.schemas import UserRead
+from validation import ErrorMessages, length_between
+
+
+def validate_due_date(value: datetime) -> datetime:
+    # Stored as naive UTC; a naive value is in the server's local time, as it always was.
+    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    if value <= datetime.now(timezone.utc).replace(tzinfo=None):
+        raise ValueError('Due date cannot be less than or equal to current date.')
+
+    return value
+
+
+TaskTitle = Annotated[str, length_between('Title', 3, 30)]
+TaskDescription = Annotated[str, length_between('Description', 0, 200)]
+DueDate = Annotated[datetime, AfterValidator(validate_due_date)]
 
 
 class TaskBase(BaseModel):
-    title: str | None = None
-    description: str | None = None
-   
-    priority: 'Priority' = Priority.low
-    due_date: datetime | None = None
-
-    @field_validator('title', mode='before')
-    @classmethod
-    def validate_title(cls, value: str) -> str:
-        if value is None:
-            return value
-
-        return cls.validate_length(value, 'Title', 3, 30)
-
-    @field_validator('description', mode='before')
-    @classmethod
-    def validate_description(cls, value: str) -> str:
-        if value is None:
-            return value
-
-        return cls.validate_length(value, 'Description', 0, 200)
-    
-    @field_validator('priority', mode='before')
-    @classmethod
-    def validate_priority(cls, value: str) -> str:
-        if value not in Priority.__members__.values():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'Unknown value \'{value}\' for priority.',
-            )
-        
-        return value
-    
-    @field_validator('due_date', mode='before')
-    @classmethod
-    def validate_datetime(cls, value: datetime | None):
-        if value is None:
-            return value
-        
-        try:
-            return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Mismatching datetime format. It should be YYYY-MM-DDTHH:MM:SS.'
-            )
-
-    @field_validator('due_date', mode='after')
-    @classmethod
-    def validate_due_date(cls, value: datetime | None) -> datetime | None:
-        if value is None:
-            return value
-
-        if value <= datetime.now():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Due date cannot be less than or equal to current date.',
-            )
-        
-        return value
-
-    @staticmethod
-    def validate_length(value: str, field_name: str, min_length: int, max_length: int) -> str:
-        if len(value.strip()) < min_length or len(value.strip()) > max_length:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'{field_name} length must be between {min_length} and {max_length} characters.',
-            )
-
-        return value
+    title: Annotated[
+        TaskTitle | None,
+        ErrorMessages('Title length must be between 3 and 30 characters.'),
+    ] = None
+    description: Annotated[
+        TaskDescription | None,
+        ErrorMessages('Description length must be between 0 and 200 characters.'),
+    ] = None
+
+    priority: Annotated[
+        Priority,
+        ErrorMessages('Unknown value \'{input}\' for priority.'),
+    ] = Priority.low
+    due_date: Annotated[
+        DueDate | None,
+        ErrorMessages('Mismatching datetime format. It should be YYYY-MM-DDTHH:MM:SS.'),
+    ] = None
 
 
 class TaskRead(BaseModel):
     id: str
     title: str
-    description: str
+    description: str | None
     status: TaskStatus
     priority: Priority
     related_tags: list['TagRead'] = []
@@ -104,18 +68,7 @@ class TaskCreate(TaskBase): ...
 
 
 class TaskUpdate(TaskBase):
-    status: TaskStatus = TaskStatus.ongoing
-
-    @field_validator('status', mode='before')
-    @classmethod
-    def validate_status(cls, value: str) -> str:
-        if value not in TaskStatus.__members__.values():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'Unknown value for status.',
-            )
-        
-        return value
+    status: Annotated[TaskStatus, ErrorMessages('Unknown value for status.')] = TaskStatus.ongoing
 
 
 class SortBy(Enum):
@@ -129,36 +82,69 @@ class Order(Enum):
     desc: str = 'desc'
 
 
+class TagSortBy(Enum):
+    created_at: str = 'created_at'
+    title: str = 'title'
+    task_count: str = 'task_count'
+
+
+class Granularity(Enum):
+    day: str = 'day'
+    week: str = 'week'
+    month: str = 'month'
+
+
+class ExportFormat(Enum):
+    ndjson: str = 'ndjson'
+    csv: str = 'csv'
+
+
 class TaskQueryParams(BaseModel):
     sort_by: SortBy = SortBy.priority
     order: Order = Order.desc
+    include_archived: bool = False
 
 
-class TagBase(BaseModel):
-    title: str
+class AnalyticsBucket(BaseModel):
+    start: date
+    created: int
+    completed: int
+    average_completion_seconds: float | None
+    completion_seconds_p50: float | None
+    completion_seconds_p90: float | None
+    overdue_rate: dict[Priority, float | None]
 
-    @field_validator('title')
-    @classmethod
-    def validate_title(cls, value: str) -> str:
-        if value is None:
-            return value
-        
-        return cls.validate_length(value, 'Title', 2, 10)
-
-    @staticmethod
-    def validate_length(value: str, field_name: str, min_length: int, max_length: int) -> str:
-        if not (min_length <= len(value.strip()) <= max_length):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'{field_name} length must be between {min_length} and {max_length} characters.',
-            )
-        
-        return value
+
+class TagQueryParams(BaseModel):
+    sort_by: TagSortBy = TagSortBy.created_at
+    order: Order = Order.asc
+
+
+class TaggedTaskPage(BaseModel):
+    tasks: list[TaskRead]
+    next_cursor: str | None
+
+
+class AgendaDayCount(BaseModel):
+    date: date
+    count: int
+
+
+class AgendaDay(AgendaDayCount):
+    tasks: list[TaskRead]
+
+
+TagTitle = Annotated[str, length_between('Title', 2, 10)]
+
+
+class TagBase(BaseModel):
+    title: Annotated[TagTitle, ErrorMessages('Title length must be between 2 and 10 characters.')]
 
 
 class TagRead(BaseModel):
     id: str
     title: str
+    task_count: int
     created_at: datetime
     updated_at: datetime
 
@@ -168,24 +154,12 @@ class TagCreate(TagBase): ...
 
 class TagUpdate(TagBase): ...
 
-  
-class CommentBase(BaseModel):
-    comment: str
 
-    @field_validator('comment')
-    @classmethod
-    def validate_comment(cls, value: str) -> str:
-        return cls.validate_length(value.strip(), 'Comment', 1, 300)
+CommentText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=300)]
 
-    @staticmethod
-    def validate_length(value: str, field_name: str, min_length: int, max_length: int) -> str:
-        if not (min_length <= len(value) <= max_length):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'{field_name} length must be between {min_length} and {max_length} characters.',
-            )
 
-        return value
+class CommentBase(BaseModel):
+    comment: Annotated[CommentText, ErrorMessages('Comment length must be between 1 and 300 characters.')]
 
 
 class CommentRead(BaseModel):
@@ -200,3 +174,76 @@ class CommentCreate(CommentBase): ...
 
 
 class CommentUpdate(CommentBase): ...
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    import_id: str
+    is_completed: bool
+    resumed_from_line: int
+    rows_imported: int
+    rows_failed: int
+    seconds: float
+    rows_per_second: float
+    errors: list[ImportRowError] = []
+
+
+class SyncTaskRead(BaseModel):
+    id: str
+    title: str
+    description: str | None
+    status: TaskStatus
+    priority: Priority
+    created_at: datetime
+    updated_at: datetime
+    due_date: datetime | None
+    tag_ids: list[str]
+
+
+class SyncCommentRead(BaseModel):
+    id: str
+    task_id: str
+    comment: str
+    created_at: datetime
+    updated_at: datetime | None
+
+
+class ChangeRead(BaseModel):
+    seq: int
+    entity: ChangeEntity
+    id: str
+    operation: ChangeOperation
+    data: SyncTaskRead | TagRead | SyncCommentRead | None = None
+
+
+class SyncPage(BaseModel):
+    changes: list[ChangeRead]
+    next_since: int
+    next_cursor: str | None
+    has_more: bool
+
+
+class BatchOperation(BaseModel):
+    method: Literal['GET', 'POST', 'PATCH', 'DELETE']
+    path: str
+    query: dict[str, str | int | bool | list[str]] = {}
+    body: dict[str, Any] | None = None
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1, max_length=settings.BATCH_MAX_OPERATIONS)
+    atomic: bool = False
+
+
+class BatchOperationResult(BaseModel):
+    status: int
+    body: Any = None
+
+
+class BatchResult(BaseModel):
+    results: list[BatchOperationResult]
+    committed: bool
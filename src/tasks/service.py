@@ -1,12 +1,59 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from fastapi import HTTPException, status
-from sqlalchemy import asc, desc, case
+from pydantic import ValidationError
+from sqlalchemy import Row, asc, desc, case
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from cache import ResponseCache, response_cache
+from config import settings
+from database import async_engine, async_session_maker, next_page
+from pubsub import Subscription
 from service import BaseService
+from singleflight import SingleFlight
+from validation import validate
+
+from .analytics import bucket_start, summarize, utc_now
+from .events import change_event, change_hub, publish
+from .export import encode_csv, encode_ndjson, gzip_chunks
+from .models import Comment, Task, Tag, ImportCheckpoint, ChangeEntity, ChangeOperation, normalize_tag_title
+from .records import (
+    AgendaCountRecord, AgendaDayRecord, AnalyticsBucketRecord, ChangeRecord, SyncPageRecord, TaggedTaskPageRecord,
+    task_list_adapter, tag_list_adapter, comment_list_adapter, agenda_count_list_adapter, agenda_day_list_adapter,
+    analytics_bucket_list_adapter, sync_page_adapter, tagged_task_page_adapter,
+)
+from .repository import (
+    TaskRepository, TagRepository, CommentRepository, ArchiveRepository, ImportCheckpointRepository, ChangeRepository,
+    IdempotencyKeyRepository, DailyStatsRepository, after_commit, joined_session,
+)
+from .schemas import (
+    TaskCreate, TaskRead, TaskUpdate, SortBy, Order, ExportFormat, TaskQueryParams, TagCreate, TagUpdate, TagSortBy,
+    TagQueryParams, CommentCreate, CommentUpdate, ImportResult, ImportRowError, Granularity,
+)
+
+
+reads: SingleFlight = SingleFlight('task_reads', leader_bound=True)
+idempotent_writes: SingleFlight = SingleFlight('idempotent_writes', cancel_abandoned=False)
+
+
+async def coalesce(owner_id: str, route: str, params: dict, load: Callable[[], Awaitable[bytes]]) -> bytes:
+    # Keyed on the version so a read never joins one from before a write. The load runs on the leading
+    # caller's session, so it is cancelled when that caller leaves and the others load again.
+    version: int | None = await response_cache.version(owner_id)
+
+    if version is None:
+        return await load()
 
-from .models import Comment, Task, Tag
-from .repository import TaskRepository, TagRepository, CommentRepository
-from .schemas import TaskCreate, TaskUpdate, SortBy, Order, TaskQueryParams, TagCreate, TagUpdate, CommentCreate, CommentUpdate
+    return await reads.do((owner_id, version, route, ResponseCache.normalize(params)), load)
 
 
 class TaskService(BaseService):
@@ -26,8 +73,177 @@ class TaskService(BaseService):
             )
         
         return await self.repository.get_by_id(task_id, owner_id)
+
+    async def get_by_id_json(self, task_id: str, owner_id: str) -> bytes:
+        async def load() -> bytes:
+            task: Task = await self.get_by_id(task_id, owner_id)
+
+            return TaskRead.model_validate(task, from_attributes=True).model_dump_json().encode()
+
+        return await coalesce(owner_id, 'task', {'id': task_id}, load)
     
-    async def get_all(self, page: int, limit: int, params: TaskQueryParams, owner_id: str) -> list[Task]:
+    async def get_all_json(self, page: int, limit: int, params: TaskQueryParams, owner_id: str) -> bytes:
+        async def load() -> bytes:
+            sort_by, order_direction = self.get_ordering(params)
+            tasks = await self.repository.get_all_records(
+                page, limit, sort_by, order_direction, owner_id, params.include_archived,
+            )
+
+            return task_list_adapter.dump_json(tasks)
+
+        query: dict = {
+            'page': page,
+            'limit': limit,
+            'sort_by': params.sort_by,
+            'order': params.order,
+            'include_archived': params.include_archived,
+        }
+
+        return await response_cache.get_or_load(owner_id, 'tasks', query, lambda: coalesce(owner_id, 'tasks', query, load))
+
+    async def get_agenda(
+        self, owner_id: str, first: date, last: date, tz: str, counts_only: bool,
+    ) -> list[AgendaCountRecord] | list[AgendaDayRecord]:
+        try:
+            zone: ZoneInfo = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown time zone '{tz}'.",
+            )
+
+        if not 0 <= (last - first).days < settings.AGENDA_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'The range must end on or after its start and span at most {settings.AGENDA_MAX_DAYS} days.',
+            )
+
+        due_from, due_to = (
+            datetime.combine(day, datetime.min.time(), zone).astimezone(timezone.utc).replace(tzinfo=None)
+            for day in (first, last + timedelta(days=1))
+        )
+
+        def local_day(due_date: datetime) -> date:
+            return due_date.replace(tzinfo=timezone.utc).astimezone(zone).date()
+
+        if counts_only:
+            due_dates: list[datetime] = await self.repository.get_due_dates(owner_id, due_from, due_to)
+
+            return [AgendaCountRecord(day, count) for day, count in Counter(map(local_day, due_dates)).items()]
+
+        days: dict[date, AgendaDayRecord] = {}
+        for task in await self.repository.get_agenda_records(owner_id, due_from, due_to):
+            due_day: date = local_day(task.due_date)
+
+            if due_day not in days:
+                days[due_day] = AgendaDayRecord(due_day, 0, [])
+
+            days[due_day].count += 1
+            days[due_day].tasks.append(task)
+
+        return list(days.values())
+
+    async def get_agenda_json(self, owner_id: str, first: date, last: date, tz: str, counts_only: bool) -> bytes:
+        async def load() -> bytes:
+            agenda = await self.get_agenda(owner_id, first, last, tz, counts_only)
+
+            if counts_only:
+                return agenda_count_list_adapter.dump_json(agenda)
+
+            return agenda_day_list_adapter.dump_json(agenda)
+
+        query: dict = {'from': first.isoformat(), 'to': last.isoformat(), 'tz': tz, 'counts': counts_only}
+
+        return await response_cache.get_or_load(owner_id, 'agenda', query, lambda: coalesce(owner_id, 'agenda', query, load))
+
+    async def get_analytics(self, owner_id: str, first: date, last: date, granularity: Granularity) -> list[AnalyticsBucketRecord]:
+        if not 0 <= (last - first).days < settings.ANALYTICS_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'The range must end on or after its start and span at most {settings.ANALYTICS_MAX_DAYS} days.',
+            )
+
+        rows: dict[date, Row] = {
+            row.start: row for row in await DailyStatsRepository(self.session).get_buckets(owner_id, first, last, granularity)
+        }
+        starts: dict[date, None] = dict.fromkeys(
+            bucket_start(first + timedelta(days=offset), granularity) for offset in range((last - first).days + 1)
+        )
+
+        return [summarize(start, rows.get(start)) for start in starts]
+
+    async def get_analytics_json(self, owner_id: str, first: date, last: date, granularity: Granularity) -> bytes:
+        async def load() -> bytes:
+            return analytics_bucket_list_adapter.dump_json(await self.get_analytics(owner_id, first, last, granularity))
+
+        query: dict = {'from': first.isoformat(), 'to': last.isoformat(), 'granularity': granularity.value}
+
+        return await response_cache.get_or_load(owner_id, 'analytics', query, lambda: coalesce(owner_id, 'analytics', query, load))
+
+    async def get_tagged(self, tag_ids: list[str], cursor: str | None, limit: int, owner_id: str) -> TaggedTaskPageRecord:
+        tag_ids = list(dict.fromkeys(tag_ids))
+        counts: dict[str, int] = await self.tag_repository.get_task_counts(tag_ids, owner_id)
+
+        if len(counts) < len(tag_ids):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='Tag is not found.'
+            )
+
+        tag_ids.sort(key=counts.__getitem__)
+
+        if not counts[tag_ids[0]]:
+            return TaggedTaskPageRecord([], None)
+
+        tasks, has_more = await self.repository.get_tagged_records(tag_ids, cursor, limit, owner_id)
+
+        return TaggedTaskPageRecord(tasks, tasks[-1].id if has_more else None)
+
+    async def get_tagged_json(self, tag_ids: list[str], cursor: str | None, limit: int, owner_id: str) -> bytes:
+        async def load() -> bytes:
+            page: TaggedTaskPageRecord = await self.get_tagged(tag_ids, cursor, limit, owner_id)
+
+            return tagged_task_page_adapter.dump_json(page)
+
+        query: dict = {'tag_ids': sorted(set(tag_ids)), 'cursor': cursor, 'limit': limit}
+
+        return await response_cache.get_or_load(
+            owner_id, 'tagged_tasks', query, lambda: coalesce(owner_id, 'tagged_tasks', query, load),
+        )
+
+    @staticmethod
+    async def export_rows(owner_id: str, batch_size: int) -> AsyncIterator[Row]:
+        for archived in (False, True):
+            after: str = ''
+
+            while True:
+                next_page()
+
+                async with async_session_maker() as session:
+                    rows: list[Row] = await TaskRepository(session).get_export_page(owner_id, archived, after, batch_size)
+
+                for row in rows:
+                    yield row
+
+                if len(rows) < batch_size:
+                    break
+
+                after = rows[-1].id
+
+    @staticmethod
+    def export(owner_id: str, export_format: ExportFormat, compress: bool) -> AsyncIterator[bytes]:
+        batch_size: int = settings.EXPORT_BATCH_SIZE
+        rows = TaskService.export_rows(owner_id, batch_size)
+
+        if export_format == ExportFormat.csv:
+            chunks = encode_csv(rows, batch_size)
+        else:
+            chunks = encode_ndjson(rows, batch_size)
+
+        return gzip_chunks(chunks) if compress else chunks
+
+    @staticmethod
+    def get_ordering(params: TaskQueryParams) -> tuple:
         sort_by_mapping: dict = {
             SortBy.priority: case(
                 (Task.priority == 'low', 1),
@@ -42,10 +258,7 @@ class TaskService(BaseService):
             Order.desc: desc,
         }
 
-        sort_by = sort_by_mapping[params.sort_by]
-        order_direction = order_mapping[params.order]
-
-        return await self.repository.get_all(page, limit, sort_by, order_direction, owner_id)
+        return sort_by_mapping[params.sort_by], order_mapping[params.order]
     
     async def update(self, task_id: str, task_data: TaskUpdate, owner_id: str) -> Task:
         if not await self.repository.task_exists_by_id(task_id, owner_id):
@@ -59,27 +272,41 @@ class TaskService(BaseService):
         return await self.repository.update(task, task_data)
     
     async def delete(self, task_id: str, owner_id: str) -> dict[str, str]:
-        if not await self.repository.task_exists_by_id(task_id, owner_id):
+        if not await self.repository.delete(task_id, owner_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail='Task is not found.'
             )
-        
-        task: Task = await self.repository.get_by_id(task_id, owner_id)
-        await self.repository.delete(task)
 
         return {
             'detail': 'Task is successful deleted.'
         }
+
+    async def restore(self, task_id: str, owner_id: str) -> Task:
+        if not await ArchiveRepository(self.session).restore(task_id, owner_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='Task is not found in the archive.'
+            )
+
+        return await self.repository.get_by_id(task_id, owner_id)
     
-    async def add_tag(self, task_id: str, tag_id: str, owner_id: str) -> dict[str, str]:
+    async def add_tag(self, task_id: str, tag_id: str | None, owner_id: str, title: str | None = None) -> dict[str, str]:
+        if (tag_id is None) == (title is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Pass either tag_id or title.'
+            )
+
         if not await self.repository.task_exists_by_id(task_id, owner_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail='Task is not found.'
             )
-        
-        if not await self.tag_repository.tag_exists_by_id(tag_id, owner_id):
+
+        if title is not None:
+            tag_id = (await self.tag_repository.get_or_create(TagCreate(title=title), owner_id))[0].id
+        elif not await self.tag_repository.tag_exists_by_id(tag_id, owner_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail='Tag is not found.'
@@ -134,8 +361,8 @@ class TagService(BaseService):
         super().__init__(session)
         self.repository = TagRepository(session)
 
-    async def create(self, tag_data: TagCreate, owner_id: str) -> Tag:
-        return await self.repository.create(tag_data, owner_id)
+    async def create(self, tag_data: TagCreate, owner_id: str) -> tuple[Tag, bool]:
+        return await self.repository.get_or_create(tag_data, owner_id)
     
     async def get_by_id(self, tag_id: str, owner_id: str) -> Tag:
         if not await self.repository.tag_exists_by_id(tag_id, owner_id):
@@ -146,8 +373,42 @@ class TagService(BaseService):
 
         return await self.repository.get_by_id(tag_id, owner_id)
 
-    async def get_all(self, page: int, limit: int, owner_id: str) -> list[Tag]:
-        return await self.repository.get_all(page, limit, owner_id)
+    async def get_all_json(self, page: int, limit: int, params: TagQueryParams, owner_id: str) -> bytes:
+        async def load() -> bytes:
+            sort_by, order_direction = self.get_ordering(params)
+            tags = await self.repository.get_all_records(page, limit, sort_by, order_direction, owner_id)
+
+            return tag_list_adapter.dump_json(tags)
+
+        query: dict = {'page': page, 'limit': limit, 'sort_by': params.sort_by, 'order': params.order}
+
+        return await response_cache.get_or_load(owner_id, 'tags', query, load)
+
+    @staticmethod
+    def get_ordering(params: TagQueryParams) -> tuple:
+        sort_by_mapping: dict = {
+            TagSortBy.created_at: Tag.created_at,
+            TagSortBy.title: Tag.normalized_title,
+            TagSortBy.task_count: Tag.task_count,
+        }
+        order_mapping: dict = {
+            Order.asc: asc,
+            Order.desc: desc,
+        }
+
+        return sort_by_mapping[params.sort_by], order_mapping[params.order]
+
+    async def suggest_json(self, prefix: str, limit: int, owner_id: str) -> bytes:
+        async def load() -> bytes:
+            tags = await self.repository.suggest(prefix, limit, owner_id)
+
+            return tag_list_adapter.dump_json(tags)
+
+        query: dict = {'prefix': normalize_tag_title(prefix), 'limit': limit}
+
+        return await response_cache.get_or_load(
+            owner_id, 'tag_suggestions', query, lambda: coalesce(owner_id, 'tag_suggestions', query, load),
+        )
 
     async def update(self, tag_id: str, tag_data: TagUpdate, owner_id: str) -> Tag:
         if not await self.repository.tag_exists_by_id(tag_id, owner_id):
@@ -156,9 +417,22 @@ class TagService(BaseService):
                 detail='Tag is not found.',
             )
         
+        title_taken: HTTPException = HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='A tag with this title already exists.'
+        )
+
+        if tag_data.title is not None and await self.repository.tag_exists_by_title(tag_data.title, owner_id, tag_id):
+            raise title_taken
+
         tag: Tag = await self.repository.get_by_id(tag_id, owner_id)
 
-        return await self.repository.update(tag, tag_data)
+        # A concurrent write can still take the title before the commit.
+        try:
+            return await self.repository.update(tag, tag_data)
+        except IntegrityError:
+            await self.session.rollback()
+            raise title_taken
 
     async def delete(self, tag_id: str, owner_id: str) -> dict[str, str]:
         if not await self.repository.tag_exists_by_id(tag_id, owner_id):
@@ -199,8 +473,13 @@ class CommentService(BaseService):
         
         return await self.repository.get_by_id(comment_id, owner_id)
 
-    async def get_all(self, page: int, limit: int, owner_id: str) -> list[Comment]:
-        return await self.repository.get_all(page, limit, owner_id)
+    async def get_all_json(self, page: int, limit: int, owner_id: str) -> bytes:
+        async def load() -> bytes:
+            comments = await self.repository.get_all_records(page, limit, owner_id)
+
+            return comment_list_adapter.dump_json(comments)
+
+        return await response_cache.get_or_load(owner_id, 'comments', {'page': page, 'limit': limit}, load)
 
     async def update(self, comment_id: str, comment_data: CommentUpdate, owner_id: str) -> Comment:
         if not await self.repository.comment_exists_by_id(comment_id, owner_id):
@@ -226,3 +505,448 @@ class CommentService(BaseService):
         return {
             'detail': 'Comment is successful deleted.'
         }
+
+
+class TaskImportService(BaseService):
+    MAX_REPORTED_ERRORS: int = 100
+
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
+        self.repository = TaskRepository(session)
+        self.tag_repository = TagRepository(session)
+        self.checkpoint_repository = ImportCheckpointRepository(session)
+
+    async def run(self, chunks: AsyncIterator[bytes], owner_id: str, import_id: str | None, batch_size: int) -> ImportResult:
+        checkpoint: ImportCheckpoint = await self.get_checkpoint(import_id or str(uuid.uuid4()), owner_id)
+        resumed_from_line: int = checkpoint.line
+        started_at: float = time.perf_counter()
+
+        rows_imported: int = 0
+        rows_failed: int = 0
+        errors: list[ImportRowError] = []
+
+        if not checkpoint.is_completed:
+            tag_ids: dict[str, str] = await self.tag_repository.get_title_map(owner_id)
+            batch: dict[str, list[dict]] = self.new_batch()
+            line_number: int = 0
+
+            first_line: int = checkpoint.line + 1
+
+            def fail(line: int, detail: str) -> None:
+                if len(errors) < self.MAX_REPORTED_ERRORS:
+                    errors.append(ImportRowError(line=line, detail=detail))
+
+            async for line in self.iter_lines(chunks, settings.IMPORT_MAX_LINE_BYTES):
+                line_number += 1
+
+                if line_number <= checkpoint.line:
+                    continue
+
+                if line is None:
+                    rows_failed += 1
+                    fail(line_number, f'Line is longer than {settings.IMPORT_MAX_LINE_BYTES} bytes.')
+                    continue
+
+                if not line.strip():
+                    continue
+
+                try:
+                    self.add_row(line, owner_id, tag_ids, batch)
+                except (ValueError, ValidationError, HTTPException) as e:
+                    rows_failed += 1
+                    fail(line_number, self.error_detail(e))
+                    continue
+
+                if len(batch['tasks']) >= batch_size:
+                    rows_written, rows_lost = await self.flush(checkpoint, batch, tag_ids, line_number)
+                    rows_imported += rows_written
+                    rows_failed += rows_lost
+
+                    if rows_lost:
+                        fail(line_number, f'Lines {first_line}-{line_number} could not be written.')
+
+                    first_line = line_number + 1
+
+            rows_written, rows_lost = await self.flush(checkpoint, batch, tag_ids, line_number, is_completed=True)
+            rows_imported += rows_written
+            rows_failed += rows_lost
+
+            if rows_lost:
+                fail(line_number, f'Lines {first_line}-{line_number} could not be written.')
+
+        seconds: float = time.perf_counter() - started_at
+
+        return ImportResult(
+            import_id=checkpoint.id,
+            is_completed=checkpoint.is_completed,
+            resumed_from_line=resumed_from_line,
+            rows_imported=rows_imported,
+            rows_failed=rows_failed,
+            seconds=round(seconds, 3),
+            rows_per_second=round(rows_imported / seconds, 1) if seconds else 0.0,
+            errors=errors,
+        )
+
+    async def get_checkpoint(self, import_id: str, owner_id: str) -> ImportCheckpoint:
+        checkpoint: ImportCheckpoint | None = await self.checkpoint_repository.get_by_id(import_id)
+
+        if checkpoint is None:
+            return await self.checkpoint_repository.create(import_id, owner_id)
+
+        if checkpoint.owner_id != owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail='Import id is already in use.',
+            )
+
+        return checkpoint
+
+    async def flush(
+        self, checkpoint: ImportCheckpoint, batch: dict[str, list[dict]], tag_ids: dict[str, str], line_number: int,
+        is_completed: bool = False,
+    ) -> tuple[int, int]:
+        rows: int = len(batch['tasks'])
+        changes: list[Row] = []
+
+        try:
+            changes = await self.tag_repository.bulk_insert(batch['tags'])
+            changes += await self.repository.bulk_insert(batch['tasks'], batch['task_tags'], batch['comments'])
+        except SQLAlchemyError:
+            await self.session.rollback()
+            await self.session.refresh(checkpoint)
+
+            # The batch's new tags were rolled back too.
+            for tag in batch['tags']:
+                tag_ids.pop(normalize_tag_title(tag['title']), None)
+
+            rows_written, rows_lost = 0, rows
+        else:
+            rows_written, rows_lost = rows, 0
+
+        await self.checkpoint_repository.advance(checkpoint, max(line_number, checkpoint.line), rows_written, is_completed)
+        publish(checkpoint.owner_id, changes)
+
+        for rows_list in batch.values():
+            rows_list.clear()
+
+        return rows_written, rows_lost
+
+    def add_row(self, line: bytes, owner_id: str, tag_ids: dict[str, str], batch: dict[str, list[dict]]) -> None:
+        row: dict = json.loads(line)
+
+        if not isinstance(row, dict):
+            raise ValueError('Row must be a JSON object.')
+
+        task_data: TaskCreate = validate(TaskCreate, row)
+
+        if task_data.title is None:
+            raise ValueError('Title is required.')
+
+        comments: list[CommentCreate] = [
+            validate(CommentCreate, {'comment': comment} if isinstance(comment, str) else comment)
+            for comment in row.get('comments') or []
+        ]
+        titles: dict[str, str] = {}
+        for title in row.get('tags') or []:
+            title = validate(TagCreate, {'title': title}).title
+            titles.setdefault(normalize_tag_title(title), title)
+
+        new_tags: list[dict] = [
+            {'id': str(uuid.uuid4()), 'title': title, 'owner_id': owner_id}
+            for normalized_title, title in titles.items() if normalized_title not in tag_ids
+        ]
+
+        task_id: str = str(uuid.uuid4())
+        batch['tasks'].append({
+            'id': task_id,
+            'title': task_data.title,
+            'description': task_data.description,
+            'priority': task_data.priority,
+            'due_date': task_data.due_date,
+            'owner_id': owner_id,
+        })
+
+        for tag in new_tags:
+            tag_ids[normalize_tag_title(tag['title'])] = tag['id']
+            batch['tags'].append(tag)
+
+        batch['task_tags'].extend({'task_id': task_id, 'tag_id': tag_ids[title]} for title in titles)
+        batch['comments'].extend(
+            {'id': str(uuid.uuid4()), 'comment': comment.comment, 'task_id': task_id, 'owner_id': owner_id}
+            for comment in comments
+        )
+
+    @staticmethod
+    def new_batch() -> dict[str, list[dict]]:
+        return {'tasks': [], 'tags': [], 'task_tags': [], 'comments': []}
+
+    @staticmethod
+    def error_detail(error: Exception) -> str:
+        if isinstance(error, HTTPException):
+            return str(error.detail)
+
+        if isinstance(error, ValidationError):
+            return '; '.join(f'{".".join(map(str, e["loc"]))}: {e["msg"]}' for e in error.errors())
+
+        return str(error)
+
+    @staticmethod
+    async def iter_lines(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes | None]:
+        pending: bytes = b''
+        skipping: bool = False
+
+        async for chunk in chunks:
+            pending += chunk
+            *lines, pending = pending.split(b'\n')
+
+            for line in lines:
+                yield None if skipping or len(line) > max_bytes else line
+                skipping = False
+
+            if len(pending) > max_bytes:
+                pending = b''
+                skipping = True
+
+        if skipping:
+            yield None
+        elif pending:
+            yield pending
+
+
+class SyncService(BaseService):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
+        self.repository = ChangeRepository(self.session)
+
+    async def check_position(self, owner_id: str, since: int) -> int:
+        horizon: int = await self.repository.get_horizon(owner_id)
+
+        # Tombstones up to the horizon were compacted away.
+        if 0 < since < horizon:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail='Sync position is too old; resync from scratch.',
+            )
+
+        return horizon
+
+    async def check_cursor(self, owner_id: str, cursor: str) -> tuple[int, int]:
+        # Only valid while the horizon it started under stands.
+        try:
+            since, started_under = map(int, cursor.split('.'))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid sync cursor.')
+
+        horizon: int = await self.repository.get_horizon(owner_id)
+
+        if horizon != started_under:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail='Sync position is too old; resync from scratch.',
+            )
+
+        return since, horizon
+
+    async def get_changes_json(self, owner_id: str, since: int, limit: int, cursor: str | None = None) -> bytes:
+        horizon: int
+
+        if cursor is not None:
+            since, horizon = await self.check_cursor(owner_id, cursor)
+        else:
+            horizon = await self.check_position(owner_id, since)
+
+        rows = await self.repository.get_since(owner_id, since, limit + 1)
+        has_more: bool = len(rows) > limit
+        rows = rows[:limit]
+
+        latest: dict[tuple[ChangeEntity, str], tuple] = {}
+        for seq, entity, entity_id, operation in rows:
+            latest.pop((entity, entity_id), None)
+            latest[entity, entity_id] = (seq, operation)
+
+        upserts: dict[ChangeEntity, list[str]] = {entity: [] for entity in ChangeEntity}
+        for (entity, entity_id), (_, operation) in latest.items():
+            if operation == ChangeOperation.upsert:
+                upserts[entity].append(entity_id)
+
+        data: dict[tuple[ChangeEntity, str], object] = {}
+        loaders: dict[ChangeEntity, Callable] = {
+            ChangeEntity.task: TaskRepository(self.session).get_sync_records,
+            ChangeEntity.tag: TagRepository(self.session).get_records_by_ids,
+            ChangeEntity.comment: CommentRepository(self.session).get_sync_records,
+        }
+        for entity, entity_ids in upserts.items():
+            if entity_ids:
+                for record in await loaders[entity](entity_ids, owner_id):
+                    data[entity, record.id] = record
+
+        changes: list[ChangeRecord] = []
+        for (entity, entity_id), (seq, operation) in latest.items():
+            record = data.get((entity, entity_id))
+
+            # Its tombstone follows in a later page.
+            if operation == ChangeOperation.upsert and record is None:
+                continue
+
+            changes.append(ChangeRecord(seq, entity, entity_id, operation, record))
+
+        next_since: int = rows[-1][0] if rows else since
+        next_cursor: str | None = None
+
+        if has_more and next_since < horizon:
+            next_cursor = f'{next_since}.{horizon}'
+        else:
+            next_since = max(next_since, horizon)
+
+        return sync_page_adapter.dump_json(SyncPageRecord(changes, next_since, next_cursor, has_more))
+
+    @staticmethod
+    async def stream(owner_id: str, since: int | None) -> AsyncIterator[bytes]:
+        # Subscribes before replaying so nothing committed in between is missed.
+        subscription: Subscription = change_hub.subscribe(owner_id)
+        replayed: int = 0
+
+        try:
+            yield f'retry: {settings.SYNC_STREAM_RETRY_MS}\n\n'.encode()
+
+            while since is not None:
+                next_page()
+
+                async with async_session_maker() as session:
+                    rows = await ChangeRepository(session).get_since(owner_id, since, settings.SYNC_BATCH_SIZE)
+
+                if rows:
+                    yield b''.join(change_event(*row) for row in rows)
+                    since = replayed = rows[-1][0]
+
+                if len(rows) < settings.SYNC_BATCH_SIZE:
+                    break
+
+            while not subscription.dropped:
+                event: tuple[int, bytes] | None = await subscription.next(settings.SYNC_STREAM_HEARTBEAT_SECONDS)
+
+                if event is None:
+                    if not subscription.dropped:
+                        yield b': heartbeat\n\n'
+                elif event[0] > replayed:
+                    yield event[1]
+        finally:
+            change_hub.unsubscribe(subscription)
+
+
+class IdempotencyService(BaseService):
+    POLL_SECONDS: float = 0.05
+    PURGE_EVERY: int = 256
+
+    claims: int = 0
+
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
+        self.repository = IdempotencyKeyRepository(self.session)
+
+    @staticmethod
+    def fingerprint(method: str, path: str, query: str, body: bytes) -> bytes:
+        return hashlib.blake2b(f'{method} {path}?{query}\n'.encode() + body, digest_size=16).digest()
+
+    async def run(
+        self,
+        owner_id: str,
+        key: str,
+        fingerprint: bytes,
+        call: Callable[[AsyncSession], Awaitable[tuple[int, bytes]]],
+    ) -> tuple[int, bytes, bool]:
+        async def execute() -> tuple[int, bytes, bool]:
+            # Shared by concurrent duplicates, so not on the caller's session.
+            async with async_session_maker() as session:
+                return await IdempotencyService(session).execute(owner_id, key, fingerprint, call)
+
+        return await idempotent_writes.do((owner_id, key, fingerprint), execute)
+
+    async def execute(
+        self,
+        owner_id: str,
+        key: str,
+        fingerprint: bytes,
+        call: Callable[[AsyncSession], Awaitable[tuple[int, bytes]]],
+    ) -> tuple[int, bytes, bool]:
+        ttl: timedelta = timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        abandoned: timedelta = timedelta(seconds=settings.IDEMPOTENCY_ABANDONED_SECONDS)
+        deadline: float = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            now: datetime = utc_now()
+            stored = await self.repository.get(owner_id, key)
+
+            if stored is None or stored.created_at < now - ttl:
+                if await self.repository.claim(owner_id, key, fingerprint, now, now - ttl, now - abandoned):
+                    break
+
+                continue
+
+            if stored.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail='Idempotency-Key was already used for a different request.',
+                )
+
+            if stored.status_code is not None:
+                return stored.status_code, stored.body, True
+
+            # Claimed in another worker; only taken over once abandoned.
+            if time.monotonic() >= deadline or stored.created_at < now - abandoned:
+                if await self.repository.claim(owner_id, key, fingerprint, now, now - ttl, now - abandoned):
+                    break
+
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail='A request with this Idempotency-Key is still in progress.',
+                )
+
+            await self.session.rollback()
+            await asyncio.sleep(self.POLL_SECONDS)
+
+        try:
+            status_code, body, pending = await self.write(owner_id, key, call)
+        except HTTPException as e:
+            if e.status_code >= 500:
+                await self.repository.release(owner_id, key)
+                raise
+
+            status_code, body, pending = e.status_code, json.dumps({'detail': e.detail}).encode(), []
+            await self.repository.complete(owner_id, key, status_code, body)
+        except BaseException:
+            await self.repository.release(owner_id, key)
+            raise
+
+        for pending_owner_id, changes in pending:
+            after_commit(self.session, pending_owner_id, *changes)
+
+        await self.purge_expired(now - ttl)
+
+        return status_code, body, False
+
+    @staticmethod
+    async def write(
+        owner_id: str, key: str, call: Callable[[AsyncSession], Awaitable[tuple[int, bytes]]],
+    ) -> tuple[int, bytes, list]:
+        async with async_engine.connect() as connection:
+            await connection.begin()
+            session: AsyncSession = joined_session(connection)
+
+            try:
+                status_code, body = await call(session)
+                # Stored in the write's transaction, so a retry never finds the write without its response.
+                await IdempotencyKeyRepository(session).complete(owner_id, key, status_code, body)
+            finally:
+                pending: list = session.info.pop('pending_commits')
+                await session.close()
+
+            await connection.commit()
+
+        return status_code, body, pending
+
+    async def purge_expired(self, expired_before: datetime) -> None:
+        IdempotencyService.claims += 1
+
+        if IdempotencyService.claims % self.PURGE_EVERY == 0:
+            await self.repository.purge(expired_before)
@@ -0,0 +1,73 @@
+"""Check the task counts of tags against their links and repair the ones that drifted.
+
+Run from ``src``: ``python -m tasks.tag_counts``.
+"""
+import argparse
+import asyncio
+import logging
+
+import metrics
+from cache import response_cache
+from config import settings
+from database import async_engine, async_session_maker
+from tasks import leases
+from tasks.repository import TagCountRepository
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def check(batch_size: int, repair: bool) -> int:
+    drifted_total: int = 0
+    after: str | None = ''
+
+    async with async_session_maker() as session:
+        repository: TagCountRepository = TagCountRepository(session)
+
+        while True:
+            drifted, after = await repository.get_drifted(after, batch_size)
+
+            if after is None:
+                break
+
+            for tag_id, _, task_count, live_links in drifted:
+                logger.warning('tag %s counts %d tasks but has %d', tag_id, task_count, live_links)
+
+            drifted_total += len(drifted)
+
+            if repair and drifted:
+                await repository.repair([tag_id for tag_id, *_ in drifted])
+                metrics.tag_count_repairs_total.inc((), len(drifted))
+
+                for owner_id in {owner_id for _, owner_id, *_ in drifted}:
+                    response_cache.invalidate(owner_id)
+
+    return drifted_total
+
+
+async def run_periodically(interval: int, batch_size: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            if await leases.acquire('tag_counts', interval):
+                await check(batch_size, repair=True)
+        except Exception:
+            logger.exception('tag count check failed')
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=settings.TAG_COUNT_CHECK_BATCH_SIZE)
+    parser.add_argument('--repair', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    drifted: int = await check(args.batch_size, args.repair)
+    await async_engine.dispose()
+
+    print(f'{drifted} tags with a drifted task count' + (', repaired' if args.repair and drifted else ''))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -2,7 +2,7 @@ import typing
 import uuid
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -13,6 +13,9 @@ if typing.TYPE_CHECKING:
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_deleted_at', 'deleted_at', sqlite_where=text('deleted_at IS NOT NULL')),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid.uuid4()))
     fullname: Mapped[str] = mapped_column(nullable=True)
@@ -27,6 +30,7 @@ class User(Base):
 
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
+    deleted_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
     tasks: Mapped[list['Task']] = relationship(back_populates='owner')
     tags: Mapped[list['Tag']] = relationship(back_populates='owner')
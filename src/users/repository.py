@@ -1,6 +1,7 @@
-from sqlalchemy import Select, select
+from sqlalchemy import Select, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from cache import response_cache
 from users.models import User
 from users.schemas import UserCreate, UserUpdate
 from users import utils
@@ -11,7 +12,7 @@ class UserRepository:
         self.session = session
 
     async def create(self, user_data: UserCreate) -> User:
-        user_data.hashed_password = utils.hash_password(user_data.hashed_password)
+        user_data.hashed_password = await utils.hash_password(user_data.hashed_password)
         user: User = User(**user_data.model_dump())
 
         self.session.add(user)
@@ -21,7 +22,7 @@ class UserRepository:
         return user
     
     async def get_by_id(self, user_id: str) -> User:
-        stmt: Select[User] = select(User).filter_by(id=user_id)
+        stmt: Select[User] = select(User).filter_by(id=user_id, deleted_at=None)
         user: User = (
             await self.session.execute(stmt)
         ).scalar_one()
@@ -29,46 +30,64 @@ class UserRepository:
         return user
     
     async def get_by_username(self, username: str) -> User:
-        stmt: Select[User] = select(User).filter_by(username=username)
+        stmt: Select[User] = select(User).filter_by(username=username, deleted_at=None)
         user: User = (
             await self.session.execute(stmt)
         ).scalar_one()
 
         return user
     
+    async def find_by_username(self, username: str) -> User | None:
+        stmt: Select[User] = select(User).filter_by(username=username, deleted_at=None)
+
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
     async def update(self, user: User, user_data: UserUpdate) -> User:
         for key, value in user_data.model_dump(exclude_unset=True).items():
             setattr(user, key, value)
 
         await self.session.commit()
+        # Cached task and comment lists embed the owner's profile.
+        response_cache.invalidate(user.id)
         await self.session.refresh(user)
 
         return user
     
     async def delete(self, user: User) -> bool:
-        await self.session.delete(user)
+        # Only marks the user; tasks.purger removes it.
+        user.deleted_at = func.now()
         await self.session.commit()
+        response_cache.invalidate(user.id)
 
         return True
     
     async def user_exists_by_id(self, user_id: str) -> bool:
-        stmt: Select[User] = select(User).filter_by(id=user_id)
+        stmt: Select[User] = select(User).filter_by(id=user_id, deleted_at=None)
         user: User = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
 
         return user is not None
     
-    async def user_exists_by_username(self, username: str) -> bool:
+    async def user_exists_by_username(self, username: str, include_deleted: bool = False) -> bool:
+        # Deleted users keep the username until purged.
         stmt: Select[User] = select(User).filter_by(username=username)
+
+        if not include_deleted:
+            stmt = stmt.filter_by(deleted_at=None)
+
         user: User = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
 
         return user is not None
     
-    async def user_exists_by_email(self, email: str) -> bool:
+    async def user_exists_by_email(self, email: str, include_deleted: bool = False) -> bool:
         stmt: Select[User] = select(User).filter_by(email=email)
+
+        if not include_deleted:
+            stmt = stmt.filter_by(deleted_at=None)
+
         user: User = (
             await self.session.execute(stmt)
         ).scalar_one_or_none()
@@ -56,7 +56,8 @@ async def register_user(
 @router.post('/refresh', status_code=status.HTTP_200_OK)
 async def refresh_token(
     request: Request = Request,
-    response: Response = Response()
+    response: Response = Response(),
+    session: AsyncSession = Depends(get_async_session)
 ) -> Token:
     refresh_token = request.cookies.get('refresh_token')
 
@@ -68,6 +69,12 @@ async def refresh_token(
     
     payload = decode_refresh_token(refresh_token)
 
+    if await UserService(session).repository.find_by_username(payload.get('sub', '')) is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Invalid refresh token.'
+        )
+
     access_token = create_access_token(payload['sub'])
     refresh_token = create_refresh_token(payload['sub'])
 
@@ -1,8 +1,10 @@
 import re
 from datetime import datetime
+from typing import Annotated
 
-from fastapi import HTTPException, status
-from pydantic import BaseModel, field_validator
+from pydantic import AfterValidator, BaseModel, BeforeValidator, StringConstraints
+
+from validation import ErrorMessages, length_between
 
 
 class Token(BaseModel):
@@ -15,68 +17,47 @@ class TokenData(BaseModel):
     username: str
 
 
-class UserBase(BaseModel):
-    fullname: str | None = None
-    username: str | None = None
-    email: str
+FULLNAME_PATTERN: str = r'^[A-Za-z]+(\.?)(( [A-Za-z]+(\.?)?)+)?$'
+USERNAME_PATTERN: str = r'^[A-Za-z0-9_](\.?[A-Za-z0-9_])+$'
+EMAIL_PATTERN: str = r'^[\w\.\+\-]+\@[\w]+\.[a-z]{2,}(\.[a-z]{2,})?$'
+PASSWORD_LETTER: re.Pattern = re.compile(r'[A-Za-z]')
+PASSWORD_DIGIT: re.Pattern = re.compile(r'[0-9]')
+
+
+def validate_password(value: str) -> str:
+    if PASSWORD_LETTER.search(value) is None or PASSWORD_DIGIT.search(value) is None:
+        raise ValueError('Password must contain at least one letter and one number.')
+
+    return value
+
+
+def require_username(value: str | None) -> str | None:
+    if value is None:
+        raise ValueError('Username is required.')
 
-    @field_validator('fullname')
-    @classmethod
-    def validate_fullname(cls, value: str) -> str:
-        if value is None:
-            return value
-        
-        if not re.match(r'^[A-Za-z]+(\.?)(( [A-Za-z]+(\.?)?)+)?$', value):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Fullname must contains only letters, spaces and optional periods.'
-            )
-
-        return cls.validate_length(value, 'Fullname', 0, 64)
-
-    @field_validator('username')
-    @classmethod
-    def validate_username(cls, value: str) -> str:
-        if value is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Username is required.',
-            )
-
-        if not re.match(r'^(?!.*\.\.)([A-Za-z0-9_][A-Za-z0-9._]{1,28}[A-Za-z0-9_])$', value):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Username must contains at least one letter and one number.'
-            )
-
-        return cls.validate_length(value, 'Username', 3, 30)
-    
-    @field_validator('email')
-    @classmethod
-    def validate_email(cls, value: str) -> str:
-        if value is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Email is required.',
-            )
-        
-        if not re.match(r'^[\w\.\+\-]+\@[\w]+\.[a-z]{2,}(\.[a-z]{2,})?$', value):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Email is not valid.',
-            )
-
-        return cls.validate_length(value, 'Email', 10, 128)
-
-    @staticmethod
-    def validate_length(value: str, field_name: str, min_length: int, max_length: int) -> str:
-        if not (min_length <= len(value.strip()) <= max_length):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'{field_name} length must be between {min_length} and {max_length} characters.',
-            )
-
-        return value
+    return value
+
+
+# Patterns are checked before lengths.
+Fullname = Annotated[str, StringConstraints(pattern=FULLNAME_PATTERN), length_between('Fullname', 0, 64)]
+Username = Annotated[str, StringConstraints(min_length=3, max_length=30, pattern=USERNAME_PATTERN)]
+Email = Annotated[str, StringConstraints(pattern=EMAIL_PATTERN), length_between('Email', 10, 128)]
+Password = Annotated[str, AfterValidator(validate_password), length_between('Password', 6, 32)]
+
+
+USERNAME_ERRORS: ErrorMessages = ErrorMessages('Username must contains at least one letter and one number.')
+
+
+class UserBase(BaseModel):
+    fullname: Annotated[
+        Fullname | None,
+        ErrorMessages('Fullname must contains only letters, spaces and optional periods.'),
+    ] = None
+    username: Annotated[Username | None, BeforeValidator(require_username), USERNAME_ERRORS] = None
+    email: Annotated[
+        Email,
+        ErrorMessages('Email is not valid.'),
+    ]
 
 
 class UserRead(BaseModel):
@@ -92,24 +73,8 @@ class UserRead(BaseModel):
 
 
 class UserCreate(UserBase):
-    hashed_password: str
-
-    @field_validator('hashed_password')
-    @classmethod
-    def validate_password(cls, value: str) -> str:
-        if value is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Password is required.',
-            )
-
-        if not re.match(r'^(?=.*[0-9])(?=.*[a-zA-Z])', value):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail='Password must contain at least one letter and one number.',
-            )
-
-        return cls.validate_length(value, 'Password', 6, 32)
+    username: Annotated[Username, BeforeValidator(require_username), USERNAME_ERRORS]
+    hashed_password: Annotated[Password, ErrorMessages('Password length must be between 6 and 32 characters.')]
 
 
 class UserUpdate(UserBase): ...
@@ -12,13 +12,13 @@ class UserService:
         self.repository = UserRepository(session)
 
     async def create(self, user_data: UserCreate) -> User:
-        if await self.repository.user_exists_by_username(user_data.username):
+        if await self.repository.user_exists_by_username(user_data.username, include_deleted=True):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail='This username is unavailable..'
             )
         
-        if await self.repository.user_exists_by_email(user_data.email):
+        if await self.repository.user_exists_by_email(user_data.email, include_deleted=True):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail='This email is unavailable.'
@@ -1,36 +1,87 @@
+import asyncio
+import threading
+import time
 import typing
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import cache
 
-import jwt
-from jwt import InvalidTokenError, PyJWTError
-from passlib.context import CryptContext
 from fastapi import Depends, Security, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import metrics
 from config import settings
 from database import get_async_session
 from users import service
-from users.schemas import TokenData
 
 if typing.TYPE_CHECKING:
+    from passlib.context import CryptContext
+
     from users.models import User
 
 
-password_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+# Imported on first use to keep worker start-up fast.
+@cache
+def password_context() -> 'CryptContext':
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+
+class PasswordHasher:
+    def __init__(self, threads: int) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='bcrypt')
+        self.lock = threading.Lock()
+        self.queued: int = 0
+        self.running: int = 0
+
+    def count(self, queued: int, running: int) -> None:
+        with self.lock:
+            self.queued += queued
+            self.running += running
+            metrics.password_hash_operations.set(self.queued, ('queued',))
+            metrics.password_hash_operations.set(self.running, ('running',))
+
+    def call(self, function: typing.Callable[..., typing.Any], *args: str) -> tuple[typing.Any, float]:
+        self.count(-1, 1)
+        started_at: float = time.perf_counter()
+
+        try:
+            return function(*args), time.perf_counter() - started_at
+        finally:
+            self.count(0, -1)
+
+    async def run(self, operation: str, function: typing.Callable[..., typing.Any], *args: str) -> typing.Any:
+        self.count(1, 0)
+        future: Future = self.executor.submit(self.call, function, *args)
+        # A cancelled call never runs.
+        future.add_done_callback(lambda future: future.cancelled() and self.count(-1, 0))
+
+        result, duration = await asyncio.wrap_future(future)
+        metrics.password_hash_duration_seconds.observe(duration, (operation,))
+
+        return result
+
+
+@cache
+def password_hasher() -> PasswordHasher:
+    return PasswordHasher(settings.PASSWORD_HASH_THREADS)
+
+
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/login')
 
-def hash_password(plain_password: str) -> str:
-    return password_context.hash(plain_password)
+async def hash_password(plain_password: str) -> str:
+    return await password_hasher().run('hash', password_context().hash, plain_password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return password_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher().run('verify', password_context().verify, plain_password, hashed_password)
 
 
 async def authenticate_user(session: AsyncSession, username: str, plain_password: str) -> 'User':
     user: 'User' = await service.UserService(session).get_by_username(username)
 
-    if not verify_password(plain_password, user.hashed_password):
+    if not await verify_password(plain_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Incorrect username or password.'
@@ -40,6 +91,8 @@ async def authenticate_user(session: AsyncSession, username: str, plain_password
 
 
 def create_access_token(username: str) -> str:
+    import jwt
+
     encode: dict = {'sub': username}
     expires: datetime = datetime.now(timezone.utc) + timedelta(minutes=settings.AUTH_ACCESS_TOKEN_EXPIRE_MINUTES)
     encode.update({'exp': expires})
@@ -48,6 +101,8 @@ def create_access_token(username: str) -> str:
 
 
 def create_refresh_token(username: str) -> str:
+    import jwt
+
     encode: dict = {'sub': username}
     expires: datetime = datetime.now(timezone.utc) + timedelta(days=settings.AUTH_REFRESH_TOKEN_EXPIRE_DAYS)
     encode.update({'exp': expires})
@@ -56,6 +111,8 @@ def create_refresh_token(username: str) -> str:
 
 
 def decode_refresh_token(refresh_token: str) -> dict:
+    import jwt
+
     try:
         payload = jwt.decode(
             refresh_token,
@@ -64,13 +121,29 @@ def decode_refresh_token(refresh_token: str) -> dict:
         )
 
         return payload
-    except PyJWTError:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid refresh token.'
         )
 
 
+async def get_user_by_token(session: AsyncSession, token: str) -> 'User | None':
+    import jwt
+
+    try:
+        payload = jwt.decode(token, settings.AUTH_SECRET_KEY, algorithms=[settings.AUTH_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+
+    username: str | None = payload.get('sub')
+
+    if not username:
+        return None
+
+    return await service.UserService(session).repository.find_by_username(username)
+
+
 async def get_current_user(
     token: str = Security(oauth2_bearer),
     session: AsyncSession = Depends(get_async_session)
@@ -81,18 +154,12 @@ async def get_current_user(
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
-    try:
-        payload = jwt.decode(token, settings.AUTH_SECRET_KEY, algorithms=[settings.AUTH_ALGORITHM])
-        username: str = payload.get('sub')
+    user: 'User | None' = await get_user_by_token(session, token)
 
-        if not username:
-            raise credentials_exception
-        
-        token_data: TokenData = TokenData(username=username)
-    except InvalidTokenError:
+    if user is None:
         raise credentials_exception
 
-    return await service.UserService(session).get_by_username(token_data.username)
+    return user
 
 
 async def get_current_active_user(
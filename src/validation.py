@@ -0,0 +1,86 @@
+from typing import Any, TypeVar
+
+from fastapi import Request, status
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import AfterValidator, BaseModel, ValidationError
+from pydantic_core import ErrorDetails
+
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+class ErrorMessages:
+    __slots__ = ('default', 'messages')
+
+    def __init__(self, default: str, **messages: str) -> None:
+        self.default = default
+        self.messages = messages
+
+    def format(self, error: ErrorDetails) -> str:
+        if error['type'] == 'value_error':
+            return str(error['ctx']['error'])
+
+        message: str = self.messages.get(error['type'], self.default)
+
+        return message.format(input=error.get('input'), **error.get('ctx', {}))
+
+
+def length_between(field_name: str, min_length: int, max_length: int) -> AfterValidator:
+    message: str = f'{field_name} length must be between {min_length} and {max_length} characters.'
+
+    def validate_length(value: str) -> str:
+        if not min_length <= len(value.strip()) <= max_length:
+            raise ValueError(message)
+
+        return value
+
+    return AfterValidator(validate_length)
+
+
+def error_message(model: type[BaseModel], error: ErrorDetails) -> str | None:
+    # These stay a 422.
+    if error['type'] in ('missing', 'string_type') or not error['loc']:
+        return None
+
+    field = model.model_fields.get(error['loc'][0])
+
+    if field is None:
+        return None
+
+    for metadata in field.metadata:
+        if isinstance(metadata, ErrorMessages):
+            return metadata.format(error)
+
+    return None
+
+
+def validate(model: type[ModelT], data: Any) -> ModelT:
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        message: str | None = error_message(model, e.errors()[0])
+
+        if message is None:
+            raise
+
+        raise ValueError(message) from None
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+    route = request.scope.get('route')
+    body_field = getattr(route, 'body_field', None)
+    model = getattr(body_field, 'type_', None)
+
+    if isinstance(model, type) and issubclass(model, BaseModel):
+        for error in exc.errors():
+            if error['loc'][0] != 'body':
+                continue
+
+            message: str | None = error_message(model, {**error, 'loc': error['loc'][1:]})
+
+            if message is not None:
+                return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={'detail': message})
+
+    return await request_validation_exception_handler(request, exc)
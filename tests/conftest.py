@@ -0,0 +1,203 @@
+import functools
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+os.environ.update({
+    'APP_TITLE': 'FocusFlow API',
+    'APP_VERSION': 'test',
+    'APP_HOST': '127.0.0.1',
+    'APP_PORT': '8000',
+    'AUTH_SECRET_KEY': 'test-secret',
+    'AUTH_ALGORITHM': 'HS256',
+    'AUTH_ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+    'AUTH_REFRESH_TOKEN_EXPIRE_DAYS': '7',
+    'DATABASE_URL': 'sqlite+aiosqlite:///:memory:',
+    'DATABASE_ECHO': 'false',
+    'SLOW_QUERY_THRESHOLD_MS': '0',
+    'PROFILE_ENABLED': 'false',
+    'METRICS_TOKEN': 'test-metrics-token',
+})
+
+import httpx
+from sqlalchemy import event, insert, update
+
+from cache import response_cache
+from database import Base, async_engine
+from main import app
+from tasks.models import (
+    Task, Tag, TaskTag, Comment, ArchivedTask, ArchivedTaskTag, ArchivedComment, Change, ChangeEntity, ChangeOperation,
+)
+from users.models import User
+from users.utils import create_access_token, password_context
+
+
+PASSWORD: str = 'secret123'
+ARCHIVED_AT: datetime = datetime(2024, 1, 1)
+DUE_AT: datetime = datetime(2030, 1, 1)
+
+
+@dataclass
+class SeededData:
+    username: str
+    headers: dict[str, str]
+    task_ids: list[str] = field(default_factory=list)
+    tag_ids: list[str] = field(default_factory=list)
+    comment_ids: list[str] = field(default_factory=list)
+    archived_task_ids: list[str] = field(default_factory=list)
+    spare_tag_id: str = ''
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    @contextmanager
+    def measure(self) -> Iterator['QueryCounter']:
+        self.statements = []
+        event.listen(async_engine.sync_engine, 'after_cursor_execute', self.on_execute)
+
+        try:
+            yield self
+        finally:
+            event.remove(async_engine.sync_engine, 'after_cursor_execute', self.on_execute)
+
+
+def assert_query_budget(counter: QueryCounter, budget: int, label: str = '') -> None:
+    assert counter.count <= budget, (
+        f'{label} issued {counter.count} statements, budget is {budget}:\n' + '\n'.join(counter.statements)
+    )
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+
+@pytest.fixture
+async def database() -> AsyncIterator[None]:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    yield
+
+    await async_engine.dispose()
+
+    # Seeding bypasses the repositories, so nothing else drops what this test cached for its owners.
+    for owner_id in list(response_cache.memory.owner_keys):
+        response_cache.invalidate(owner_id)
+
+
+@pytest.fixture
+async def client(database: None) -> AsyncIterator[httpx.AsyncClient]:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        yield client
+
+
+@pytest.fixture
+def query_counter() -> QueryCounter:
+    return QueryCounter()
+
+
+@functools.cache
+def hashed_password() -> str:
+    return password_context().hash(PASSWORD)
+
+
+async def seed(size: int, username: str = 'owner_1') -> SeededData:
+    user_id: str = f'{username}-id'
+    data: SeededData = SeededData(
+        username=username,
+        headers={'Authorization': f'Bearer {create_access_token(username)}'},
+        task_ids=[f'{username}-task-{i}' for i in range(size)],
+        tag_ids=[f'{username}-tag-{i}' for i in range(size)],
+    )
+    data.comment_ids = [f'{task_id}-comment-{j}' for task_id in data.task_ids for j in range(2)]
+    data.spare_tag_id = f'{username}-tag-spare'
+    data.archived_task_ids = [f'{username}-archived-task-{i}' for i in range(size)]
+
+    async with async_engine.begin() as connection:
+        await connection.execute(insert(User), [{
+            'id': user_id,
+            'fullname': 'Owner',
+            'username': username,
+            'email': f'{username}@example.com',
+            'hashed_password': hashed_password(),
+        }])
+        # Every task carries two tags; the first task carries all of them to expose per-child queries.
+        links: list[dict] = [
+            {'task_id': task_id, 'tag_id': tag_id}
+            for i, task_id in enumerate(data.task_ids)
+            for tag_id in (data.tag_ids if i == 0 else data.tag_ids[i:i + 2])
+        ]
+        task_counts: Counter = Counter(link['tag_id'] for link in links)
+        await connection.execute(insert(Tag), [
+            {'id': tag_id, 'title': f'tag{i}', 'owner_id': user_id, 'task_count': task_counts[tag_id]}
+            for i, tag_id in enumerate([*data.tag_ids, data.spare_tag_id])
+        ])
+        await connection.execute(insert(Task), [
+            {
+                'id': task_id, 'title': f'Task {i}', 'description': 'Seeded.', 'owner_id': user_id,
+                'due_date': DUE_AT + timedelta(hours=6 * i),
+            }
+            for i, task_id in enumerate(data.task_ids)
+        ])
+        await connection.execute(insert(TaskTag), links)
+        await connection.execute(insert(Comment), [
+            {'id': comment_id, 'comment': 'Seeded.', 'task_id': comment_id.rsplit('-comment-', 1)[0], 'owner_id': user_id}
+            for comment_id in data.comment_ids
+        ])
+        # Archived tasks mirror the hot ones: the first carries every tag, and each has two comments.
+        await connection.execute(insert(ArchivedTask), [
+            {
+                'id': task_id, 'title': f'Archived task {i}', 'description': 'Seeded.', 'status': 'completed',
+                'priority': 'low', 'created_at': ARCHIVED_AT, 'updated_at': ARCHIVED_AT, 'owner_id': user_id,
+            }
+            for i, task_id in enumerate(data.archived_task_ids)
+        ])
+        await connection.execute(insert(ArchivedTaskTag), [
+            {'task_id': task_id, 'tag_id': tag_id}
+            for i, task_id in enumerate(data.archived_task_ids)
+            for tag_id in (data.tag_ids if i == 0 else data.tag_ids[i:i + 2])
+        ])
+        await connection.execute(insert(ArchivedComment), [
+            {'id': f'{task_id}-comment-{j}', 'comment': 'Seeded.', 'created_at': ARCHIVED_AT, 'task_id': task_id, 'owner_id': user_id}
+            for task_id in data.archived_task_ids
+            for j in range(2)
+        ])
+        await connection.execute(insert(Change), [
+            {'owner_id': user_id, 'entity': entity, 'entity_id': entity_id, 'operation': ChangeOperation.upsert}
+            for entity, entity_ids in (
+                (ChangeEntity.tag, [*data.tag_ids, data.spare_tag_id]),
+                (ChangeEntity.task, data.task_ids),
+                (ChangeEntity.comment, data.comment_ids),
+            )
+            for entity_id in entity_ids
+        ])
+
+    return data
+
+
+async def seed_superuser(username: str) -> SeededData:
+    data: SeededData = await seed(1, username=username)
+
+    async with async_engine.begin() as connection:
+        await connection.execute(update(User).where(User.username == username).values(is_superuser=True))
+
+    return data
@@ -0,0 +1,108 @@
+import time
+from typing import Iterator
+
+import httpx
+import pytest
+
+from config import settings
+
+from conftest import SeededData, seed
+
+
+# Due dates in UTC around Berlin's 2030 DST switches.
+DUE_DATES: list[str] = [
+    '2030-03-30T22:30:00Z',  # 23:30 CET, Mar 30
+    '2030-03-30T23:30:00Z',  # 00:30 CET, Mar 31
+    '2030-03-31T21:30:00Z',  # 23:30 CEST, Mar 31: the day has 23 hours
+    '2030-03-31T22:30:00Z',  # 00:30 CEST, Apr 1
+    '2030-10-26T21:59:00Z',  # 23:59 CEST, Oct 26
+    '2030-10-26T22:30:00Z',  # 00:30 CEST, Oct 27
+    '2030-10-27T00:30:00Z',  # 02:30 CEST, Oct 27
+    '2030-10-27T01:30:00Z',  # 02:30 CET, Oct 27: the same wall time an hour later
+    '2030-10-27T22:59:00Z',  # 23:59 CET, Oct 27: the day has 25 hours
+]
+
+
+# Due dates are kept in UTC, so the server's own zone must not move them between days.
+@pytest.fixture(autouse=True, params=['UTC', 'Asia/Tokyo'])
+def server_zone(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+
+    yield
+
+    monkeypatch.undo()
+    time.tzset()
+
+
+async def seed_due_tasks(client: httpx.AsyncClient) -> SeededData:
+    data: SeededData = await seed(1, username='planner')
+
+    for i, due_date in enumerate(DUE_DATES):
+        response: httpx.Response = await client.post(
+            '/tasks', json={'title': f'Due {i}', 'description': 'Planned.', 'due_date': due_date}, headers=data.headers,
+        )
+        assert response.status_code == 201, response.text
+
+    return data
+
+
+async def agenda(client: httpx.AsyncClient, data: SeededData, first: str, last: str, tz: str, counts: bool = False) -> list[dict]:
+    response: httpx.Response = await client.get(
+        '/tasks/agenda', params={'from': first, 'to': last, 'tz': tz, 'counts': counts}, headers=data.headers,
+    )
+    assert response.status_code == 200, response.text
+
+    return response.json()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(('first', 'last', 'days'), [
+    ('2030-03-30', '2030-03-31', {'2030-03-30': ['Due 0'], '2030-03-31': ['Due 1', 'Due 2']}),
+    ('2030-10-26', '2030-10-27', {'2030-10-26': ['Due 4'], '2030-10-27': ['Due 5', 'Due 6', 'Due 7', 'Due 8']}),
+])
+async def test_tasks_land_on_their_local_day_across_dst(client: httpx.AsyncClient, first: str, last: str, days: dict) -> None:
+    data: SeededData = await seed_due_tasks(client)
+
+    buckets: list[dict] = await agenda(client, data, first, last, 'Europe/Berlin')
+
+    assert {bucket['date']: [task['title'] for task in bucket['tasks']] for bucket in buckets} == days
+    assert all(bucket['count'] == len(bucket['tasks']) for bucket in buckets)
+    assert await agenda(client, data, first, last, 'Europe/Berlin', counts=True) == [
+        {'date': day, 'count': len(titles)} for day, titles in days.items()
+    ]
+
+
+@pytest.mark.anyio
+async def test_the_same_tasks_bucket_by_the_requested_zone(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed_due_tasks(client)
+
+    counts: list[dict] = await agenda(client, data, '2030-03-30', '2030-03-31', 'UTC', counts=True)
+
+    assert counts == [{'date': '2030-03-30', 'count': 2}, {'date': '2030-03-31', 'count': 2}]
+
+
+@pytest.mark.anyio
+async def test_due_dates_are_kept_in_utc(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed_due_tasks(client)
+
+    tasks: list[dict] = (await client.get('/tasks', params={'limit': 100}, headers=data.headers)).json()
+    due_dates: dict[str, str] = {task['title']: task['due_date'] for task in tasks}
+
+    assert [due_dates[f'Due {i}'] for i in range(len(DUE_DATES))] == [due_date.removesuffix('Z') for due_date in DUE_DATES]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(('params', 'detail'), [
+    ({'from': '2030-01-01', 'to': '2030-01-31', 'tz': 'Mars/Olympus'}, "Unknown time zone 'Mars/Olympus'."),
+    (
+        {'from': '2030-01-31', 'to': '2030-01-01'},
+        f'The range must end on or after its start and span at most {settings.AGENDA_MAX_DAYS} days.',
+    ),
+])
+async def test_bad_ranges_are_400(client: httpx.AsyncClient, params: dict, detail: str) -> None:
+    data: SeededData = await seed(1, username='planner')
+
+    response: httpx.Response = await client.get('/tasks/agenda', params=params, headers=data.headers)
+
+    assert (response.status_code, response.json()) == (400, {'detail': detail})
@@ -0,0 +1,110 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import func, select, update
+
+from database import async_engine
+from tasks.archiver import archive
+from tasks.models import ArchivedComment, ArchivedTask, ArchivedTaskTag, Task
+from tasks.repository import copy_rows
+
+from conftest import SeededData, seed
+
+
+async def task_counts(client: httpx.AsyncClient, data: SeededData) -> dict[str, int]:
+    tags: list[dict] = (await client.get('/tags', params={'limit': 100}, headers=data.headers)).json()
+
+    return {tag['id']: tag['task_count'] for tag in tags}
+
+
+async def listed(client: httpx.AsyncClient, data: SeededData, include_archived: bool) -> set[str]:
+    params: dict = {'limit': 100, 'include_archived': include_archived}
+
+    return {task['id'] for task in (await client.get('/tasks', params=params, headers=data.headers)).json()}
+
+
+@pytest.mark.anyio
+async def test_archive_and_restore_round_trip(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='archivist')
+    task_id: str = data.task_ids[0]
+    await client.patch(f'/tasks/{task_id}/update', json={'status': 'completed'}, headers=data.headers)
+    hot: dict = (await client.get(f'/tasks/{task_id}', headers=data.headers)).json()
+    counts: dict[str, int] = await task_counts(client, data)
+
+    # A negative age puts the cutoff in the future, so every completed task qualifies.
+    assert await archive(after_days=-1, batch_size=1) == 1
+
+    assert task_id not in await listed(client, data, include_archived=False)
+    assert {task_id, data.task_ids[1]} <= await listed(client, data, include_archived=True)
+    assert (await task_counts(client, data))[data.tag_ids[0]] == counts[data.tag_ids[0]] - 1
+
+    response: httpx.Response = await client.post(f'/tasks/{task_id}/restore', headers=data.headers)
+
+    assert response.status_code == 200, response.text
+    # Restoring touches updated_at, so sync clients pick the task up again.
+    restored: dict = (await client.get(f'/tasks/{task_id}', headers=data.headers)).json()
+    assert restored.pop('updated_at') >= hot.pop('updated_at')
+    assert restored == hot
+    assert await task_counts(client, data) == counts
+
+    async with async_engine.connect() as connection:
+        for model in (ArchivedTask, ArchivedTaskTag, ArchivedComment):
+            column = model.id if model is ArchivedTask else model.task_id
+            assert (await connection.execute(select(func.count()).where(column == task_id))).scalar_one() == 0
+
+    assert (await client.post(f'/tasks/{task_id}/restore', headers=data.headers)).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_archive_leaves_open_and_recent_tasks(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='archivist')
+    await client.patch(f'/tasks/{data.task_ids[0]}/update', json={'status': 'completed'}, headers=data.headers)
+
+    assert await archive(after_days=1, batch_size=10) == 0
+    assert await listed(client, data, include_archived=False) == set(data.task_ids)
+
+
+@pytest.mark.anyio
+async def test_archive_goes_by_completion_time(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='archivist')
+    task_id: str = data.task_ids[0]
+    await client.patch(f'/tasks/{task_id}/update', json={'status': 'completed'}, headers=data.headers)
+
+    async with async_engine.begin() as connection:
+        await connection.execute(update(Task).where(Task.id == task_id).values(completed_at=datetime(2020, 1, 1)))
+
+    # An edit long after the completion doesn't keep the task hot.
+    await client.patch(f'/tasks/{task_id}/update', json={'title': 'Edited'}, headers=data.headers)
+
+    assert await archive(after_days=1, batch_size=10) == 1
+    assert await listed(client, data, include_archived=False) == {data.task_ids[1]}
+
+
+@pytest.mark.anyio
+async def test_archiving_reaches_sync_and_cached_lists(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='archivist')
+    task_id: str = data.task_ids[0]
+    await client.patch(f'/tasks/{task_id}/update', json={'status': 'completed'}, headers=data.headers)
+    since: int = (await client.get('/sync', headers=data.headers)).json()['next_since']
+    assert task_id in await listed(client, data, include_archived=False)
+
+    await archive(after_days=-1, batch_size=10)
+    changes: list[dict] = (await client.get('/sync', params={'since': since}, headers=data.headers)).json()['changes']
+
+    assert task_id not in await listed(client, data, include_archived=False)
+    assert [(change['id'], change['operation']) for change in changes] == [(task_id, 'delete')]
+
+
+@pytest.mark.anyio
+async def test_restore_that_lost_a_race_is_404(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='archivist')
+    task_id: str = data.archived_task_ids[0]
+
+    # What the second of two concurrent restores finds: the task already back in the hot table.
+    async with async_engine.begin() as connection:
+        await connection.execute(copy_rows(ArchivedTask.__table__, Task.__table__, ArchivedTask.id == task_id))
+
+    response: httpx.Response = await client.post(f'/tasks/{task_id}/restore', headers=data.headers)
+
+    assert (response.status_code, response.json()) == (404, {'detail': 'Task is not found in the archive.'})
@@ -0,0 +1,99 @@
+import httpx
+import pytest
+
+from tasks import batch
+from tasks.routers import router
+
+from conftest import SeededData, seed
+
+
+async def run_batch(client: httpx.AsyncClient, data: SeededData, operations: list[dict], atomic: bool) -> dict:
+    response: httpx.Response = await client.post('/batch', json={'operations': operations, 'atomic': atomic}, headers=data.headers)
+    assert response.status_code == 200, response.text
+
+    return response.json()
+
+
+async def tag_titles(client: httpx.AsyncClient, data: SeededData) -> set[str]:
+    response: httpx.Response = await client.get('/tags', params={'limit': 100}, headers=data.headers)
+
+    return {tag['title'] for tag in response.json()}
+
+
+@pytest.mark.anyio
+async def test_atomic_batch_commits_when_every_operation_succeeds(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='batcher')
+
+    result: dict = await run_batch(client, data, [
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'batched'}},
+        {'method': 'GET', 'path': '/tags', 'query': {'limit': 100}},
+        {'method': 'PATCH', 'path': f'/tasks/{data.task_ids[0]}/update', 'body': {'title': 'Batched'}},
+    ], atomic=True)
+
+    assert result['committed'] is True
+    assert [operation['status'] for operation in result['results']] == [201, 200, 200]
+    # Later operations see the earlier ones' writes.
+    assert 'batched' in {tag['title'] for tag in result['results'][1]['body']}
+    assert 'batched' in await tag_titles(client, data)
+
+
+@pytest.mark.anyio
+async def test_atomic_batch_rolls_back_on_the_first_failure(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='batcher')
+    since: int = (await client.get('/sync', params={'limit': 1000}, headers=data.headers)).json()['next_since']
+
+    result: dict = await run_batch(client, data, [
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'rolledback'}},
+        {'method': 'PATCH', 'path': f'/tasks/{data.task_ids[0]}/update', 'body': {'title': 'Rolled back'}},
+        {'method': 'DELETE', 'path': '/comments/missing/delete'},
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'never'}},
+        {'method': 'GET', 'path': '/tags'},
+    ], atomic=True)
+
+    assert result['committed'] is False
+    assert [operation['status'] for operation in result['results']] == [201, 200, 404, 424, 424]
+    assert result['results'][3]['body'] == {'detail': 'An earlier operation of the atomic batch failed.'}
+    assert not {'rolledback', 'never'} & await tag_titles(client, data)
+    task: dict = (await client.get(f'/tasks/{data.task_ids[0]}', headers=data.headers)).json()
+    assert task['title'] == 'Task 0'
+    # Nothing reached the change log either.
+    assert (await client.get('/sync', params={'since': since}, headers=data.headers)).json()['changes'] == []
+
+
+@pytest.mark.anyio
+async def test_non_atomic_batch_keeps_going_after_a_failure(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='batcher')
+
+    result: dict = await run_batch(client, data, [
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'first'}},
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'x'}},
+        {'method': 'GET', 'path': '/nowhere'},
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'second'}},
+    ], atomic=False)
+
+    assert result['committed'] is True
+    assert [operation['status'] for operation in result['results']] == [201, 400, 404, 201]
+    assert {'first', 'second'} <= await tag_titles(client, data)
+
+
+@pytest.mark.anyio
+async def test_routes_without_a_batch_handler_are_rejected(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='batcher')
+
+    result: dict = await run_batch(client, data, [
+        {'method': 'GET', 'path': '/tasks/export'},
+        {'method': 'GET', 'path': '/sync'},
+        {'method': 'DELETE', 'path': '/tasks/export'},
+    ], atomic=False)
+
+    assert [operation['status'] for operation in result['results']] == [400, 400, 405]
+    assert result['results'][0]['body']['detail'] == 'GET /tasks/export is not supported in a batch.'
+
+
+def test_every_batch_handler_has_a_route(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert set(batch.handlers) <= {route.name for route in router.routes}
+
+    monkeypatch.setitem(batch.handlers, 'no_such_route', batch.get_tasks)
+
+    with pytest.raises(RuntimeError, match='no_such_route'):
+        batch.mount(router.routes)
@@ -0,0 +1,216 @@
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+import cache
+from cache import MemoryCache, ResponseCache, SharedCache, response_cache
+from database import async_engine
+
+from conftest import SeededData, seed
+
+
+Write = Callable[[httpx.AsyncClient, SeededData], Awaitable[httpx.Response]]
+
+LISTS: dict[str, dict] = {'/tasks': {'limit': 100}, '/tags': {'limit': 100}, '/comments': {'limit': 100}}
+
+# Every write and a cached list it changes.
+WRITES: dict[str, tuple[Write, str]] = {
+    'create task': (lambda client, data: client.post(
+        '/tasks', json={'title': 'New task', 'description': 'Created.'}, headers=data.headers,
+    ), '/tasks'),
+    'update task': (lambda client, data: client.patch(
+        f'/tasks/{data.task_ids[0]}/update', json={'title': 'Updated'}, headers=data.headers,
+    ), '/tasks'),
+    'delete task': (lambda client, data: client.delete(f'/tasks/{data.task_ids[0]}/delete', headers=data.headers), '/tasks'),
+    'restore task': (lambda client, data: client.post(
+        f'/tasks/{data.archived_task_ids[0]}/restore', headers=data.headers,
+    ), '/tasks'),
+    'tag task': (lambda client, data: client.post(
+        f'/tasks/{data.task_ids[1]}/tags', params={'tag_id': data.spare_tag_id}, headers=data.headers,
+    ), '/tags'),
+    'untag task': (lambda client, data: client.delete(
+        f'/tasks/{data.task_ids[0]}/tags', params={'tag_id': data.tag_ids[0]}, headers=data.headers,
+    ), '/tags'),
+    'create tag': (lambda client, data: client.post('/tags', json={'title': 'newtag'}, headers=data.headers), '/tags'),
+    'update tag': (lambda client, data: client.patch(
+        f'/tags/{data.tag_ids[0]}/update', json={'title': 'renamed'}, headers=data.headers,
+    ), '/tags'),
+    'delete tag': (lambda client, data: client.delete(f'/tags/{data.tag_ids[0]}/delete', headers=data.headers), '/tags'),
+    'create comment': (lambda client, data: client.post(
+        '/comments', params={'task_id': data.task_ids[0]}, json={'comment': 'New.'}, headers=data.headers,
+    ), '/comments'),
+    'update comment': (lambda client, data: client.patch(
+        f'/comments/{data.comment_ids[0]}/update', json={'comment': 'Edited.'}, headers=data.headers,
+    ), '/comments'),
+    'delete comment': (lambda client, data: client.delete(
+        f'/comments/{data.comment_ids[0]}/delete', headers=data.headers,
+    ), '/comments'),
+    'import tasks': (lambda client, data: client.post(
+        '/tasks/import', content=b'{"title": "Imported"}', headers=data.headers,
+    ), '/tasks'),
+    'batch': (lambda client, data: client.post('/batch', json={'operations': [
+        {'method': 'POST', 'path': '/tags', 'body': {'title': 'batched'}},
+    ]}, headers=data.headers), '/tags'),
+    'atomic batch': (lambda client, data: client.post('/batch', json={'atomic': True, 'operations': [
+        {'method': 'DELETE', 'path': f'/comments/{data.comment_ids[0]}/delete'},
+    ]}, headers=data.headers), '/comments'),
+}
+
+
+class Loader:
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.calls: int = 0
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+
+        return self.body
+
+
+def shared_cache(path: Path) -> ResponseCache:
+    return ResponseCache(MemoryCache(1024 * 1024, 60), SharedCache(str(path), 1024 * 1024))
+
+
+@pytest.mark.anyio
+async def test_write_in_one_process_invalidates_another(tmp_path: Path) -> None:
+    writer: ResponseCache = shared_cache(tmp_path / 'cache.db')
+    reader: ResponseCache = shared_cache(tmp_path / 'cache.db')
+    load: Loader = Loader(b'[]')
+
+    await reader.get_or_load('owner', 'tasks', {'page': 1}, load)
+    await reader.get_or_load('owner', 'tasks', {'page': 1}, load)
+    assert load.calls == 1
+
+    writer.invalidate('owner')
+    await writer.shared.call(lambda: None)
+
+    await reader.get_or_load('owner', 'tasks', {'page': 1}, load)
+    assert load.calls == 2
+
+
+@pytest.mark.anyio
+async def test_shared_tier_lock_waits_stay_off_the_event_loop(tmp_path: Path) -> None:
+    response_cache: ResponseCache = shared_cache(tmp_path / 'cache.db')
+    blocker: sqlite3.Connection = sqlite3.connect(tmp_path / 'cache.db', isolation_level=None)
+    blocker.execute('BEGIN IMMEDIATE')
+
+    ticks: list[float] = []
+
+    async def tick() -> None:
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.005)
+
+    ticker: asyncio.Task = asyncio.create_task(tick())
+    response_cache.invalidate('owner')
+    await response_cache.get_or_load('owner', 'tasks', {'page': 1}, Loader(b'[]'))
+    ticker.cancel()
+
+    assert ticks[-1] - ticks[0] > 0.05
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.05
+
+    blocker.execute('ROLLBACK')
+    await response_cache.shared.call(lambda: None)
+
+
+@pytest.mark.anyio
+async def test_memory_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    now: list[float] = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    response_cache: ResponseCache = ResponseCache(MemoryCache(1024, 60))
+    load: Loader = Loader(b'[]')
+
+    await response_cache.get_or_load('owner', 'tags', {}, load)
+    now[0] += 59
+    await response_cache.get_or_load('owner', 'tags', {}, load)
+    assert load.calls == 1
+
+    now[0] += 1
+    await response_cache.get_or_load('owner', 'tags', {}, load)
+    assert load.calls == 2
+    assert response_cache.memory.size == 2
+
+
+@pytest.mark.anyio
+async def test_invalidate_drops_only_that_owner() -> None:
+    response_cache: ResponseCache = ResponseCache(MemoryCache(1024, 60))
+    mine: Loader = Loader(b'[1]')
+    theirs: Loader = Loader(b'[2]')
+
+    assert await response_cache.get_or_load('me', 'tasks', {}, mine) == b'[1]'
+    assert await response_cache.get_or_load('them', 'tasks', {}, theirs) == b'[2]'
+    response_cache.invalidate('me')
+    await response_cache.get_or_load('me', 'tasks', {}, mine)
+    await response_cache.get_or_load('them', 'tasks', {}, theirs)
+
+    assert (mine.calls, theirs.calls) == (2, 1)
+
+
+@pytest.mark.anyio
+async def test_owner_versions_stay_bounded_and_never_go_back() -> None:
+    response_cache: ResponseCache = ResponseCache(MemoryCache(0, 60), max_versions=2)
+    written: dict[str, int] = {}
+
+    for owner_id in ('first', 'second', 'third', 'first', 'fourth'):
+        response_cache.invalidate(owner_id)
+        written[owner_id] = await response_cache.version(owner_id)
+
+    assert list(response_cache.versions) == ['first', 'fourth']
+    # Evicted owners never read below their last write, so entries stored before it stay unreachable.
+    for owner_id in ('second', 'third'):
+        assert await response_cache.version(owner_id) >= written[owner_id]
+
+
+async def read_lists(client: httpx.AsyncClient, data: SeededData) -> dict[str, bytes]:
+    return {path: (await client.get(path, params=params, headers=data.headers)).content for path, params in LISTS.items()}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('write', WRITES)
+async def test_write_invalidates_cached_lists(client: httpx.AsyncClient, write: str) -> None:
+    request, changed = WRITES[write]
+    data: SeededData = await seed(3, username='cached')
+    before: dict[str, bytes] = await read_lists(client, data)
+
+    response: httpx.Response = await request(client, data)
+    assert response.status_code < 400, response.text
+    after: dict[str, bytes] = await read_lists(client, data)
+
+    response_cache.invalidate(f'{data.username}-id')
+    assert after == await read_lists(client, data)
+    assert after[changed] != before[changed]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('path, params', [
+    ('/tasks', {}),
+    ('/tasks/{task_id}', {}),
+    ('/tasks/agenda', {'from': '2026-01-01', 'to': '2026-01-31'}),
+    ('/tasks/analytics', {'from': '2026-01-01', 'to': '2026-01-31'}),
+    ('/tasks/tagged', {'tag_id': '{tag_id}'}),
+    ('/tags/suggest', {'prefix': 'ta'}),
+])
+async def test_cache_miss_loads_on_the_request_session(client: httpx.AsyncClient, path: str, params: dict) -> None:
+    data: SeededData = await seed(2, username='loader')
+    path = path.format(task_id=data.task_ids[0])
+    params = {name: value.format(tag_id=data.tag_ids[0]) for name, value in params.items()}
+    checkouts: list[object] = []
+
+    def count(*_) -> None:
+        checkouts.append(None)
+
+    event.listen(async_engine.sync_engine, 'checkout', count)
+    try:
+        response: httpx.Response = await client.get(path, params=params, headers=data.headers)
+    finally:
+        event.remove(async_engine.sync_engine, 'checkout', count)
+
+    assert response.status_code == 200, response.text
+    assert len(checkouts) == 1
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from tasks.events import change_hub
+from tasks.service import SyncService
+
+from conftest import SeededData, seed
+
+
+def change_events(body: bytes) -> list[dict]:
+    return [
+        json.loads(line.removeprefix(b'data: '))
+        for event in body.split(b'\n\n')
+        for line in event.splitlines() if line.startswith(b'data: ')
+    ]
+
+
+async def position(client: httpx.AsyncClient, data: SeededData) -> int:
+    return (await client.get('/sync', params={'limit': 1000}, headers=data.headers)).json()['next_since']
+
+
+async def reconnect(client: httpx.AsyncClient, data: SeededData, last_event_id: int) -> httpx.Response:
+    # The transport buffers the whole body, so the stream is dropped once it goes live.
+    async def drop_subscription() -> None:
+        while not change_hub.subscriptions.get(f'{data.username}-id'):
+            await asyncio.sleep(0.01)
+
+        for subscription in change_hub.subscriptions[f'{data.username}-id']:
+            subscription.dropped = True
+            subscription.wake()
+
+    response, _ = await asyncio.gather(
+        client.get('/sync/stream', params={'since': 0}, headers={**data.headers, 'Last-Event-ID': str(last_event_id)}),
+        drop_subscription(),
+    )
+
+    return response
+
+
+@pytest.mark.anyio
+async def test_dropped_stream_resumes_from_the_last_event_id(client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    data: SeededData = await seed(2, username='streamer')
+    stream = SyncService.stream(f'{data.username}-id', await position(client, data))
+    assert (await anext(stream)).startswith(b'retry: ')
+
+    next_event = asyncio.ensure_future(anext(stream))
+    await client.patch(f'/tasks/{data.task_ids[0]}/update', json={'title': 'Live'}, headers=data.headers)
+    [received] = change_events(await next_event)
+    assert (received['entity'], received['id'], received['operation']) == ('task', data.task_ids[0], 'upsert')
+
+    # A client too slow to keep up is dropped instead of queueing without bound.
+    monkeypatch.setattr(change_hub, 'max_queued', 1)
+    await client.patch(f'/tasks/{data.task_ids[1]}/update', json={'title': 'Missed'}, headers=data.headers)
+    await client.delete(f'/comments/{data.comment_ids[0]}/delete', headers=data.headers)
+
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+
+    # Last-Event-ID wins over `since`, and the replay covers exactly what the client missed.
+    response: httpx.Response = await reconnect(client, data, received['seq'])
+
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert [(event['entity'], event['id'], event['operation']) for event in change_events(response.content)] == [
+        ('task', data.task_ids[1], 'upsert'),
+        ('comment', data.comment_ids[0], 'delete'),
+    ]
+
+
+@pytest.mark.anyio
+async def test_live_events_already_replayed_are_skipped(database: None) -> None:
+    data: SeededData = await seed(1, username='streamer')
+    owner_id: str = f'{data.username}-id'
+    stream = SyncService.stream(owner_id, 0)
+    await anext(stream)
+
+    replayed: list[dict] = change_events(await anext(stream))
+    last: int = replayed[-1]['seq']
+
+    # Published while the replay ran: the subscription saw it, but the replay already sent it.
+    change_hub.publish(owner_id, last, b'duplicate')
+    change_hub.publish(owner_id, last + 1, b'new')
+
+    assert await anext(stream) == b'new'
+    await stream.aclose()
+    assert owner_id not in change_hub.subscriptions
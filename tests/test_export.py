@@ -0,0 +1,108 @@
+import csv
+import gzip
+import io
+import json
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from tasks import service
+
+from conftest import SeededData, seed
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Several chunks per export, so the batching and the gzip stream see more than one.
+    monkeypatch.setattr(settings, 'EXPORT_BATCH_SIZE', 2)
+
+
+@pytest.mark.anyio
+async def test_ndjson_export_holds_live_and_archived_tasks(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='exporter')
+    await client.delete(f'/tasks/{data.task_ids[-1]}/delete', headers=data.headers)
+
+    response: httpx.Response = await client.get('/tasks/export', headers=data.headers)
+
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert response.headers['content-disposition'] == 'attachment; filename="tasks.ndjson"'
+    records: dict[str, dict] = {record['id']: record for record in map(json.loads, response.text.splitlines())}
+    assert records.keys() == {*data.task_ids[:-1], *data.archived_task_ids}
+    assert sorted(records[data.task_ids[0]]['tags']) == ['tag0', 'tag1', 'tag2']
+    assert records[data.task_ids[0]]['comment_count'] == 2
+    assert records[data.archived_task_ids[0]]['status'] == 'completed'
+
+
+@pytest.mark.anyio
+async def test_csv_export_has_a_header_and_one_row_per_task(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='csv_exporter')
+
+    response: httpx.Response = await client.get('/tasks/export', params={'format': 'csv'}, headers=data.headers)
+
+    assert response.headers['content-type'].startswith('text/csv')
+    rows: list[dict] = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row['id'] for row in rows} == {*data.task_ids, *data.archived_task_ids}
+    first: dict = next(row for row in rows if row['id'] == data.task_ids[0])
+    assert (sorted(json.loads(first['tags'])), first['comment_count'], first['due_date']) == (
+        ['tag0', 'tag1', 'tag2'], '2', '2030-01-01T00:00:00',
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('export_format', ['ndjson', 'csv'])
+async def test_compressed_export_gunzips_to_the_plain_one(client: httpx.AsyncClient, export_format: str) -> None:
+    data: SeededData = await seed(3, username=f'gzip_exporter_{export_format}')
+
+    plain: httpx.Response = await client.get('/tasks/export', params={'format': export_format}, headers=data.headers)
+    compressed: httpx.Response = await client.get(
+        '/tasks/export', params={'format': export_format, 'compress': True}, headers=data.headers,
+    )
+
+    assert compressed.headers['content-type'] == 'application/gzip'
+    assert compressed.headers['content-disposition'] == f'attachment; filename="tasks.{export_format}.gz"'
+    assert gzip.decompress(compressed.content) == plain.content
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('export_format', ['ndjson', 'csv'])
+async def test_tag_titles_survive_separators_and_quotes(client: httpx.AsyncClient, export_format: str) -> None:
+    data: SeededData = await seed(1, username=f'tricky_exporter_{export_format}')
+    titles: list[str] = ['a|b', 'c,"d"']
+
+    for title in titles:
+        response: httpx.Response = await client.post(
+            f'/tasks/{data.task_ids[0]}/tags', params={'title': title}, headers=data.headers,
+        )
+        assert response.status_code == 200, response.text
+
+    response = await client.get('/tasks/export', params={'format': export_format}, headers=data.headers)
+
+    if export_format == 'csv':
+        row: dict = next(row for row in csv.DictReader(io.StringIO(response.text)) if row['id'] == data.task_ids[0])
+        tags: list[str] = json.loads(row['tags'])
+    else:
+        tags = next(record for record in map(json.loads, response.text.splitlines()) if record['id'] == data.task_ids[0])['tags']
+
+    assert set(titles) <= set(tags)
+
+
+@pytest.mark.anyio
+async def test_export_pages_with_a_short_session_per_batch(client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    data: SeededData = await seed(3, username='paged_exporter')
+    sessions: list[int] = []
+    open_session = service.async_session_maker
+
+    def counted() -> AsyncSession:
+        sessions.append(len(sessions))
+
+        return open_session()
+
+    monkeypatch.setattr(service, 'async_session_maker', counted)
+
+    response: httpx.Response = await client.get('/tasks/export', headers=data.headers)
+
+    # Three live tasks and three archived ones in pages of two: two full pages and a short one for each.
+    assert len(response.text.splitlines()) == 6
+    assert len(sessions) == 4
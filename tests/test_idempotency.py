@@ -0,0 +1,153 @@
+import asyncio
+from typing import Awaitable
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_engine, async_session_maker
+from tasks.models import Task
+from tasks.repository import IdempotencyKeyRepository
+from tasks.schemas import TaskCreate
+from tasks.service import IdempotencyService, TaskService, idempotent_writes
+
+from conftest import SeededData, seed
+
+
+NEW_TASK: dict = {'title': 'New task', 'description': 'Created.'}
+
+
+async def count_tasks(owner_id: str) -> int:
+    async with async_engine.connect() as connection:
+        return (await connection.execute(select(func.count()).select_from(Task).filter_by(owner_id=owner_id))).scalar_one()
+
+
+async def write_once(owner_id: str) -> tuple[int, bytes, bool]:
+    async def call(session: AsyncSession) -> tuple[int, bytes]:
+        task: Task = await TaskService(session).create(TaskCreate(**NEW_TASK), owner_id=owner_id)
+
+        return 201, task.id.encode()
+
+    async with async_session_maker() as session:
+        return await IdempotencyService(session).run(owner_id, 'create-1', b'fingerprint', call)
+
+
+def create_task(client: httpx.AsyncClient, data: SeededData, key: str, body: dict = NEW_TASK) -> Awaitable[httpx.Response]:
+    return client.post('/tasks', json=body, headers={**data.headers, 'Idempotency-Key': key})
+
+
+@pytest.mark.anyio
+async def test_retry_replays_the_stored_response(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='retrier')
+
+    first: httpx.Response = await create_task(client, data, 'create-1')
+    retry: httpx.Response = await create_task(client, data, 'create-1')
+
+    assert (first.status_code, retry.status_code) == (201, 201)
+    assert retry.content == first.content
+    assert ('idempotent-replayed' in first.headers, retry.headers['idempotent-replayed']) == (False, 'true')
+    assert await count_tasks(f'{data.username}-id') == 1 + 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_run_once(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='retrier')
+
+    responses: list[httpx.Response] = await asyncio.gather(*(create_task(client, data, 'create-1') for _ in range(3)))
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.content for response in responses}) == 1
+    assert await count_tasks(f'{data.username}-id') == 1 + 1
+
+
+@pytest.mark.anyio
+async def test_disconnect_mid_write_still_stores_the_response(client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    data: SeededData = await seed(1, username='retrier')
+    owner_id: str = f'{data.username}-id'
+    stored: asyncio.Event = asyncio.Event()
+    release: asyncio.Event = asyncio.Event()
+    complete = IdempotencyKeyRepository.complete
+
+    async def complete_later(self: IdempotencyKeyRepository, *args) -> None:
+        stored.set()
+        await release.wait()
+        await complete(self, *args)
+
+    monkeypatch.setattr(IdempotencyKeyRepository, 'complete', complete_later)
+
+    # The caller goes away after the task is written but before its response is stored.
+    first: asyncio.Task = asyncio.create_task(write_once(owner_id))
+    await stored.wait()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    while idempotent_writes.flights:
+        await asyncio.sleep(0)
+
+    status_code, _, replayed = await write_once(owner_id)
+
+    assert (status_code, replayed) == (201, True)
+    assert await count_tasks(owner_id) == 1 + 1
+
+
+@pytest.mark.anyio
+async def test_write_is_rolled_back_when_its_response_is_not_stored(client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    data: SeededData = await seed(1, username='retrier')
+    owner_id: str = f'{data.username}-id'
+
+    async def complete_fails(self: IdempotencyKeyRepository, *args) -> None:
+        raise RuntimeError('Response was not stored.')
+
+    monkeypatch.setattr(IdempotencyKeyRepository, 'complete', complete_fails)
+
+    with pytest.raises(RuntimeError):
+        await write_once(owner_id)
+
+    assert await count_tasks(owner_id) == 1
+    monkeypatch.undo()
+    status_code, _, replayed = await write_once(owner_id)
+
+    assert (status_code, replayed) == (201, False)
+    assert await count_tasks(owner_id) == 1 + 1
+
+
+@pytest.mark.anyio
+async def test_key_reused_for_a_different_request_is_422(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='retrier')
+    await create_task(client, data, 'create-1')
+
+    response: httpx.Response = await create_task(client, data, 'create-1', {**NEW_TASK, 'title': 'Other task'})
+
+    assert (response.status_code, response.json()) == (
+        422, {'detail': 'Idempotency-Key was already used for a different request.'},
+    )
+    assert await count_tasks(f'{data.username}-id') == 1 + 1
+
+
+@pytest.mark.anyio
+async def test_keys_are_scoped_to_their_owner(client: httpx.AsyncClient) -> None:
+    mine: SeededData = await seed(1, username='retrier')
+    theirs: SeededData = await seed(1, username='other_retrier')
+
+    await create_task(client, mine, 'create-1')
+    response: httpx.Response = await create_task(client, theirs, 'create-1')
+
+    assert response.status_code == 201 and 'idempotent-replayed' not in response.headers
+    assert await count_tasks(f'{theirs.username}-id') == 1 + 1
+
+
+@pytest.mark.anyio
+async def test_client_errors_are_replayed_too(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='retrier')
+    request: dict = {
+        'params': {'task_id': 'missing'}, 'json': {'comment': 'Lost.'}, 'headers': {**data.headers, 'Idempotency-Key': 'comment-1'},
+    }
+
+    first: httpx.Response = await client.post('/comments', **request)
+    retry: httpx.Response = await client.post('/comments', **request)
+
+    assert (first.status_code, retry.status_code) == (404, 404)
+    assert (retry.content, retry.headers['idempotent-replayed']) == (first.content, 'true')
@@ -0,0 +1,76 @@
+import json
+from typing import AsyncIterator
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from database import async_engine
+from tasks.models import Task, Tag
+
+from conftest import SeededData, seed
+
+
+LINES: list[bytes] = [
+    json.dumps({'title': f'Imported {i}', 'tags': ['Imported', 'imported '], 'comments': ['Imported.']}).encode()
+    for i in range(5)
+]
+
+
+class Interrupted(Exception):
+    pass
+
+
+async def interrupted_after(lines: int) -> AsyncIterator[bytes]:
+    for line in LINES[:lines]:
+        yield line + b'\n'
+
+    raise Interrupted
+
+
+async def count_rows(model: type, owner_id: str) -> int:
+    async with async_engine.connect() as connection:
+        return (await connection.execute(select(func.count()).select_from(model).filter_by(owner_id=owner_id))).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_import_resumes_after_the_last_committed_batch(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='importer')
+    owner_id: str = f'{data.username}-id'
+    params: dict = {'import_id': 'resumable', 'batch_size': 2}
+
+    # The upload breaks off after line 3, so only the first batch of two is committed.
+    with pytest.raises(Interrupted):
+        await client.post('/tasks/import', params=params, content=interrupted_after(3), headers=data.headers)
+
+    assert await count_rows(Task, owner_id) == 1 + 2
+
+    response: httpx.Response = await client.post(
+        '/tasks/import', params=params, content=b'\n'.join(LINES), headers=data.headers,
+    )
+
+    assert response.status_code == 200, response.text
+    result: dict = response.json()
+    assert (result['resumed_from_line'], result['rows_imported'], result['is_completed']) == (2, 3, True)
+    assert await count_rows(Task, owner_id) == 1 + 5
+    # Both spellings normalize to one tag, which the resumed run reuses instead of creating again.
+    assert await count_rows(Tag, owner_id) == 2 + 1
+
+    replay: httpx.Response = await client.post(
+        '/tasks/import', params=params, content=b'\n'.join(LINES), headers=data.headers,
+    )
+
+    assert replay.json()['rows_imported'] == 0
+    assert await count_rows(Task, owner_id) == 1 + 5
+
+
+@pytest.mark.anyio
+async def test_import_reports_bad_rows_and_keeps_the_rest(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='careless_importer')
+    body: bytes = b'\n'.join([LINES[0], b'not json', json.dumps({'description': 'Untitled.'}).encode(), LINES[1]])
+
+    response: httpx.Response = await client.post('/tasks/import', content=body, headers=data.headers)
+
+    result: dict = response.json()
+    assert (result['rows_imported'], result['rows_failed']) == (2, 2)
+    assert [error['line'] for error in result['errors']] == [2, 3]
@@ -0,0 +1,68 @@
+import logging
+import re
+
+import httpx
+import pytest
+
+from config import settings
+
+from conftest import QueryCounter, SeededData, seed
+
+
+SERVER_TIMING = re.compile(r'db;dur=(?P<duration>\d+\.\d{2});desc="(?P<count>\d+) queries"')
+
+
+@pytest.mark.anyio
+async def test_server_timing_and_log_carry_the_request_statements(
+    client: httpx.AsyncClient, query_counter: QueryCounter, caplog: pytest.LogCaptureFixture,
+) -> None:
+    data: SeededData = await seed(2, username='timed')
+    caplog.set_level(logging.DEBUG, logger='middleware')
+
+    with query_counter.measure():
+        response: httpx.Response = await client.get(f'/tasks/{data.task_ids[0]}', headers=data.headers)
+
+    timing = SERVER_TIMING.fullmatch(response.headers['Server-Timing'])
+    record: logging.LogRecord = next(record for record in caplog.records if record.name == 'middleware')
+
+    assert response.status_code == 200
+    assert timing is not None, response.headers['Server-Timing']
+    assert int(timing['count']) == query_counter.count > 0
+    assert float(timing['duration']) > 0
+    assert (record.method, record.route, record.db_statements) == ('GET', '/tasks/{task_id}', query_counter.count)
+    assert record.db_duration_ms == round(float(timing['duration']), 2)
+
+
+@pytest.mark.anyio
+async def test_repeated_statements_are_logged_as_a_warning(
+    client: httpx.AsyncClient, caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    data: SeededData = await seed(2, username='timed')
+    monkeypatch.setattr(settings, 'DATABASE_WARN_REPEATED_STATEMENTS', 1)
+    caplog.set_level(logging.DEBUG, logger='middleware')
+
+    await client.get(f'/tasks/{data.task_ids[0]}', headers=data.headers)
+
+    record: logging.LogRecord = next(record for record in caplog.records if record.name == 'middleware')
+
+    assert record.levelno == logging.WARNING
+    assert record.getMessage().startswith('Possible N+1 query pattern on GET /tasks/{task_id}: ')
+    assert record.db_repeated_statements > 0
+
+
+@pytest.mark.anyio
+async def test_paged_export_counts_repeats_per_page(
+    client: httpx.AsyncClient, caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    data: SeededData = await seed(6, username='paged')
+    monkeypatch.setattr(settings, 'EXPORT_BATCH_SIZE', 1)
+    monkeypatch.setattr(settings, 'DATABASE_WARN_REPEATED_STATEMENTS', 2)
+    caplog.set_level(logging.DEBUG, logger='middleware')
+
+    response: httpx.Response = await client.get('/tasks/export', headers=data.headers)
+
+    record: logging.LogRecord = next(record for record in caplog.records if record.name == 'middleware')
+
+    assert response.status_code == 200
+    assert record.levelno == logging.DEBUG
+    assert record.db_statements > 12
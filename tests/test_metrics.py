@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import metrics
+from users.utils import PasswordHasher
+
+from conftest import SeededData, seed, seed_superuser
+
+
+SCRAPER_HEADERS: dict[str, str] = {'Authorization': 'Bearer test-metrics-token'}
+
+
+def sample(metric: metrics.Metric, labels: metrics.Labels = ()) -> float:
+    return dict(metric.collect()).get(labels, 0.0)
+
+
+@pytest.mark.anyio
+async def test_requests_are_counted_by_route_template(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='scraped')
+    await client.get(f'/tasks/{data.task_ids[0]}', headers=data.headers)
+    await client.get('/no/such/path', headers=data.headers)
+
+    body: str = (await client.get('/metrics', headers=SCRAPER_HEADERS)).text
+
+    assert 'http_responses_total{method="GET",route="/tasks/{task_id}",status="200"}' in body
+    assert 'http_responses_total{method="GET",route="<unmatched>",status="404"}' in body
+    assert f'/tasks/{data.task_ids[0]}"' not in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/tasks/{task_id}",le="+Inf"}' in body
+
+
+@pytest.mark.anyio
+async def test_metrics_need_the_metrics_token(client: httpx.AsyncClient) -> None:
+    superuser: SeededData = await seed_superuser('scraper')
+
+    assert (await client.get('/metrics')).status_code == 401
+    assert (await client.get('/metrics', headers={'Authorization': 'Bearer wrong'})).status_code == 401
+    assert (await client.get('/metrics', headers=superuser.headers)).status_code == 401
+    assert (await client.get('/metrics', headers=SCRAPER_HEADERS)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_password_hashing_reports_queued_and_running_calls() -> None:
+    hasher: PasswordHasher = PasswordHasher(threads=1)
+    started: threading.Event = threading.Event()
+    release: threading.Event = threading.Event()
+
+    def slow(value: str) -> str:
+        started.set()
+        release.wait()
+
+        return value
+
+    calls = [asyncio.create_task(hasher.run('hash', slow, value)) for value in ('first', 'second', 'third')]
+    await asyncio.to_thread(started.wait)
+    await asyncio.sleep(0)
+
+    # One call holds the only thread, the others wait; the last one's request goes away meanwhile.
+    assert (sample(metrics.password_hash_operations, ('running',)), sample(metrics.password_hash_operations, ('queued',))) == (1, 2)
+    calls[2].cancel()
+    await asyncio.gather(calls[2], return_exceptions=True)
+    assert sample(metrics.password_hash_operations, ('queued',)) == 1
+
+    release.set()
+
+    assert await asyncio.gather(*calls[:2]) == ['first', 'second']
+    assert (sample(metrics.password_hash_operations, ('running',)), sample(metrics.password_hash_operations, ('queued',))) == (0, 0)
+    hasher.executor.shutdown()
@@ -0,0 +1,76 @@
+import json
+import logging
+from pathlib import Path
+
+import httpx
+import pytest
+
+import openapi_schema
+from main import app
+
+
+@pytest.fixture
+def schema_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path: Path = tmp_path / 'openapi.json'
+    openapi_schema.write(app, str(path))
+
+    # Drop whatever schema the app built or loaded, and put its own generator back afterwards.
+    monkeypatch.setattr(app, 'openapi_schema', None)
+    monkeypatch.setattr(app, 'openapi', app.openapi)
+
+    return path
+
+
+async def served(path: Path) -> dict:
+    openapi_schema.use_prebuilt(app, str(path))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        response: httpx.Response = await client.get('/openapi.json')
+
+    assert response.status_code == 200
+
+    return response.json()
+
+
+@pytest.mark.anyio
+async def test_prebuilt_schema_matches_the_generated_one(schema_path: Path) -> None:
+    generated: dict = json.loads(json.dumps(app.openapi()))
+    app.openapi_schema = None
+
+    assert await served(schema_path) == generated
+
+
+@pytest.mark.anyio
+async def test_prebuilt_schema_is_served_from_the_file(schema_path: Path) -> None:
+    document: dict = json.loads(schema_path.read_text())
+    document['schema']['info']['title'] = 'From the file'
+    schema_path.write_text(json.dumps(document))
+
+    assert (await served(schema_path))['info']['title'] == 'From the file'
+
+
+@pytest.mark.anyio
+async def test_stale_schema_is_generated_instead(schema_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    document: dict = json.loads(schema_path.read_text())
+    document['fingerprint'] = 'stale'
+    document['schema']['info']['title'] = 'From the file'
+    schema_path.write_text(json.dumps(document))
+
+    assert (await served(schema_path))['info']['title'] == app.title
+    assert 'out of date' in caplog.text
+
+
+@pytest.mark.anyio
+async def test_missing_schema_is_generated_instead(schema_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    assert (await served(schema_path.with_name('missing.json')))['info']['title'] == app.title
+    assert 'Could not read' in caplog.text
+
+
+def test_fingerprint_follows_the_source(tmp_path: Path) -> None:
+    schemas: Path = tmp_path / 'schemas.py'
+    schemas.write_text("Title = Annotated[str, StringConstraints(max_length=30)]\n")
+    before: str = openapi_schema.fingerprint(app, tmp_path)
+
+    schemas.write_text("Title = Annotated[str, StringConstraints(max_length=60)]\n")
+
+    assert openapi_schema.fingerprint(app, tmp_path) != before
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from starlette.middleware import Middleware
+
+import middleware
+from config import settings
+from main import app
+from middleware import ProfilingMiddleware
+
+from conftest import SeededData, seed, seed_superuser
+
+
+@pytest.fixture
+def profile_dir(database: None, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # The tests run with profiling off; put the middleware back where main adds it, inside the others.
+    monkeypatch.setattr(settings, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'user_middleware', [*app.user_middleware, Middleware(ProfilingMiddleware)])
+    monkeypatch.setattr(app, 'middleware_stack', None)
+
+    return tmp_path
+
+
+@pytest.mark.anyio
+async def test_superuser_request_stores_profile_and_metadata(
+    client: httpx.AsyncClient, profile_dir: Path,
+) -> None:
+    data: SeededData = await seed_superuser('profiler')
+
+    response: httpx.Response = await client.get(
+        f'/tasks/{data.task_ids[0]}', params={'profile': ''}, headers=data.headers,
+    )
+    profile_id: str = response.headers['X-Profile-Id']
+    metadata: dict = json.loads((profile_dir / f'{profile_id}.json').read_text())
+
+    assert response.status_code == 200
+    assert (profile_dir / f'{profile_id}.pstats').stat().st_size > 0
+    assert {key: metadata[key] for key in ('id', 'method', 'path', 'route', 'username', 'overlapping_requests')} == {
+        'id': profile_id,
+        'method': 'GET',
+        'path': f'/tasks/{data.task_ids[0]}',
+        'route': '/tasks/{task_id}',
+        'username': 'profiler',
+        'overlapping_requests': 0,
+    }
+    assert len(metadata['sql_timeline']) == metadata['db_statements'] > 0
+    assert 'function calls' in metadata['summary']
+
+
+@pytest.mark.anyio
+async def test_profiling_needs_the_flag_and_a_superuser(
+    client: httpx.AsyncClient, profile_dir: Path,
+) -> None:
+    superuser: SeededData = await seed_superuser('profiler')
+    user: SeededData = await seed(1, username='regular')
+
+    responses: list[httpx.Response] = [
+        await client.get('/tasks', headers=superuser.headers),
+        await client.get('/tasks', params={'profiles': ''}, headers=superuser.headers),
+        await client.get('/tasks', headers={**user.headers, 'X-Profile': '1'}),
+        await client.get('/tasks', params={'profile': ''}),
+    ]
+
+    assert [response.status_code for response in responses] == [200, 200, 200, 401]
+    assert not any('X-Profile-Id' in response.headers for response in responses)
+    assert not list(profile_dir.iterdir())
+
+    response: httpx.Response = await client.get('/tasks', headers={**superuser.headers, 'X-Profile': '1'})
+
+    assert 'X-Profile-Id' in response.headers
+
+
+@pytest.mark.anyio
+async def test_superuser_lookup_is_cached_per_token(
+    client: httpx.AsyncClient, profile_dir: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    superuser: SeededData = await seed_superuser('profiler')
+    user: SeededData = await seed(1, username='regular')
+    lookups: list[str] = []
+    get_user_by_token = middleware.get_user_by_token
+
+    async def counted(session, token: str):
+        lookups.append(token)
+
+        return await get_user_by_token(session, token)
+
+    monkeypatch.setattr(middleware, 'get_user_by_token', counted)
+
+    for data in (superuser, user, superuser, user):
+        await client.get('/tasks', params={'profile': ''}, headers=data.headers)
+
+    assert len(lookups) == 2
@@ -0,0 +1,122 @@
+from collections import Counter
+
+import httpx
+import pytest
+from sqlalchemy import Table, func, select
+
+from database import Base, async_engine, async_session_maker
+from tasks.models import Change, Comment, Tag, Task, TaskTag
+from tasks.purger import purge
+from tasks.repository import TaskRepository
+from users.service import UserService
+from users.utils import create_refresh_token
+
+from conftest import SeededData, seed
+
+
+async def count(table: Table, *conditions) -> int:
+    async with async_engine.connect() as connection:
+        return (await connection.execute(select(func.count()).select_from(table).where(*conditions))).scalar_one()
+
+
+async def owned_rows(owner_id: str) -> dict[str, int]:
+    """Rows per table that belong to the owner, the user row included."""
+    rows: dict[str, int] = {}
+
+    for table in Base.metadata.sorted_tables:
+        column = table.c.get('owner_id') if table.name != 'users' else table.c.id
+
+        if column is not None:
+            rows[table.name] = await count(table, column == owner_id)
+
+    return rows
+
+
+@pytest.mark.anyio
+async def test_deleted_task_is_hidden_everywhere(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='deleter')
+    task_id: str = data.task_ids[0]
+
+    response: httpx.Response = await client.delete(f'/tasks/{task_id}/delete', headers=data.headers)
+    assert response.status_code == 200
+
+    assert (await client.get(f'/tasks/{task_id}', headers=data.headers)).status_code == 404
+    assert (await client.patch(f'/tasks/{task_id}/update', json={'title': 'Back'}, headers=data.headers)).status_code == 404
+    assert (await client.delete(f'/tasks/{task_id}/delete', headers=data.headers)).status_code == 404
+    tasks: list[dict] = (await client.get('/tasks', params={'limit': 100}, headers=data.headers)).json()
+    assert [task['id'] for task in tasks] == [data.task_ids[1]]
+    tagged: dict = (await client.get(f'/tags/{data.tag_ids[0]}/tasks', headers=data.headers)).json()
+    assert tagged['tasks'] == []
+    # Its tags no longer count it.
+    tags: list[dict] = (await client.get('/tags', params={'limit': 100}, headers=data.headers)).json()
+    assert {tag['id']: tag['task_count'] for tag in tags}[data.tag_ids[0]] == 0
+
+
+@pytest.mark.anyio
+async def test_deleting_a_deleted_task_changes_nothing(database: None) -> None:
+    data: SeededData = await seed(1, username='deleter')
+    owner_id: str = f'{data.username}-id'
+
+    async with async_session_maker() as session:
+        repository: TaskRepository = TaskRepository(session)
+
+        assert await repository.delete(data.task_ids[0], owner_id)
+        changes: int = await count(Change.__table__, Change.owner_id == owner_id)
+        assert not await repository.delete(data.task_ids[0], owner_id)
+
+    assert await count(Change.__table__, Change.owner_id == owner_id) == changes
+
+
+@pytest.mark.anyio
+async def test_purge_removes_deleted_tasks_and_their_children(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='deleter')
+    deleted: list[str] = data.task_ids[:2]
+
+    for task_id in deleted:
+        await client.delete(f'/tasks/{task_id}/delete', headers=data.headers)
+
+    purged: Counter = await purge(batch_size=1)
+
+    assert (purged['tasks'], purged['comments']) == (2, 4)
+    assert await count(Task.__table__, Task.id.in_(deleted)) == 0
+    assert await count(TaskTag.__table__, TaskTag.task_id.in_(deleted)) == 0
+    assert await count(Comment.__table__, Comment.task_id.in_(deleted)) == 0
+    # The live task keeps its links and comments.
+    assert await count(TaskTag.__table__, TaskTag.task_id == data.task_ids[2]) == 1
+    assert await count(Comment.__table__, Comment.task_id == data.task_ids[2]) == 2
+    assert (await purge(batch_size=1)).total() == 0
+
+
+@pytest.mark.anyio
+async def test_purge_removes_a_deleted_user_and_everything_they_own(client: httpx.AsyncClient) -> None:
+    doomed: SeededData = await seed(2, username='doomed')
+    kept: SeededData = await seed(2, username='kept')
+    await client.post('/tasks', json={'title': 'Last task', 'description': 'Created.'}, headers=doomed.headers)
+    kept_rows: dict[str, int] = await owned_rows(f'{kept.username}-id')
+
+    async with async_session_maker() as session:
+        await UserService(session).delete(f'{doomed.username}-id')
+
+    assert (await client.get('/tasks', headers=doomed.headers)).status_code == 401
+
+    await purge(batch_size=2)
+
+    assert set((await owned_rows(f'{doomed.username}-id')).values()) == {0}
+    assert await count(TaskTag.__table__, TaskTag.task_id.in_(doomed.task_ids)) == 0
+    assert await owned_rows(f'{kept.username}-id') == kept_rows
+    assert await count(Tag.__table__, Tag.owner_id == f'{kept.username}-id') == 3
+
+
+@pytest.mark.anyio
+async def test_deleted_user_cannot_refresh(client: httpx.AsyncClient) -> None:
+    doomed: SeededData = await seed(1, username='doomed')
+    client.cookies.set('refresh_token', create_refresh_token(doomed.username))
+
+    assert (await client.post('/auth/refresh')).status_code == 200
+
+    async with async_session_maker() as session:
+        await UserService(session).delete(f'{doomed.username}-id')
+
+    response: httpx.Response = await client.post('/auth/refresh')
+
+    assert (response.status_code, response.json()) == (401, {'detail': 'Invalid refresh token.'})
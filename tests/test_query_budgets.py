@@ -0,0 +1,229 @@
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+import httpx
+import pytest
+from fastapi.routing import APIRoute
+
+from tasks.events import change_hub
+from tasks.routers import router as task_router
+from users.routers import router as user_router
+from users.utils import create_refresh_token
+
+from conftest import PASSWORD, QueryCounter, SeededData, assert_query_budget, seed
+
+
+DATA_SIZES: tuple[int, ...] = (1, 10, 50)
+
+# Maximum statements per request, auth lookups included, as set when each route was added. These are
+# frozen: lower them when a route gets cheaper, but never raise them here.
+QUERY_BUDGETS: dict[tuple[str, str], int] = {
+    ('POST', '/auth/login'): 2,
+    ('POST', '/auth/register'): 4,
+    ('POST', '/auth/refresh'): 0,
+    ('POST', '/tasks/import'): 9,
+    ('GET', '/tasks/export'): 2,
+    ('POST', '/tasks'): 5,
+    ('GET', '/tasks/agenda'): 4,
+    ('GET', '/tasks/analytics'): 2,
+    ('GET', '/tasks/tagged'): 5,
+    ('GET', '/tasks/{task_id}'): 5,
+    ('GET', '/tasks'): 4,
+    ('PATCH', '/tasks/{task_id}/update'): 9,
+    ('DELETE', '/tasks/{task_id}/delete'): 3,
+    ('POST', '/tasks/{task_id}/restore'): 11,
+    ('POST', '/tasks/{task_id}/tags'): 9,
+    ('DELETE', '/tasks/{task_id}/tags'): 11,
+    ('POST', '/tags'): 3,
+    ('GET', '/tags/suggest'): 2,
+    ('GET', '/tags/{tag_id}/tasks'): 5,
+    ('GET', '/tags/{tag_id}'): 3,
+    ('GET', '/tags'): 2,
+    ('PATCH', '/tags/{tag_id}/update'): 5,
+    ('DELETE', '/tags/{tag_id}/delete'): 6,
+    ('POST', '/comments'): 4,
+    ('GET', '/comments/{comment_id}'): 3,
+    ('GET', '/comments'): 2,
+    ('PATCH', '/comments/{comment_id}/update'): 5,
+    ('DELETE', '/comments/{comment_id}/delete'): 4,
+    ('GET', '/sync'): 7,
+    ('GET', '/sync/stream'): 3,
+    ('POST', '/batch'): 7,
+}
+
+# Statements a later change had to add on top of a frozen budget, keyed by the reason. Record a raise in
+# the same commit as the change that needs it.
+QUERY_BUDGET_RAISES: dict[tuple[str, str], dict[str, int]] = {
+    ('POST', '/tasks/import'): {'change log rows for each batch': 2, 'tag task_count update': 1},
+    ('POST', '/tasks'): {'change log row': 1, 'daily stats upsert': 1},
+    ('PATCH', '/tasks/{task_id}/update'): {'change log row': 1, 'daily stats lookup and upsert for a completion': 2},
+    ('POST', '/tasks/{task_id}/tags'): {'change log row': 1, 'tag task_count update': 1},
+    ('DELETE', '/tasks/{task_id}/tags'): {'change log row': 1, 'tag task_count update': 1},
+    ('POST', '/tags'): {'change log row': 1},
+    ('PATCH', '/tags/{tag_id}/update'): {'change log row': 1, 'duplicate title check': 1},
+    ('DELETE', '/tags/{tag_id}/delete'): {'change log row': 1},
+    ('POST', '/comments'): {'change log row': 1},
+    ('PATCH', '/comments/{comment_id}/update'): {'change log row': 1},
+    ('DELETE', '/comments/{comment_id}/delete'): {'change log row': 1},
+    ('DELETE', '/tasks/{task_id}/delete'): {'tag task_count update': 1, 'daily stats update': 1},
+    ('POST', '/tasks/{task_id}/restore'): {'tag task_count update': 1},
+    ('POST', '/auth/refresh'): {'user lookup to turn away deleted users': 1},
+    ('GET', '/tasks/export'): {'archived tasks paged apart from the live ones': 1},
+}
+
+RouteRequest = Callable[[httpx.AsyncClient, SeededData, int], Awaitable[httpx.Response]]
+
+IMPORT_BODY: bytes = '\n'.join(
+    json.dumps({'title': f'Imported {i}', 'tags': ['imported', f'group{i % 2}'], 'comments': ['Imported.']})
+    for i in range(3)
+).encode()
+
+
+
+async def replay_stream(client: httpx.AsyncClient, data: SeededData) -> httpx.Response:
+    # The transport buffers the whole body, so the stream is dropped once it goes live.
+    async def drop_subscriptions() -> None:
+        while not change_hub.subscriptions:
+            await asyncio.sleep(0.01)
+
+        for subscriptions in list(change_hub.subscriptions.values()):
+            for subscription in subscriptions:
+                subscription.dropped = True
+                subscription.wake()
+
+    response, _ = await asyncio.gather(
+        client.get('/sync/stream', params={'since': 0}, headers=data.headers), drop_subscriptions(),
+    )
+
+    return response
+
+
+REQUESTS: dict[tuple[str, str], RouteRequest] = {
+    ('POST', '/auth/login'): lambda client, data, size: client.post(
+        '/auth/login', data={'username': data.username, 'password': PASSWORD},
+    ),
+    ('POST', '/auth/register'): lambda client, data, size: client.post('/auth/register', json={
+        'fullname': 'New User', 'username': f'new_user_{size}', 'email': f'new.user{size}@example.com', 'hashed_password': PASSWORD,
+    }),
+    ('POST', '/auth/refresh'): lambda client, data, size: client.post(
+        '/auth/refresh', cookies={'refresh_token': create_refresh_token(data.username)},
+    ),
+    ('POST', '/tasks/import'): lambda client, data, size: client.post(
+        '/tasks/import', content=IMPORT_BODY, headers=data.headers,
+    ),
+    ('GET', '/tasks/export'): lambda client, data, size: client.get('/tasks/export', headers=data.headers),
+    ('POST', '/tasks'): lambda client, data, size: client.post(
+        '/tasks', json={'title': 'New task', 'description': 'Created.'}, headers=data.headers,
+    ),
+    ('GET', '/tasks/agenda'): lambda client, data, size: client.get(
+        '/tasks/agenda', params={'from': '2029-12-31', 'to': '2030-01-31', 'tz': 'Europe/Berlin'}, headers=data.headers,
+    ),
+    ('GET', '/tasks/analytics'): lambda client, data, size: client.get(
+        '/tasks/analytics', params={'from': '2030-01-01', 'to': '2030-03-31', 'granularity': 'week'}, headers=data.headers,
+    ),
+    ('GET', '/tasks/tagged'): lambda client, data, size: client.get(
+        '/tasks/tagged', params={'tag_id': [data.tag_ids[0], data.tag_ids[-1]]}, headers=data.headers,
+    ),
+    ('GET', '/tasks/{task_id}'): lambda client, data, size: client.get(f'/tasks/{data.task_ids[0]}', headers=data.headers),
+    ('GET', '/tasks'): lambda client, data, size: client.get('/tasks', params={'limit': size}, headers=data.headers),
+    ('PATCH', '/tasks/{task_id}/update'): lambda client, data, size: client.patch(
+        f'/tasks/{data.task_ids[0]}/update', json={'title': 'Updated', 'status': 'completed'}, headers=data.headers,
+    ),
+    ('DELETE', '/tasks/{task_id}/delete'): lambda client, data, size: client.delete(
+        f'/tasks/{data.task_ids[0]}/delete', headers=data.headers,
+    ),
+    ('POST', '/tasks/{task_id}/restore'): lambda client, data, size: client.post(
+        f'/tasks/{data.archived_task_ids[0]}/restore', headers=data.headers,
+    ),
+    ('POST', '/tasks/{task_id}/tags'): lambda client, data, size: client.post(
+        f'/tasks/{data.task_ids[0]}/tags', params={'tag_id': data.spare_tag_id}, headers=data.headers,
+    ),
+    ('DELETE', '/tasks/{task_id}/tags'): lambda client, data, size: client.delete(
+        f'/tasks/{data.task_ids[0]}/tags', params={'tag_id': data.tag_ids[0]}, headers=data.headers,
+    ),
+    ('POST', '/tags'): lambda client, data, size: client.post('/tags', json={'title': 'newtag'}, headers=data.headers),
+    ('GET', '/tags/suggest'): lambda client, data, size: client.get(
+        '/tags/suggest', params={'prefix': 'TAG1', 'limit': size}, headers=data.headers,
+    ),
+    ('GET', '/tags/{tag_id}/tasks'): lambda client, data, size: client.get(
+        f'/tags/{data.tag_ids[-1]}/tasks', params={'limit': size}, headers=data.headers,
+    ),
+    ('GET', '/tags/{tag_id}'): lambda client, data, size: client.get(f'/tags/{data.tag_ids[0]}', headers=data.headers),
+    ('GET', '/tags'): lambda client, data, size: client.get(
+        '/tags', params={'sort_by': 'task_count', 'order': 'desc', 'limit': size}, headers=data.headers,
+    ),
+    ('PATCH', '/tags/{tag_id}/update'): lambda client, data, size: client.patch(
+        f'/tags/{data.tag_ids[0]}/update', json={'title': 'renamed'}, headers=data.headers,
+    ),
+    ('DELETE', '/tags/{tag_id}/delete'): lambda client, data, size: client.delete(
+        f'/tags/{data.tag_ids[0]}/delete', headers=data.headers,
+    ),
+    ('POST', '/comments'): lambda client, data, size: client.post(
+        '/comments', params={'task_id': data.task_ids[0]}, json={'comment': 'New comment.'}, headers=data.headers,
+    ),
+    ('GET', '/comments/{comment_id}'): lambda client, data, size: client.get(
+        f'/comments/{data.comment_ids[0]}', headers=data.headers,
+    ),
+    ('GET', '/comments'): lambda client, data, size: client.get('/comments', params={'limit': size}, headers=data.headers),
+    ('GET', '/sync'): lambda client, data, size: client.get('/sync', params={'limit': 4 * size}, headers=data.headers),
+    ('GET', '/sync/stream'): lambda client, data, size: replay_stream(client, data),
+    ('POST', '/batch'): lambda client, data, size: client.post('/batch', json={'operations': [
+        {'method': 'GET', 'path': f'/tasks/{data.task_ids[0]}'},
+        {'method': 'GET', 'path': '/tags', 'query': {'limit': size}},
+        {'method': 'GET', 'path': '/comments', 'query': {'limit': size}},
+        {'method': 'GET', 'path': f'/tasks/{data.task_ids[0]}'},
+    ]}, headers=data.headers),
+    ('PATCH', '/comments/{comment_id}/update'): lambda client, data, size: client.patch(
+        f'/comments/{data.comment_ids[0]}/update', json={'comment': 'Edited.'}, headers=data.headers,
+    ),
+    ('DELETE', '/comments/{comment_id}/delete'): lambda client, data, size: client.delete(
+        f'/comments/{data.comment_ids[0]}/delete', headers=data.headers,
+    ),
+}
+
+
+def query_budget(route: tuple[str, str]) -> int:
+    return QUERY_BUDGETS[route] + sum(QUERY_BUDGET_RAISES.get(route, {}).values())
+
+
+def api_routes() -> list[tuple[str, str]]:
+    return sorted(
+        (method, route.path)
+        for router in (task_router, user_router)
+        for route in router.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    )
+
+
+def test_every_route_declares_a_budget() -> None:
+    routes: set[tuple[str, str]] = set(api_routes())
+
+    assert routes - QUERY_BUDGETS.keys() == set(), 'declare a query budget for new routes'
+    assert routes - REQUESTS.keys() == set(), 'add a request for new routes'
+    assert QUERY_BUDGETS.keys() - routes == set(), 'remove budgets of deleted routes'
+    assert QUERY_BUDGET_RAISES.keys() - routes == set(), 'remove raises of deleted routes'
+
+
+def test_every_raise_states_its_reason() -> None:
+    for route, raises in QUERY_BUDGET_RAISES.items():
+        for reason, statements in raises.items():
+            assert reason.strip() and statements > 0, f'{" ".join(route)}: {reason!r} raises by {statements}'
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('route', api_routes(), ids=' '.join)
+async def test_route_stays_within_query_budget(client: httpx.AsyncClient, query_counter: QueryCounter, route: tuple[str, str]) -> None:
+    counts: dict[int, int] = {}
+
+    for size in DATA_SIZES:
+        data: SeededData = await seed(size, username=f'owner_{size}')
+
+        with query_counter.measure():
+            response: httpx.Response = await REQUESTS[route](client, data, size)
+
+        assert response.status_code < 400, response.text
+        assert_query_budget(query_counter, query_budget(route), f'{" ".join(route)} with {size} rows')
+        counts[size] = query_counter.count
+
+    assert len(set(counts.values())) == 1, f'statement count grows with data size: {counts}'
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import asc, select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+from database import async_engine, async_session_maker
+from tasks.models import Comment, Tag, Task
+from tasks.records import comment_list_adapter, tag_list_adapter, task_list_adapter
+from tasks.repository import CommentRepository, TagRepository, TaskRepository
+from tasks.schemas import CommentRead, TagRead, TaskRead
+
+from conftest import SeededData, seed
+
+
+async def seed_nullable_fields() -> SeededData:
+    data: SeededData = await seed(3, username='serialized')
+
+    # One task without a due date, one without a description and one edited comment, next to the seeded ones.
+    async with async_engine.begin() as connection:
+        await connection.execute(update(Task).where(Task.id == data.task_ids[1]).values(due_date=None))
+        await connection.execute(update(Task).where(Task.id == data.task_ids[2]).values(description=None))
+        await connection.execute(
+            update(Comment).where(Comment.id == data.comment_ids[0]).values(updated_at=datetime(2025, 3, 4, 5, 6, 7, 89))
+        )
+
+    return data
+
+
+@pytest.mark.anyio
+async def test_task_records_serialize_like_the_orm_models(database: None) -> None:
+    data: SeededData = await seed_nullable_fields()
+    owner_id: str = f'{data.username}-id'
+
+    async with async_session_maker() as session:
+        records = await TaskRepository(session).get_all_records(1, 10, Task.title, asc, owner_id)
+        tasks: list[Task] = list((await session.execute(
+            select(Task)
+            .filter_by(owner_id=owner_id)
+            .options(selectinload(Task.related_tags), selectinload(Task.comments).joinedload(Comment.owner))
+            .order_by(Task.title)
+        )).scalars())
+
+    expected: bytes = TypeAdapter(list[TaskRead]).dump_json(
+        [TaskRead.model_validate(task, from_attributes=True) for task in tasks]
+    )
+
+    assert len(tasks) == 3
+    assert task_list_adapter.dump_json(records) == expected
+
+
+@pytest.mark.anyio
+async def test_tag_and_comment_records_serialize_like_the_orm_models(database: None) -> None:
+    data: SeededData = await seed_nullable_fields()
+    owner_id: str = f'{data.username}-id'
+
+    async with async_session_maker() as session:
+        tag_records = await TagRepository(session).get_all_records(1, 10, Tag.title, asc, owner_id)
+        comment_records = await CommentRepository(session).get_all_records(1, 10, owner_id)
+        tags: list[Tag] = list((await session.execute(
+            select(Tag).filter_by(owner_id=owner_id).order_by(Tag.title)
+        )).scalars())
+        comments: list[Comment] = list((await session.execute(
+            select(Comment).filter_by(owner_id=owner_id).options(joinedload(Comment.owner)).order_by(Comment.id)
+        )).scalars())
+
+    assert tag_list_adapter.dump_json(tag_records) == TypeAdapter(list[TagRead]).dump_json(
+        [TagRead.model_validate(tag, from_attributes=True) for tag in tags]
+    )
+    # The comment list has no order of its own; compare both sides in id order.
+    comment_records.sort(key=lambda record: record.id)
+    assert comment_list_adapter.dump_json(comment_records) == TypeAdapter(list[CommentRead]).dump_json(
+        [CommentRead.model_validate(comment, from_attributes=True) for comment in comments]
+    )
+
+
+@pytest.mark.anyio
+async def test_task_without_description_reads_the_same_alone_and_listed(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='undescribed')
+    created: httpx.Response = await client.post('/tasks', json={'title': 'No description'}, headers=data.headers)
+    task_id: str = created.json()['id']
+
+    single: httpx.Response = await client.get(f'/tasks/{task_id}', headers=data.headers)
+    listed: httpx.Response = await client.get('/tasks', headers=data.headers)
+
+    assert single.status_code == 200
+    assert single.json()['description'] is None
+    assert [task['description'] for task in listed.json() if task['id'] == task_id] == [None]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('path, params', [
+    ('/tasks', {'sort_by': 'status', 'include_archived': 'true'}),
+    ('/tasks', {'sort_by': 'priority', 'order': 'asc'}),
+    ('/tags', {'sort_by': 'task_count'}),
+    ('/tags', {'sort_by': 'created_at', 'order': 'desc'}),
+])
+async def test_pages_split_ties_without_repeating_a_row(client: httpx.AsyncClient, path: str, params: dict) -> None:
+    data: SeededData = await seed(12, username='pager')
+    everything: list[dict] = (await client.get(path, params={**params, 'limit': 100}, headers=data.headers)).json()
+
+    paged: list[dict] = []
+    for page in range(1, len(everything) // 3 + 2):
+        paged += (await client.get(path, params={**params, 'page': page, 'limit': 3}, headers=data.headers)).json()
+
+    assert [row['id'] for row in paged] == [row['id'] for row in everything]
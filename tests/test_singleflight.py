@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class Call:
+    def __init__(self) -> None:
+        self.release: asyncio.Event = asyncio.Event()
+        self.started: int = 0
+        self.cancelled: int = 0
+
+    async def __call__(self) -> int:
+        self.started += 1
+
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+        return self.started
+
+
+async def until_waiting(flight: SingleFlight, key: str, waiters: int) -> None:
+    while key not in flight.flights or flight.flights[key].waiters < waiters:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_call() -> None:
+    flight: SingleFlight = SingleFlight('test')
+    call: Call = Call()
+
+    callers = [asyncio.create_task(flight.do('key', call)) for _ in range(3)]
+    await until_waiting(flight, 'key', 3)
+    call.release.set()
+
+    assert await asyncio.gather(*callers) == [1, 1, 1]
+    assert call.started == 1
+    assert flight.flights == {}
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_leaves_the_call_to_the_others() -> None:
+    flight: SingleFlight = SingleFlight('test')
+    call: Call = Call()
+
+    leaving = asyncio.create_task(flight.do('key', call))
+    staying = asyncio.create_task(flight.do('key', call))
+    await until_waiting(flight, 'key', 2)
+
+    leaving.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leaving
+
+    call.release.set()
+
+    assert await staying == 1
+    assert call.cancelled == 0
+
+
+@pytest.mark.anyio
+async def test_call_is_cancelled_once_every_caller_left() -> None:
+    flight: SingleFlight = SingleFlight('test')
+    call: Call = Call()
+
+    callers = [asyncio.create_task(flight.do('key', call)) for _ in range(2)]
+    await until_waiting(flight, 'key', 2)
+
+    for caller in callers:
+        caller.cancel()
+
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert call.cancelled == 1
+    assert flight.flights == {}
+
+    # The next caller starts a fresh call instead of joining the cancelled one.
+    call.release.set()
+    assert await flight.do('key', call) == 2
+
+
+@pytest.mark.anyio
+async def test_call_runs_on_without_callers_when_not_cancelled_on_abandon() -> None:
+    flight: SingleFlight = SingleFlight('test', cancel_abandoned=False)
+    call: Call = Call()
+
+    leaving = asyncio.create_task(flight.do('key', call))
+    await until_waiting(flight, 'key', 1)
+    leaving.cancel()
+    await asyncio.gather(leaving, return_exceptions=True)
+
+    # A later caller joins the call still running rather than starting another.
+    joining = asyncio.create_task(flight.do('key', call))
+    await until_waiting(flight, 'key', 1)
+    call.release.set()
+
+    assert await joining == 1
+    assert (call.started, call.cancelled) == (1, 0)
+    assert flight.flights == {}
+
+
+@pytest.mark.anyio
+async def test_failure_reaches_every_caller_and_is_not_kept() -> None:
+    flight: SingleFlight = SingleFlight('test')
+    release: asyncio.Event = asyncio.Event()
+
+    async def fail() -> int:
+        await release.wait()
+        raise ValueError('boom')
+
+    callers = [asyncio.create_task(flight.do('key', fail)) for _ in range(2)]
+    await until_waiting(flight, 'key', 2)
+    release.set()
+
+    results: list = await asyncio.gather(*callers, return_exceptions=True)
+    assert [str(result) for result in results] == ['boom', 'boom']
+    assert flight.flights == {}
+
+
+@pytest.mark.anyio
+async def test_leader_bound_call_stops_with_its_leader_and_followers_run_it_again() -> None:
+    flight: SingleFlight = SingleFlight('test', leader_bound=True)
+    call: Call = Call()
+
+    leader = asyncio.create_task(flight.do('key', call))
+    follower = asyncio.create_task(flight.do('key', call))
+    await until_waiting(flight, 'key', 2)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    await until_waiting(flight, 'key', 1)
+    call.release.set()
+
+    assert await follower == 2
+    assert call.cancelled == 1
+    assert flight.flights == {}
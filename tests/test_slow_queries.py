@@ -0,0 +1,42 @@
+import json
+import logging
+from typing import Iterator
+
+import pytest
+
+import slow_queries
+from database import async_engine
+from slow_queries import SlowQueryLog
+
+
+@pytest.fixture
+def slow_query_log(caplog: pytest.LogCaptureFixture) -> Iterator[SlowQueryLog]:
+    # With a handler already there the log writes no file; caplog sees the entries instead.
+    logger: logging.Logger = logging.getLogger('slow_queries')
+    logger.addHandler(logging.NullHandler())
+    caplog.set_level(logging.INFO, logger='slow_queries')
+
+    yield SlowQueryLog(async_engine)
+
+    logger.handlers.clear()
+
+
+def test_tracked_statements_stay_bounded(slow_query_log: SlowQueryLog, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(slow_queries, 'MAX_TRACKED_SHAPES', 3)
+
+    for i in range(10):
+        slow_query_log.capture(f'SELECT {i}', (), False, 1.0)
+        slow_query_log.write({'statement': f'SELECT {i}'}, [f'SCAN t{i}'])
+
+    assert list(slow_query_log.last_logged_at) == ['SELECT 7[]', 'SELECT 8[]', 'SELECT 9[]']
+    assert list(slow_query_log.last_fingerprint) == ['SELECT 7', 'SELECT 8', 'SELECT 9']
+
+
+def test_plan_change_is_flagged_for_a_tracked_statement(slow_query_log: SlowQueryLog, caplog: pytest.LogCaptureFixture) -> None:
+    slow_query_log.write({'statement': 'SELECT 1'}, ['SCAN tasks'])
+    slow_query_log.write({'statement': 'SELECT 1'}, ['SEARCH tasks USING INDEX ix_tasks_owner_id (owner_id=?)'])
+
+    first, second = (json.loads(record.getMessage()) for record in caplog.records)
+
+    assert (first['full_scan'], first['plan_changed_from']) == (True, None)
+    assert (second['full_scan'], second['plan_changed_from']) == (False, first['plan_fingerprint'])
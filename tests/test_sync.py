@@ -0,0 +1,100 @@
+import httpx
+import pytest
+
+from tasks.compaction import compact
+
+from conftest import SeededData, seed
+
+
+async def sync_all(client: httpx.AsyncClient, data: SeededData, since: int = 0, limit: int = 100) -> tuple[list[dict], int]:
+    changes: list[dict] = []
+    cursor: str | None = None
+
+    while True:
+        params: dict = {'cursor': cursor} if cursor else {'since': since}
+        response: httpx.Response = await client.get('/sync', params={**params, 'limit': limit}, headers=data.headers)
+        assert response.status_code == 200, response.text
+        page: dict = response.json()
+        assert len(page['changes']) <= limit
+        changes += page['changes']
+        since, cursor = page['next_since'], page['next_cursor']
+
+        if not page['has_more']:
+            return changes, since
+
+
+@pytest.mark.anyio
+async def test_full_sync_pages_through_every_entity(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='syncer')
+
+    changes, _ = await sync_all(client, data, limit=4)
+
+    assert {(change['entity'], change['id']) for change in changes} == {
+        *(('task', task_id) for task_id in data.task_ids),
+        *(('tag', tag_id) for tag_id in [*data.tag_ids, data.spare_tag_id]),
+        *(('comment', comment_id) for comment_id in data.comment_ids),
+    }
+    assert [change['seq'] for change in changes] == sorted(change['seq'] for change in changes)
+
+
+@pytest.mark.anyio
+async def test_delete_comes_back_as_a_tombstone(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='syncer')
+    _, since = await sync_all(client, data)
+
+    await client.patch(f'/tasks/{data.task_ids[0]}/update', json={'title': 'Updated'}, headers=data.headers)
+    await client.patch(f'/tags/{data.tag_ids[1]}/update', json={'title': 'renamed'}, headers=data.headers)
+    await client.delete(f'/tasks/{data.task_ids[0]}/delete', headers=data.headers)
+    changes, _ = await sync_all(client, data, since)
+
+    # The update is superseded by the delete; the tombstone carries no data.
+    assert [(change['entity'], change['id'], change['operation'], change['data']) for change in changes] == [
+        ('tag', data.tag_ids[1], 'upsert', changes[0]['data']),
+        ('task', data.task_ids[0], 'delete', None),
+    ]
+    assert changes[0]['data']['title'] == 'renamed'
+
+
+@pytest.mark.anyio
+async def test_position_below_the_horizon_is_gone(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(2, username='syncer')
+    _, stale = await sync_all(client, data)
+    await client.delete(f'/tasks/{data.task_ids[0]}/delete', headers=data.headers)
+    await client.delete(f'/tags/{data.tag_ids[0]}/delete', headers=data.headers)
+
+    # A negative retention makes every tombstone old enough to drop.
+    _, expired = await compact(retention_days=-1, batch_size=1)
+    assert expired == 2
+
+    for path in ('/sync', '/sync/stream'):
+        response: httpx.Response = await client.get(path, params={'since': stale}, headers=data.headers)
+        assert (response.status_code, response.json()) == (410, {'detail': 'Sync position is too old; resync from scratch.'})
+
+    # A resync from scratch sees the current state and can carry on from where it ends.
+    changes, since = await sync_all(client, data, limit=1)
+    ids: set[str] = {change['id'] for change in changes}
+    assert data.task_ids[1] in ids and not ids & {data.task_ids[0], data.tag_ids[0]}
+    assert (await client.get('/sync', params={'since': since}, headers=data.headers)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_resync_below_the_horizon_resumes_by_cursor_until_compacted_again(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='syncer')
+    await client.delete(f'/tasks/{data.task_ids[0]}/delete', headers=data.headers)
+    await compact(retention_days=-1, batch_size=1)
+
+    first: dict = (await client.get('/sync', params={'limit': 1}, headers=data.headers)).json()
+    assert len(first['changes']) == 1 and first['next_cursor'] is not None
+
+    # A plain position below the horizon is refused, the cursor carries on.
+    below: httpx.Response = await client.get('/sync', params={'since': first['next_since']}, headers=data.headers)
+    resumed: httpx.Response = await client.get('/sync', params={'cursor': first['next_cursor']}, headers=data.headers)
+    assert (below.status_code, resumed.status_code) == (410, 200)
+
+    # Once the horizon moves, tombstones the resync still needed may be gone.
+    await client.delete(f'/tasks/{data.task_ids[1]}/delete', headers=data.headers)
+    await compact(retention_days=-1, batch_size=1)
+    moved: httpx.Response = await client.get('/sync', params={'cursor': first['next_cursor']}, headers=data.headers)
+    malformed: httpx.Response = await client.get('/sync', params={'cursor': 'nonsense'}, headers=data.headers)
+
+    assert (moved.status_code, malformed.status_code) == (410, 400)
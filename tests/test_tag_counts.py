@@ -0,0 +1,53 @@
+import httpx
+import pytest
+from sqlalchemy import update
+
+from cache import response_cache
+from database import async_engine
+from tasks.models import Tag
+from tasks.tag_counts import check
+
+from conftest import SeededData, seed
+
+
+async def task_counts(client: httpx.AsyncClient, data: SeededData) -> dict[str, int]:
+    tags: list[dict] = (await client.get('/tags', params={'limit': 100}, headers=data.headers)).json()
+
+    return {tag['id']: tag['task_count'] for tag in tags}
+
+
+@pytest.mark.anyio
+async def test_writes_keep_task_counts_exact(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='counter')
+    first, second, third = data.tag_ids
+    assert await task_counts(client, data) == {first: 1, second: 2, third: 3, data.spare_tag_id: 0}
+
+    await client.post(f'/tasks/{data.task_ids[1]}/tags', params={'tag_id': data.spare_tag_id}, headers=data.headers)
+    await client.delete(f'/tasks/{data.task_ids[2]}/tags', params={'tag_id': third}, headers=data.headers)
+    await client.delete(f'/tasks/{data.task_ids[0]}/delete', headers=data.headers)
+    await client.post('/tasks/import', content=b'{"title": "Imported", "tags": ["tag1", "TAG2"]}', headers=data.headers)
+
+    assert await task_counts(client, data) == {first: 0, second: 2, third: 2, data.spare_tag_id: 1}
+    assert await check(batch_size=2, repair=False) == 0
+
+
+@pytest.mark.anyio
+async def test_check_finds_drift_and_repair_fixes_it(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(3, username='counter')
+    counts: dict[str, int] = await task_counts(client, data)
+
+    async with async_engine.begin() as connection:
+        await connection.execute(update(Tag).where(Tag.id == data.tag_ids[0]).values(task_count=99))
+        await connection.execute(update(Tag).where(Tag.id == data.tag_ids[2]).values(task_count=0))
+
+    # Drift written behind the app's back only shows once the cached list goes.
+    response_cache.invalidate(f'{data.username}-id')
+    assert (await task_counts(client, data))[data.tag_ids[0]] == 99
+
+    # A check alone changes nothing.
+    assert await check(batch_size=1, repair=False) == 2
+    assert await check(batch_size=1, repair=False) == 2
+
+    assert await check(batch_size=1, repair=True) == 2
+    assert await task_counts(client, data) == counts
+    assert await check(batch_size=1, repair=False) == 0
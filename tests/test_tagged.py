@@ -0,0 +1,83 @@
+import httpx
+import pytest
+
+from conftest import SeededData, seed
+
+
+async def seed_multiples(client: httpx.AsyncClient, count: int) -> tuple[SeededData, dict[str, str], dict[int, str]]:
+    """Tasks numbered 0..count-1, tagged 'even' and 'three' by divisibility; returns the tag and task ids."""
+    data: SeededData = await seed(1, username='intersector')
+    tag_ids: dict[str, str] = {}
+    task_ids: dict[int, str] = {}
+
+    for title in ('even', 'three'):
+        tag_ids[title] = (await client.post('/tags', json={'title': title}, headers=data.headers)).json()['id']
+
+    for i in range(count):
+        task: dict = (await client.post(
+            '/tasks', json={'title': f'Number {i}', 'description': 'Counted.'}, headers=data.headers,
+        )).json()
+        task_ids[i] = task['id']
+
+        for title, divisor in (('even', 2), ('three', 3)):
+            if i % divisor == 0:
+                await client.post(f'/tasks/{task["id"]}/tags', params={'tag_id': tag_ids[title]}, headers=data.headers)
+
+    return data, tag_ids, task_ids
+
+
+async def walk(client: httpx.AsyncClient, data: SeededData, path: str, params: dict, limit: int) -> list[list[str]]:
+    pages: list[list[str]] = []
+    cursor: str | None = None
+
+    while True:
+        response: httpx.Response = await client.get(
+            path, params={**params, 'limit': limit, **({'cursor': cursor} if cursor else {})}, headers=data.headers,
+        )
+        assert response.status_code == 200, response.text
+        page: dict = response.json()
+        pages.append([task['id'] for task in page['tasks']])
+        cursor = page['next_cursor']
+
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('limit', [1, 2, 3])
+async def test_intersection_pages_in_task_id_order(client: httpx.AsyncClient, limit: int) -> None:
+    data, tag_ids, task_ids = await seed_multiples(client, 13)
+    expected: list[str] = sorted(task_ids[i] for i in range(0, 13, 6))
+
+    pages: list[list[str]] = await walk(
+        client, data, '/tasks/tagged', {'tag_id': [tag_ids['three'], tag_ids['even'], tag_ids['three']]}, limit,
+    )
+
+    assert [task_id for page in pages for task_id in page] == expected
+    assert [len(page) for page in pages] == [min(limit, 3 - i) for i in range(0, 3, limit)]
+
+
+@pytest.mark.anyio
+async def test_single_tag_listing_pages_and_skips_deleted_tasks(client: httpx.AsyncClient) -> None:
+    data, tag_ids, task_ids = await seed_multiples(client, 7)
+    await client.delete(f'/tasks/{task_ids[2]}/delete', headers=data.headers)
+
+    pages: list[list[str]] = await walk(client, data, f'/tags/{tag_ids["even"]}/tasks', {}, 2)
+
+    assert [task_id for page in pages for task_id in page] == sorted(task_ids[i] for i in (0, 4, 6))
+
+
+@pytest.mark.anyio
+async def test_unused_and_unknown_tags(client: httpx.AsyncClient) -> None:
+    data, tag_ids, _ = await seed_multiples(client, 1)
+    unused: str = (await client.post('/tags', json={'title': 'unused'}, headers=data.headers)).json()['id']
+
+    empty: httpx.Response = await client.get(
+        '/tasks/tagged', params={'tag_id': [tag_ids['even'], unused]}, headers=data.headers,
+    )
+    unknown: httpx.Response = await client.get(
+        '/tasks/tagged', params={'tag_id': [tag_ids['even'], 'missing']}, headers=data.headers,
+    )
+
+    assert empty.json() == {'tasks': [], 'next_cursor': None}
+    assert (unknown.status_code, unknown.json()) == (404, {'detail': 'Tag is not found.'})
@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from database import async_engine, async_session_maker
+from tasks.models import Tag
+from tasks.repository import TagRepository
+from tasks.schemas import TagCreate
+
+from conftest import SeededData, seed
+
+
+async def create_tag(client: httpx.AsyncClient, data: SeededData, title: str, status_code: int = 201) -> dict:
+    response: httpx.Response = await client.post('/tags', json={'title': title}, headers=data.headers)
+    assert response.status_code == status_code, response.text
+
+    return response.json()
+
+
+async def suggest(client: httpx.AsyncClient, data: SeededData, prefix: str, limit: int = 10) -> list[str]:
+    response: httpx.Response = await client.get('/tags/suggest', params={'prefix': prefix, 'limit': limit}, headers=data.headers)
+    assert response.status_code == 200, response.text
+
+    return [tag['title'] for tag in response.json()]
+
+
+@pytest.mark.anyio
+async def test_titles_differing_in_case_and_spacing_are_one_tag(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='tagger')
+
+    work: dict = await create_tag(client, data, 'Work')
+    again: dict = await create_tag(client, data, '  WORK ', status_code=200)
+    homes: list[httpx.Response] = await asyncio.gather(*(
+        client.post('/tags', json={'title': title}, headers=data.headers) for title in ('Home', 'HOME', 'home')
+    ))
+
+    assert (again['id'], again['title']) == (work['id'], 'Work')
+    assert sorted(home.status_code for home in homes) == [200, 200, 201]
+    assert len({home.json()['id'] for home in homes}) == 1
+
+    response: httpx.Response = await client.post(
+        f'/tasks/{data.task_ids[0]}/tags', params={'title': 'wOrK'}, headers=data.headers,
+    )
+    assert response.status_code == 200, response.text
+    tag: dict = (await client.get(f'/tags/{work["id"]}', headers=data.headers)).json()
+    assert tag['task_count'] == 1
+
+    async with async_engine.connect() as connection:
+        rows: int = (await connection.execute(
+            select(func.count()).select_from(Tag)
+            .where(Tag.owner_id == f'{data.username}-id', Tag.normalized_title.in_(['work', 'home']))
+        )).scalar_one()
+    assert rows == 2
+
+
+@pytest.mark.anyio
+async def test_finding_an_existing_tag_leaves_no_transaction_open(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='tagger')
+    work: dict = await create_tag(client, data, 'Work')
+
+    async with async_session_maker() as session:
+        tag, created = await TagRepository(session).get_or_create(TagCreate(title='WORK'), f'{data.username}-id')
+        driver_connection = (await (await session.connection()).get_raw_connection()).driver_connection
+
+        assert (tag.id, created) == (work['id'], False)
+        assert not driver_connection.in_transaction
+
+
+@pytest.mark.anyio
+async def test_renaming_onto_another_tag_is_409(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='tagger')
+    work: dict = await create_tag(client, data, 'Work')
+    await create_tag(client, data, 'Home')
+
+    taken: httpx.Response = await client.patch(f'/tags/{work["id"]}/update', json={'title': 'HOME'}, headers=data.headers)
+    recased: httpx.Response = await client.patch(f'/tags/{work["id"]}/update', json={'title': 'WORK'}, headers=data.headers)
+
+    assert (taken.status_code, taken.json()) == (409, {'detail': 'A tag with this title already exists.'})
+    assert (recased.status_code, recased.json()['title']) == (200, 'WORK')
+
+
+@pytest.mark.anyio
+async def test_suggest_matches_the_normalized_prefix(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='tagger')
+    other: SeededData = await seed(1, username='other_tagger')
+
+    for title in ('Travel', 'trains', 'Ts', 'Straße', 'Strand', 'Stats'):
+        await create_tag(client, data, title)
+
+    await create_tag(client, other, 'Tram')
+
+    # 'Ts' sits on the upper bound of the 'tr' range and must stay out; other owners' tags never show.
+    assert await suggest(client, data, 'TR') == ['trains', 'Travel']
+    assert await suggest(client, data, 'strass') == ['Straße']
+    assert await suggest(client, data, 'st', limit=2) == ['Stats', 'Strand']
+    assert await suggest(client, data, 'x') == []
+    await create_tag(client, data, 'st\U0010ffff\U0010ffff')
+    assert await suggest(client, data, 'st\U0010ffff') == ['st\U0010ffff\U0010ffff']
+    assert await suggest(client, data, '\U0010ffff') == []
@@ -0,0 +1,81 @@
+import httpx
+import pytest
+
+from conftest import PASSWORD, SeededData, seed
+
+
+NEW_USER: dict = {
+    'fullname': 'New User', 'username': 'new_user', 'email': 'new.user@example.com', 'hashed_password': PASSWORD,
+}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(('changes', 'detail'), [
+    ({'username': None}, 'Username is required.'),
+    # The pattern is checked first and covers the length, as the old validators did.
+    ({'username': 'ab'}, 'Username must contains at least one letter and one number.'),
+    ({'username': 'no spaces'}, 'Username must contains at least one letter and one number.'),
+    ({'fullname': 'R2-D2'}, 'Fullname must contains only letters, spaces and optional periods.'),
+    ({'email': 'a@b.cd'}, 'Email length must be between 10 and 128 characters.'),
+    ({'email': 'not-an-email-address'}, 'Email is not valid.'),
+    ({'email': 'a@b.c'}, 'Email is not valid.'),
+    ({'hashed_password': 'abc1'}, 'Password length must be between 6 and 32 characters.'),
+    ({'hashed_password': 'lettersonly'}, 'Password must contain at least one letter and one number.'),
+    ({'hashed_password': 'abc'}, 'Password must contain at least one letter and one number.'),
+])
+async def test_register_maps_constraint_errors_to_400(client: httpx.AsyncClient, changes: dict, detail: str) -> None:
+    response: httpx.Response = await client.post('/auth/register', json={**NEW_USER, **changes})
+
+    assert (response.status_code, response.json()) == (400, {'detail': detail})
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(('path', 'body', 'detail'), [
+    ('/tasks', {'title': 'ab'}, 'Title length must be between 3 and 30 characters.'),
+    ('/tasks', {'title': 'Task', 'description': 'x' * 201}, 'Description length must be between 0 and 200 characters.'),
+    ('/tasks', {'title': 'Task', 'priority': 'urgent'}, "Unknown value 'urgent' for priority."),
+    ('/tasks', {'title': 'Task', 'due_date': 'tomorrow'}, 'Mismatching datetime format. It should be YYYY-MM-DDTHH:MM:SS.'),
+    ('/tasks', {'title': 'Task', 'due_date': '2000-01-01T00:00:00'}, 'Due date cannot be less than or equal to current date.'),
+    ('/tasks', {'title': ' ab '}, 'Title length must be between 3 and 30 characters.'),
+    ('/tags', {'title': 'a'}, 'Title length must be between 2 and 10 characters.'),
+])
+async def test_create_maps_constraint_errors_to_400(client: httpx.AsyncClient, path: str, body: dict, detail: str) -> None:
+    data: SeededData = await seed(1, username='validated')
+
+    response: httpx.Response = await client.post(path, json=body, headers=data.headers)
+
+    assert (response.status_code, response.json()) == (400, {'detail': detail})
+
+
+@pytest.mark.anyio
+async def test_titles_are_measured_stripped_but_stored_as_given(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='validated')
+
+    task: httpx.Response = await client.post('/tasks', json={'title': ' Padded task '}, headers=data.headers)
+    tag: httpx.Response = await client.post('/tags', json={'title': ' padded '}, headers=data.headers)
+
+    assert (task.status_code, task.json()['title']) == (201, ' Padded task ')
+    assert tag.json()['title'] == ' padded '
+
+
+@pytest.mark.anyio
+async def test_update_maps_constraint_errors_to_400(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='validated')
+
+    response: httpx.Response = await client.patch(
+        f'/tasks/{data.task_ids[0]}/update', json={'status': 'paused'}, headers=data.headers,
+    )
+
+    assert (response.status_code, response.json()) == (400, {'detail': 'Unknown value for status.'})
+
+
+@pytest.mark.anyio
+async def test_errors_without_a_message_stay_422(client: httpx.AsyncClient) -> None:
+    data: SeededData = await seed(1, username='validated')
+
+    missing_field: httpx.Response = await client.post('/comments', params={'task_id': data.task_ids[0]}, json={}, headers=data.headers)
+    bad_query: httpx.Response = await client.get('/tasks', params={'limit': 'many'}, headers=data.headers)
+    not_a_string: httpx.Response = await client.post('/tags', json={'title': 5}, headers=data.headers)
+
+    assert (missing_field.status_code, bad_query.status_code, not_a_string.status_code) == (422, 422, 422)
+    assert missing_field.json()['detail'][0]['loc'] == ['body', 'comment']